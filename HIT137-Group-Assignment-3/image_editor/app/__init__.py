@@ -1,4 +1,12 @@
 # App package initialization
-from .gui import PictureProcessorApp
-
+# The GUI is imported on first use, so that headless tools (batch, video,
+# service) and the startup placeholder do not load Tk support and OpenCV.
 __all__ = ['PictureProcessorApp']
+
+
+def __getattr__(name: str):
+    """Import PictureProcessorApp when it is first accessed."""
+    if name == "PictureProcessorApp":
+        from .gui import PictureProcessorApp
+        return PictureProcessorApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
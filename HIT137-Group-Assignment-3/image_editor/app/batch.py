@@ -0,0 +1,117 @@
+"""Headless batch processing of image files with a process pool.
+
+Files are matched from a directory or glob, each worker decodes one file,
+runs the operation chain from ``filters`` and writes the result atomically
+(temporary file in the output directory followed by ``os.replace``).
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+
+from .fileio import write_image_atomic
+from .filters import Chain, apply_chain, parse_chain
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".tif")
+
+
+def collect_files(source: str) -> List[str]:
+    """Return the sorted image files in a directory or matching a glob."""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(
+        p for p in paths
+        if os.path.isfile(p) and p.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def process_file(task: Tuple[str, str, Chain]) -> Tuple[str, Optional[str]]:
+    """Process one file in a worker; return (path, error message or None)."""
+    src, dst, chain = task
+    try:
+        pic = cv2.imread(src)
+        if pic is None:
+            raise IOError("Unable to decode image")
+        pic = cv2.cvtColor(pic, cv2.COLOR_BGR2RGB)
+        write_image_atomic(dst, apply_chain(pic, chain))
+        return src, None
+    except Exception as e:
+        return src, str(e)
+
+
+def init_pool_worker() -> None:
+    """Keep OpenCV single threaded inside pool workers to avoid oversubscription.
+
+    Shared by every process pool in the application.
+    """
+    cv2.setNumThreads(1)
+
+
+def run_batch(
+    source: str,
+    output_dir: str,
+    chain: Chain,
+    workers: Optional[int] = None,
+    suffix: str = "",
+    verbose: bool = True,
+) -> Tuple[int, int, float]:
+    """Run chain over every file in source; return (processed, failed, seconds)."""
+    files = collect_files(source)
+    if not files:
+        raise ValueError(f"No image files found for: {source}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    tasks = []
+    for path in files:
+        name, ext = os.path.splitext(os.path.basename(path))
+        tasks.append((path, os.path.join(output_dir, f"{name}{suffix}{ext}"), chain))
+
+    processed = failed = 0
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes=workers, initializer=init_pool_worker) as pool:
+        for path, error in pool.imap_unordered(process_file, tasks, chunksize=4):
+            if error is None:
+                processed += 1
+            else:
+                failed += 1
+                print(f"Error processing {path}: {error}", file=sys.stderr)
+            if verbose and (processed + failed) % 100 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{processed + failed}/{len(tasks)} files, "
+                      f"{(processed + failed) / elapsed:.1f} images/s")
+    return processed, failed, time.perf_counter() - start
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point for batch processing."""
+    parser = argparse.ArgumentParser(description="Apply an operation chain to many images.")
+    parser.add_argument("source", help="Input directory or glob, e.g. 'photos/**/*.jpg'")
+    parser.add_argument("output", help="Output directory")
+    parser.add_argument(
+        "-c", "--chain", required=True,
+        help="Comma separated operations, e.g. 'grayscale,blur=21,brightness=-50,resize=0.5'",
+    )
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--suffix", default="", help="Suffix added to output file names")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the final summary")
+    args = parser.parse_args(argv)
+
+    try:
+        chain = parse_chain(args.chain)
+        processed, failed, elapsed = run_batch(
+            args.source, args.output, chain, args.workers, args.suffix, not args.quiet
+        )
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 2
+
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"Processed {processed} images ({failed} failed) in {elapsed:.2f}s: {rate:.1f} images/s")
+    return 1 if failed else 0
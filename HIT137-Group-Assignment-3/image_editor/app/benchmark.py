@@ -0,0 +1,276 @@
+"""Headless benchmarks for every image operation.
+
+Each operation runs on synthetic RGB images from 1 MP to 100 MP. For every
+(operation, size) pair the best wall time over several runs, the throughput
+in megapixels per second and the peak memory allocated through Python
+(numpy and OpenCV output buffers, measured with ``tracemalloc``) are
+recorded. Results can be saved as a JSON baseline, and later runs compared
+against it: any operation slower or hungrier than the baseline by more than
+the threshold is reported as a regression and the command exits non-zero.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .filters import OPERATIONS, apply_operation
+from .parallel import TiledExecutor
+
+# Parameters the editor's buttons use for each operation
+DEFAULT_PARAMS: Dict[str, Tuple[float, ...]] = {
+    "blur": (15,),
+    "edge": (100, 200),
+    "brightness": (50,),
+    "resize": (0.5,),
+}
+
+# Blur radii benchmarked in addition to the default blur, to catch large
+# kernels falling off the constant-cost strategies in blurengine
+LARGE_BLUR_RADII = (50, 300)
+
+# Largest preview size on the editor canvases (gui.MAX_WIDTH, gui.MAX_HEIGHT)
+DISPLAY_SIZE = (600, 600)
+
+DEFAULT_SIZES = (1, 10, 100)
+DEFAULT_THRESHOLD = 0.25
+BASELINE_VERSION = 1
+
+
+class BenchResult(NamedTuple):
+    """Measurements of one operation at one image size."""
+    operation: str
+    megapixels: float
+    seconds: float
+    peak_bytes: int
+
+    @property
+    def key(self) -> str:
+        """Identifier used in baseline files, e.g. "blur@10MP"."""
+        return f"{self.operation}@{self.megapixels:g}MP"
+
+    @property
+    def mp_per_s(self) -> float:
+        """Throughput in megapixels per second."""
+        return self.megapixels / self.seconds if self.seconds > 0 else float("inf")
+
+
+def synthetic_image(megapixels: float, seed: int = 0) -> np.ndarray:
+    """Return a deterministic 4:3 RGB image of about megapixels million pixels.
+
+    Smooth gradients with mild noise and a grid of hard edges, so that blur
+    and edge detection do a realistic amount of work.
+    """
+    h = max(1, int(round((megapixels * 1e6 * 3 / 4) ** 0.5)))
+    w = max(1, int(round(megapixels * 1e6 / h)))
+    x = np.linspace(0, 255, w, dtype=np.float32)
+    y = np.linspace(0, 255, h, dtype=np.float32)
+    image = np.empty((h, w, 3), dtype=np.uint8)
+    image[..., 0] = x[None, :]
+    image[..., 1] = y[:, None]
+    image[..., 2] = ((x[None, :] + y[:, None]) / 2).astype(np.uint8)
+    noise = np.empty((h, w, 3), dtype=np.uint8)
+    cv2.setRNGSeed(seed)
+    cv2.randu(noise, 0, 24)
+    cv2.add(image, noise, dst=image)
+    image[::64] = 255
+    image[:, ::64] = 0
+    return image
+
+
+def display_preview(image: np.ndarray) -> Image.Image:
+    """The headless part of a canvas redraw: fit to the canvas and convert for Tk."""
+    h, w = image.shape[:2]
+    ratio = min(DISPLAY_SIZE[0] / w, DISPLAY_SIZE[1] / h, 1.0)
+    size = (max(1, int(w * ratio)), max(1, int(h * ratio)))
+    return Image.fromarray(cv2.resize(image, size, interpolation=cv2.INTER_AREA))
+
+
+def benchmark_functions(executor: Optional[TiledExecutor] = None) -> Dict[str, Callable[[np.ndarray], object]]:
+    """Map benchmark names to single-argument functions of an image."""
+    functions: Dict[str, Callable[[np.ndarray], object]] = {}
+    for name in OPERATIONS:
+        params = DEFAULT_PARAMS.get(name, ())
+        if executor is not None:
+            functions[name] = lambda image, name=name, params=params: executor.run_chain(image, [(name, params)])
+        else:
+            functions[name] = lambda image, name=name, params=params: apply_operation(image, name, params)
+    for radius in LARGE_BLUR_RADII:
+        params = (2 * radius + 1,)
+        if executor is not None:
+            functions[f"blur_r{radius}"] = lambda image, params=params: executor.run_chain(image, [("blur", params)])
+        else:
+            functions[f"blur_r{radius}"] = lambda image, params=params: apply_operation(image, "blur", params)
+    functions["display"] = display_preview
+    return functions
+
+
+def measure(func: Callable[[np.ndarray], object], image: np.ndarray, repeat: int = 3) -> Tuple[float, int]:
+    """Return (best seconds, peak traced bytes) of func(image) over repeat runs."""
+    func(image)  # Warm up caches and lazily initialized OpenCV state
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(image)
+        best = min(best, time.perf_counter() - start)
+
+    # Measure memory separately, since tracing slows allocations down
+    tracemalloc.start()
+    try:
+        func(image)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(
+    sizes: Sequence[float] = DEFAULT_SIZES,
+    operations: Optional[Sequence[str]] = None,
+    repeat: int = 3,
+    executor: Optional[TiledExecutor] = None,
+    report: Optional[Callable[[BenchResult], None]] = None,
+) -> List[BenchResult]:
+    """Benchmark operations (all by default) on synthetic images of each size."""
+    functions = benchmark_functions(executor)
+    names = list(operations) if operations else list(functions)
+    unknown = [n for n in names if n not in functions]
+    if unknown:
+        raise ValueError(f"Unknown operation: {', '.join(unknown)}")
+
+    results = []
+    for megapixels in sizes:
+        image = synthetic_image(megapixels)
+        for name in names:
+            seconds, peak = measure(functions[name], image, repeat)
+            result = BenchResult(name, megapixels, seconds, peak)
+            results.append(result)
+            if report is not None:
+                report(result)
+        del image
+    return results
+
+
+def save_baseline(path: str, results: Sequence[BenchResult]) -> None:
+    """Write results to a JSON baseline file."""
+    data = {
+        "version": BASELINE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "cpus": os.cpu_count(),
+        },
+        "results": {
+            r.key: {"seconds": r.seconds, "mp_per_s": r.mp_per_s, "peak_bytes": r.peak_bytes}
+            for r in results
+        },
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict[str, dict]:
+    """Read the results of a JSON baseline file."""
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version: {data.get('version')}")
+    return data["results"]
+
+
+def compare(
+    results: Sequence[BenchResult],
+    baseline: Dict[str, dict],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """Return a message for every result worse than its baseline by more than threshold."""
+    regressions = []
+    for r in results:
+        base = baseline.get(r.key)
+        if base is None:
+            continue
+        if r.seconds > base["seconds"] * (1 + threshold):
+            regressions.append(
+                f"{r.key}: {r.seconds:.4f}s vs baseline {base['seconds']:.4f}s "
+                f"(+{r.seconds / base['seconds'] - 1:.0%})"
+            )
+        if base["peak_bytes"] and r.peak_bytes > base["peak_bytes"] * (1 + threshold):
+            regressions.append(
+                f"{r.key}: peak {r.peak_bytes / 1024 ** 2:.1f} MB vs baseline "
+                f"{base['peak_bytes'] / 1024 ** 2:.1f} MB (+{r.peak_bytes / base['peak_bytes'] - 1:.0%})"
+            )
+    return regressions
+
+
+def format_result(result: BenchResult, baseline: Optional[Dict[str, dict]] = None) -> str:
+    """One table row for a result, with the change against the baseline if known."""
+    row = (f"{result.operation:<13}{result.megapixels:>7g} MP {result.seconds:>10.4f} s "
+           f"{result.mp_per_s:>10.1f} MP/s {result.peak_bytes / 1024 ** 2:>9.1f} MB")
+    base = (baseline or {}).get(result.key)
+    if base is not None:
+        row += f"   {result.seconds / base['seconds'] - 1:+.0%} time"
+    return row
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point for the benchmark suite."""
+    parser = argparse.ArgumentParser(description="Benchmark the image operations on synthetic images.")
+    parser.add_argument(
+        "-s", "--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="Comma separated image sizes in megapixels (default: 1,10,100)",
+    )
+    parser.add_argument(
+        "-o", "--operations", default="",
+        help="Comma separated operations to run (default: all, plus 'display')",
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timed runs per measurement; the best is kept")
+    parser.add_argument("--tiled", action="store_true", help="Run operations on the multi-threaded tiled executor")
+    parser.add_argument("-b", "--baseline", help="Baseline JSON file to compare against")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write the results as a new baseline")
+    parser.add_argument(
+        "-t", "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="Allowed slowdown or memory growth over the baseline, e.g. 0.25 for 25%%",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [float(s) for s in args.sizes.split(",") if s.strip()]
+        if not sizes or min(sizes) <= 0:
+            raise ValueError("Sizes must be positive numbers")
+        operations = [o.strip() for o in args.operations.split(",") if o.strip()]
+        baseline = load_baseline(args.baseline) if args.baseline else None
+        executor = TiledExecutor() if args.tiled else None
+
+        print(f"{'operation':<13}{'size':>10} {'time':>12} {'throughput':>15} {'peak':>12}")
+        results = run_benchmarks(
+            sizes, operations, args.repeat, executor,
+            report=lambda r: print(format_result(r, baseline), flush=True),
+        )
+    except (ValueError, OSError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 2
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f"Baseline written to: {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nREGRESSION: {len(regressions)} measurements exceed the baseline by more "
+                  f"than {args.threshold:.0%}:", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} of the baseline")
+    return 0
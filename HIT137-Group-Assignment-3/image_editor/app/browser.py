@@ -0,0 +1,240 @@
+"""Folder browser window showing a lazily loaded thumbnail grid.
+
+The canvas scroll region covers the whole folder, but items only exist for
+the rows in view (plus one row either side). Scrolling deletes the cells
+that left the view and creates the new ones, so a folder of 10,000 images
+costs no more to show than one of 50. Thumbnails missing from the disk
+cache are requested from its process pool; requests for cells scrolled out
+of view are cancelled before they start.
+"""
+import os
+import tkinter as tk
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from PIL import Image, ImageTk
+
+from .batch import collect_files
+from .rendering import RedrawScheduler
+from .thumbnails import ThumbnailCache
+
+# Space around each thumbnail and below it for the file name
+CELL_PADDING = 8
+LABEL_HEIGHT = 16
+
+
+class ThumbnailBrowser(tk.Toplevel):
+    """Scrollable grid of the thumbnails of one folder's images."""
+
+    def __init__(self, parent: tk.Misc, cache: ThumbnailCache, on_open: Callable[[str], None],
+                 poll_ms: int = 50):
+        """Create the window; on_open is called with the path of a double-clicked image."""
+        super().__init__(parent)
+        self.geometry("720x600")
+        self.cache = cache
+        self.on_open = on_open
+        self.poll_ms = poll_ms
+        self.files: List[str] = []
+        self.columns = 1
+        self.selected: Optional[int] = None
+        # Canvas items and Tk image of every cell in view, by file index
+        self.cells: Dict[int, Tuple[List[int], Optional[ImageTk.PhotoImage]]] = {}
+        # Cells in view still showing a placeholder
+        self.waiting: Dict[int, str] = {}
+        # Files whose thumbnails could not be generated this session
+        self.failed: Set[str] = set()
+        self._poll_job: Optional[str] = None
+
+        self.canvas = tk.Canvas(self, bg="white", highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.config(yscrollcommand=self.on_view_change, yscrollincrement=self.cell_height // 4)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.status = tk.Label(self, text="", bd=1, relief=tk.SUNKEN, anchor=tk.W)
+        self.status.pack(side=tk.BOTTOM, fill=tk.X, before=self.canvas)
+
+        self.canvas.bind("<Configure>", self.on_resize)
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Double-Button-1>", self.on_double_click)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", lambda _: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda _: self.canvas.yview_scroll(1, "units"))
+        self.bind("<Return>", lambda _: self.open_selected())
+
+        self.redraw = RedrawScheduler(self, {"grid": self.render_visible})
+
+    @property
+    def cell_width(self) -> int:
+        """Horizontal space taken by one thumbnail."""
+        return self.cache.size + 2 * CELL_PADDING
+
+    @property
+    def cell_height(self) -> int:
+        """Vertical space taken by one thumbnail and its file name."""
+        return self.cache.size + LABEL_HEIGHT + 2 * CELL_PADDING
+
+    def show_folder(self, folder: str) -> None:
+        """List folder's images and show the first rows of thumbnails."""
+        self.files = collect_files(folder)
+        self.title(f"Browse: {folder}")
+        self.selected = None
+        self.clear_cells()
+        self.failed.clear()
+        self.layout()
+        self.canvas.yview_moveto(0)
+        self.status.config(text=f"{len(self.files)} images")
+
+    def layout(self) -> None:
+        """Fit the number of columns to the canvas width and size the scroll region."""
+        width = max(self.canvas.winfo_width(), self.cell_width)
+        self.columns = max(1, width // self.cell_width)
+        rows = -(-len(self.files) // self.columns)
+        self.canvas.config(scrollregion=(0, 0, self.columns * self.cell_width, rows * self.cell_height))
+        self.redraw.request()
+
+    def on_resize(self, _: tk.Event) -> None:
+        """Re-flow the grid when the number of columns that fit changes."""
+        width = max(self.canvas.winfo_width(), self.cell_width)
+        if max(1, width // self.cell_width) != self.columns:
+            self.clear_cells()
+            self.layout()
+        else:
+            self.redraw.request()
+
+    def on_wheel(self, event: tk.Event) -> None:
+        """Scroll by whole units whatever the platform's wheel delta."""
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, "units")
+
+    def on_view_change(self, first: str, last: str) -> None:
+        """Keep the scrollbar in sync and render the rows that came into view."""
+        self.scrollbar.set(first, last)
+        self.redraw.request()
+
+    def visible_range(self) -> range:
+        """Indices of the files in view, with one extra row above and below."""
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first_row = max(0, int(top // self.cell_height) - 1)
+        last_row = int(bottom // self.cell_height) + 1
+        return range(first_row * self.columns, min(len(self.files), (last_row + 1) * self.columns))
+
+    def render_visible(self) -> None:
+        """Create the cells that came into view and delete those that left it."""
+        visible = self.visible_range()
+        for index in [i for i in self.cells if i not in visible]:
+            self.delete_cell(index)
+        missing = []
+        for index in visible:
+            if index in self.cells:
+                continue
+            path = self.files[index]
+            thumb = self.cache.lookup(path)
+            self.create_cell(index, thumb)
+            if thumb is None and path not in self.failed:
+                missing.append(path)
+                self.waiting[index] = path
+
+        # Only thumbnails in view are worth generating
+        self.cache.cancel_except(set(self.waiting.values()))
+        self.cache.request(missing)
+        if self.waiting and self._poll_job is None:
+            self._poll_job = self.after(self.poll_ms, self.poll)
+
+    def create_cell(self, index: int, thumb: Optional[str]) -> None:
+        """Draw the thumbnail (or a placeholder) and file name of one file."""
+        row, col = divmod(index, self.columns)
+        x = col * self.cell_width + self.cell_width // 2
+        y = row * self.cell_height + CELL_PADDING
+        size = self.cache.size
+        items = [self.canvas.create_rectangle(
+            x - size // 2 - 3, y - 3, x + size // 2 + 3, y + size + 3,
+            outline="royalblue" if index == self.selected else "", width=3,
+        )]
+        photo = None
+        if thumb is not None:
+            try:
+                with Image.open(thumb) as im:
+                    photo = ImageTk.PhotoImage(im)
+            except Exception:
+                pass
+        if photo is not None:
+            items.append(self.canvas.create_image(x, y + size // 2, image=photo))
+        else:
+            label = "?" if self.files[index] in self.failed else "..."
+            items.append(self.canvas.create_rectangle(x - size // 2, y, x + size // 2, y + size,
+                                                      fill="gray90", outline="gray80"))
+            items.append(self.canvas.create_text(x, y + size // 2, text=label, fill="gray50"))
+        name = os.path.basename(self.files[index])
+        if len(name) > 20:
+            name = name[:9] + "..." + name[-8:]
+        items.append(self.canvas.create_text(x, y + size + LABEL_HEIGHT // 2 + 2, text=name))
+        self.cells[index] = (items, photo)
+
+    def delete_cell(self, index: int) -> None:
+        """Remove one cell's canvas items and release its image."""
+        items, _ = self.cells.pop(index)
+        self.waiting.pop(index, None)
+        self.canvas.delete(*items)
+
+    def clear_cells(self) -> None:
+        """Remove every cell and cancel outstanding thumbnail requests."""
+        for index in list(self.cells):
+            self.delete_cell(index)
+        self.cache.cancel_except(set())
+
+    def poll(self) -> None:
+        """Replace placeholders whose thumbnails have been generated."""
+        self._poll_job = None
+        for index, path in list(self.waiting.items()):
+            if self.cache.is_pending(path):
+                continue
+            del self.waiting[index]
+            thumb = self.cache.lookup(path)
+            if thumb is None:
+                self.failed.add(path)
+            self.delete_cell(index)
+            self.create_cell(index, thumb)
+        if self.waiting:
+            self._poll_job = self.after(self.poll_ms, self.poll)
+
+    def index_at(self, event: tk.Event) -> Optional[int]:
+        """Index of the file under the mouse, or None."""
+        col = int(self.canvas.canvasx(event.x) // self.cell_width)
+        row = int(self.canvas.canvasy(event.y) // self.cell_height)
+        index = row * self.columns + col
+        if 0 <= col < self.columns and 0 <= index < len(self.files):
+            return index
+        return None
+
+    def on_click(self, event: tk.Event) -> None:
+        """Select the clicked thumbnail."""
+        self.select(self.index_at(event))
+
+    def on_double_click(self, event: tk.Event) -> None:
+        """Open the double-clicked image in the editor."""
+        self.select(self.index_at(event))
+        self.open_selected()
+
+    def select(self, index: Optional[int]) -> None:
+        """Highlight the cell of index, un-highlighting the previous one."""
+        for old in (self.selected, index):
+            if old is not None and old in self.cells:
+                self.canvas.itemconfigure(self.cells[old][0][0], outline="")
+        self.selected = index
+        if index is not None:
+            if index in self.cells:
+                self.canvas.itemconfigure(self.cells[index][0][0], outline="royalblue")
+            self.status.config(text=f"{index + 1}/{len(self.files)}: {os.path.basename(self.files[index])}")
+
+    def open_selected(self) -> None:
+        """Open the selected image in the editor."""
+        if self.selected is not None:
+            self.on_open(self.files[self.selected])
+
+    def destroy(self) -> None:
+        """Cancel pending work and close the window."""
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        self.redraw.cancel()
+        self.cache.cancel_except(set())
+        super().destroy()
@@ -0,0 +1,67 @@
+"""Accounting of the memory held by the editor's pixel arrays.
+
+The editor refers to the same pixels under several names: the loaded
+picture, the picture being cropped (the same array, read-only, until one
+of them is replaced), the pipeline source (a numpy view of it) and the
+decoded image cache. ``MemoryTracker`` therefore counts bytes per
+underlying allocation: each one is attributed to the first holder that
+refers to it, however many others do too. Memory-mapped arrays are
+reported separately, since the operating system pages them in and out.
+"""
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+def allocation(array: np.ndarray) -> np.ndarray:
+    """The array owning the memory that array is a view of."""
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+class MemoryRow(NamedTuple):
+    """Memory held by one named holder of pixels."""
+    name: str
+    referenced: int  # bytes of the pixels it refers to
+    unique: int  # bytes of the in-memory allocations no earlier row refers to
+
+
+class MemoryUsage(NamedTuple):
+    """Memory held by the measured holders, each allocation counted once."""
+    rows: List[MemoryRow]
+    resident: int
+    mapped: int
+    peak: int
+
+
+class MemoryTracker:
+    """Measure the pixels held under several names, remembering the peak of the session."""
+
+    def __init__(self):
+        """Start with a peak of zero."""
+        self.peak = 0
+
+    def measure(self, holders: Sequence[Tuple[str, Iterable[Optional[np.ndarray]]]]) -> MemoryUsage:
+        """Measure each (name, arrays) holder in order and update the peak."""
+        seen: Set[int] = set()
+        rows = []
+        resident = mapped = 0
+        for name, arrays in holders:
+            referenced = unique = 0
+            for array in arrays:
+                if array is None:
+                    continue
+                referenced += array.nbytes
+                root = allocation(array)
+                if id(root) in seen:
+                    continue
+                seen.add(id(root))
+                if isinstance(root, np.memmap):
+                    mapped += root.nbytes
+                else:
+                    unique += root.nbytes
+            resident += unique
+            rows.append(MemoryRow(name, referenced, unique))
+        self.peak = max(self.peak, resident)
+        return MemoryUsage(rows, resident, mapped, self.peak)
@@ -0,0 +1,133 @@
+"""Fused per-pixel color engine.
+
+Point operations (invert, grayscale, sepia) are folded into a
+``ColorProgram``: a short list of stages, each a per-channel 256-entry lookup
+table followed by an optional 3x3 color matrix. Consecutive lookup tables
+compose into one table, which is exact, and a matrix following a table
+shares its stage, so "invert, invert, grayscale" takes two passes instead
+of three. Matrices are never multiplied together: the rounding between two
+of them would be lost. A program therefore gives exactly the image that
+running its operations one by one gives.
+
+Brightness shifts the HSV value channel, which scales all three channels of
+a pixel together and so cannot be written as per-channel tables or a
+matrix; it is not a point operation here. OpenCV's vectorized HSV
+conversion also rounds a pixel differently depending on where it falls in
+its row, so brightness does not commute with rotations, although it can
+still run on strips of whole rows.
+"""
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+SEPIA_KERNEL = np.array([
+    [0.272, 0.534, 0.131],
+    [0.349, 0.686, 0.168],
+    [0.393, 0.769, 0.189]
+])
+
+# ITU-R BT.601 luma weights, as used by cv2.COLOR_RGB2GRAY. A stage with
+# this matrix runs cv2.cvtColor, whose fixed-point rounding cv2.transform
+# does not reproduce exactly
+GRAYSCALE_MATRIX = np.array([[0.299, 0.587, 0.114]] * 3)
+
+IDENTITY_LUT = np.arange(256, dtype=np.uint8)
+
+
+def _as_channel_luts(lut: np.ndarray) -> np.ndarray:
+    """Return lut as a (3, 256) uint8 array, one table per channel."""
+    lut = np.asarray(lut, dtype=np.uint8)
+    if lut.shape == (256,):
+        lut = np.tile(lut, (3, 1))
+    if lut.shape != (3, 256):
+        raise ValueError("Lookup table must have shape (256,) or (3, 256)")
+    return lut
+
+
+class ColorProgram:
+    """A fused sequence of per-pixel color operations."""
+
+    def __init__(self):
+        """Create an empty (identity) program."""
+        # Each stage is (per-channel LUT or None, 3x3 matrix or None)
+        self.stages: List[List[Optional[np.ndarray]]] = []
+
+    def __len__(self) -> int:
+        return len(self.stages)
+
+    @property
+    def passes(self) -> int:
+        """Number of full passes over the image needed by apply()."""
+        return sum((lut is not None) + (matrix is not None) for lut, matrix in self.stages)
+
+    def then_lut(self, lut: np.ndarray) -> "ColorProgram":
+        """Append a lookup table of shape (256,) or (3, 256)."""
+        lut = _as_channel_luts(lut)
+        if self.stages and self.stages[-1][1] is None:
+            previous = self.stages[-1][0]
+            if previous is not None:
+                # Compose per channel: new_lut[old_lut[i]]
+                lut = np.take_along_axis(lut, previous.astype(np.intp), axis=1)
+            self.stages[-1][0] = lut
+        else:
+            self.stages.append([lut, None])
+        return self
+
+    def then_matrix(self, matrix: np.ndarray) -> "ColorProgram":
+        """Append a 3x3 color matrix applied as out = matrix @ rgb."""
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.shape != (3, 3):
+            raise ValueError("Color matrix must be 3x3")
+        if self.stages and self.stages[-1][1] is None:
+            self.stages[-1][1] = matrix
+        else:
+            self.stages.append([None, matrix])
+        return self
+
+    def then(self, other: "ColorProgram") -> "ColorProgram":
+        """Append every stage of another program."""
+        for lut, matrix in other.stages:
+            if lut is not None:
+                self.then_lut(lut)
+            if matrix is not None:
+                self.then_matrix(matrix)
+        return self
+
+    def apply(self, image: np.ndarray) -> np.ndarray:
+        """Run the program over an RGB uint8 image."""
+        if image.dtype != np.uint8 or image.ndim != 3 or image.shape[2] != 3:
+            raise ValueError("Color programs require an RGB uint8 image")
+        for lut, matrix in self.stages:
+            if lut is not None:
+                image = cv2.LUT(image, np.ascontiguousarray(lut.T).reshape(256, 1, 3))
+            if matrix is not None and np.array_equal(matrix, GRAYSCALE_MATRIX):
+                image = cv2.cvtColor(cv2.cvtColor(image, cv2.COLOR_RGB2GRAY), cv2.COLOR_GRAY2RGB)
+            elif matrix is not None:
+                image = cv2.transform(image, matrix)
+        return image
+
+
+INVERT_LUT = (255 - IDENTITY_LUT).astype(np.uint8)
+
+# Builders for each point operation, keyed by operation name
+POINT_OPERATIONS: Dict[str, Callable[..., ColorProgram]] = {
+    "invert": lambda: ColorProgram().then_lut(INVERT_LUT),
+    "grayscale": lambda: ColorProgram().then_matrix(GRAYSCALE_MATRIX),
+    "sepia": lambda: ColorProgram().then_matrix(SEPIA_KERNEL),
+}
+
+
+def is_point_operation(name: str) -> bool:
+    """True if the named operation can be fused into a ColorProgram."""
+    return name in POINT_OPERATIONS
+
+
+def compile_chain(chain: Sequence[Tuple[str, Sequence[float]]]) -> ColorProgram:
+    """Fuse a chain made only of point operations into one program."""
+    program = ColorProgram()
+    for name, params in chain:
+        if name not in POINT_OPERATIONS:
+            raise ValueError(f"Not a point operation: {name}")
+        program.then(POINT_OPERATIONS[name](*params))
+    return program
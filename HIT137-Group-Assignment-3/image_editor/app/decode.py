@@ -0,0 +1,71 @@
+"""Image decoding helpers, including reduced-resolution JPEG previews.
+
+libjpeg can decode a JPEG at 1/2, 1/4 or 1/8 scale by skipping most of the
+inverse DCT work, which OpenCV exposes through the ``IMREAD_REDUCED_*``
+flags. The editor shows at most a 600x600 preview, so decoding at the
+largest reduction that still fills the canvas puts pixels on screen long
+before a full decode would finish.
+"""
+import os
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Reduction factors libjpeg supports, largest first
+REDUCED_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+
+# Formats for which a reduced decode actually skips work
+REDUCIBLE_EXTENSIONS = (".jpg", ".jpeg", ".jpe", ".jfif")
+
+
+def read_image(path: str) -> np.ndarray:
+    """Decode an image file at full resolution as RGB; raise IOError on failure."""
+    pic = cv2.imread(path)
+    if pic is None:
+        raise IOError(f"Unable to decode image: {os.path.basename(path)}")
+    return cv2.cvtColor(pic, cv2.COLOR_BGR2RGB)
+
+
+def image_size(path: str) -> Optional[Tuple[int, int]]:
+    """Return (width, height) from the file header without decoding, or None."""
+    try:
+        with Image.open(path) as im:
+            return im.size
+    except Exception:
+        return None
+
+
+def reduction_factor(size: Tuple[int, int], target: Tuple[int, int]) -> int:
+    """Largest supported factor whose reduced image still covers target when fitted."""
+    w, h = size
+    limit = max(w / target[0], h / target[1])
+    for factor in REDUCED_FLAGS:
+        if factor <= limit:
+            return factor
+    return 1
+
+
+def read_reduced(path: str, target: Tuple[int, int]) -> Optional[Tuple[np.ndarray, int]]:
+    """Decode a reduced RGB preview of a large JPEG fitting target.
+
+    Returns (preview, factor), or None when the file is not a JPEG or is
+    too small for a reduced decode to help.
+    """
+    if not path.lower().endswith(REDUCIBLE_EXTENSIONS):
+        return None
+    size = image_size(path)
+    if size is None:
+        return None
+    factor = reduction_factor(size, target)
+    if factor == 1:
+        return None
+    pic = cv2.imread(path, REDUCED_FLAGS[factor])
+    if pic is None:
+        return None
+    return cv2.cvtColor(pic, cv2.COLOR_BGR2RGB), factor
@@ -0,0 +1,58 @@
+"""Modal dialogs used by the editor."""
+import tkinter as tk
+from tkinter import simpledialog
+from typing import Optional
+
+from .fileio import TIFF_COMPRESSION, SaveOptions
+
+
+class SaveOptionsDialog(simpledialog.Dialog):
+    """Ask for the encoder settings of one output format."""
+
+    def __init__(self, parent: tk.Misc, fmt: str, options: SaveOptions):
+        """Show the settings of fmt ("jpeg", "png" or "tiff"), starting from options."""
+        self.fmt = fmt
+        self.options = options
+        self.result: Optional[SaveOptions] = None
+        super().__init__(parent, title=f"{fmt.upper()} Options")
+
+    def body(self, master: tk.Frame) -> tk.Widget:
+        """Create the widgets for the format's settings."""
+        if self.fmt == "jpeg":
+            tk.Label(master, text="Quality (higher is larger and slower):").grid(row=0, column=0, sticky=tk.W)
+            self.quality = tk.Scale(master, from_=1, to=100, orient=tk.HORIZONTAL, length=200)
+            self.quality.set(self.options.jpeg_quality)
+            self.quality.grid(row=1, column=0, sticky=tk.EW)
+            self.progressive = tk.BooleanVar(value=self.options.jpeg_progressive)
+            tk.Checkbutton(master, text="Progressive", variable=self.progressive).grid(row=2, column=0, sticky=tk.W)
+            self.optimize = tk.BooleanVar(value=self.options.jpeg_optimize)
+            tk.Checkbutton(
+                master, text="Optimize Huffman tables (smaller, slower)", variable=self.optimize
+            ).grid(row=3, column=0, sticky=tk.W)
+            return self.quality
+
+        if self.fmt == "png":
+            tk.Label(master, text="Compression level (0 fastest, 9 smallest):").grid(row=0, column=0, sticky=tk.W)
+            self.compression = tk.Scale(master, from_=0, to=9, orient=tk.HORIZONTAL, length=200)
+            self.compression.set(self.options.png_compression)
+            self.compression.grid(row=1, column=0, sticky=tk.EW)
+            return self.compression
+
+        tk.Label(master, text="Compression:").grid(row=0, column=0, sticky=tk.W)
+        self.tiff_compression = tk.StringVar(value=self.options.tiff_compression)
+        menu = tk.OptionMenu(master, self.tiff_compression, *TIFF_COMPRESSION)
+        menu.grid(row=1, column=0, sticky=tk.EW)
+        return menu
+
+    def apply(self) -> None:
+        """Store the chosen settings in result."""
+        if self.fmt == "jpeg":
+            self.result = self.options._replace(
+                jpeg_quality=int(self.quality.get()),
+                jpeg_progressive=bool(self.progressive.get()),
+                jpeg_optimize=bool(self.optimize.get()),
+            )
+        elif self.fmt == "png":
+            self.result = self.options._replace(png_compression=int(self.compression.get()))
+        else:
+            self.result = self.options._replace(tiff_compression=self.tiff_compression.get())
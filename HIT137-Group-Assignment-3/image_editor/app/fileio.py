@@ -0,0 +1,129 @@
+"""Atomic file output shared by the batch tools and the editor."""
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, NamedTuple, Optional, Sequence
+
+import cv2
+import numpy as np
+
+
+# libtiff compression schemes selectable for TIFF output
+TIFF_COMPRESSION = {
+    "none": 1,
+    "lzw": 5,
+    "deflate": 8,
+    "packbits": 32773,
+}
+
+# Output formats with encoder settings, keyed by file extension
+ENCODER_FORMATS = {
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".png": "png",
+    ".tif": "tiff",
+    ".tiff": "tiff",
+}
+
+
+class SaveOptions(NamedTuple):
+    """Encoder settings for the formats that have any; defaults match OpenCV's."""
+    jpeg_quality: int = 95
+    jpeg_progressive: bool = False
+    jpeg_optimize: bool = False
+    png_compression: int = 1
+    tiff_compression: str = "lzw"
+
+    def params(self, path: str) -> List[int]:
+        """Return the cv2.imwrite parameters for writing path."""
+        fmt = encoder_format(path)
+        if fmt == "jpeg":
+            if not 0 <= self.jpeg_quality <= 100:
+                raise ValueError("JPEG quality must be between 0 and 100")
+            return [
+                cv2.IMWRITE_JPEG_QUALITY, int(self.jpeg_quality),
+                cv2.IMWRITE_JPEG_PROGRESSIVE, int(self.jpeg_progressive),
+                cv2.IMWRITE_JPEG_OPTIMIZE, int(self.jpeg_optimize),
+            ]
+        if fmt == "png":
+            if not 0 <= self.png_compression <= 9:
+                raise ValueError("PNG compression level must be between 0 and 9")
+            return [cv2.IMWRITE_PNG_COMPRESSION, int(self.png_compression)]
+        if fmt == "tiff":
+            if self.tiff_compression not in TIFF_COMPRESSION:
+                raise ValueError(f"Unknown TIFF compression: {self.tiff_compression}")
+            return [cv2.IMWRITE_TIFF_COMPRESSION, TIFF_COMPRESSION[self.tiff_compression]]
+        return []
+
+
+def encoder_format(path: str) -> Optional[str]:
+    """Return "jpeg", "png" or "tiff" for paths whose encoder has settings, else None."""
+    return ENCODER_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def _output_mode(path: str) -> int:
+    """Permission bits for writing path: those of the file it replaces, else 0666 less the umask."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@contextmanager
+def atomic_output(path: str) -> Iterator[str]:
+    """Yield a temporary path next to path and move it into place on success.
+
+    The file gets the permissions an ordinary write would give it, rather
+    than the owner-only ones of the temporary file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    _, ext = os.path.splitext(path)
+    fd, tmp_path = tempfile.mkstemp(suffix=ext, prefix=".tmp-", dir=directory)
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.chmod(tmp_path, _output_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_image_atomic(path: str, image: np.ndarray, params: Sequence[int] = ()) -> int:
+    """Write an RGB image via a temporary file and rename; return its size in bytes."""
+    bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    with atomic_output(path) as tmp_path:
+        if not cv2.imwrite(tmp_path, bgr, list(params)):
+            raise IOError(f"Failed to write image file: {path}")
+        size = os.path.getsize(tmp_path)
+    return size
+
+
+def encode_image(image: np.ndarray, path: str, params: Sequence[int] = ()) -> np.ndarray:
+    """Encode an RGB image in memory in the format given by path's extension."""
+    bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR) if image.ndim == 3 else image
+    ok, data = cv2.imencode(os.path.splitext(path)[1] or ".png", bgr, list(params))
+    if not ok:
+        raise IOError(f"Failed to encode image: {os.path.basename(path)}")
+    return data
+
+
+def write_bytes_atomic(
+    path: str,
+    data: np.ndarray,
+    progress: Optional[Callable[[float], None]] = None,
+    chunk_bytes: int = 4 * 1024 * 1024,
+) -> int:
+    """Write encoded bytes via a temporary file and rename; return the size in bytes."""
+    view = memoryview(data).cast("B")
+    with atomic_output(path) as tmp_path:
+        with open(tmp_path, "wb") as f:
+            for start in range(0, len(view), chunk_bytes):
+                f.write(view[start:start + chunk_bytes])
+                if progress is not None:
+                    progress(min(1.0, (start + chunk_bytes) / len(view)))
+    return len(view)
@@ -0,0 +1,198 @@
+"""GUI-free image operations shared by the editor and the batch tools.
+
+Every operation takes an RGB ``uint8`` array and returns a new array. The
+``OPERATIONS`` registry maps the names used in operation chains (for example
+``"grayscale,blur,brightness=50,resize=0.5"``) to these functions.
+"""
+import inspect
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .blurengine import gaussian_blur, gaussian_sigma
+from .colorengine import POINT_OPERATIONS, ColorProgram, is_point_operation
+from .geometry import QUARTER_TURNS, commutes_with_rotation, is_rotation, rotate
+
+# An operation chain is an ordered list of (name, params) pairs
+Chain = List[Tuple[str, Tuple[float, ...]]]
+
+
+def validate_image(image: np.ndarray) -> None:
+    """Raise ValueError unless image is a 2D or 3D numpy array."""
+    if image is None:
+        raise ValueError("Invalid image (None)")
+    if not isinstance(image, np.ndarray):
+        raise ValueError("Image must be a numpy array")
+    if len(image.shape) not in (2, 3):
+        raise ValueError("Invalid image dimensions")
+
+
+def grayscale(image: np.ndarray) -> np.ndarray:
+    """Convert an RGB image to grayscale, keeping three channels."""
+    return POINT_OPERATIONS["grayscale"]().apply(image)
+
+
+def blur(image: np.ndarray, ksize: int = 15, sigma: float = 0) -> np.ndarray:
+    """Apply a Gaussian blur with a square kernel of odd size ksize.
+
+    A sigma of 0 derives the standard deviation from ksize, as OpenCV does.
+    Large kernels use the approximations in ``blurengine``.
+    """
+    ksize = int(ksize)
+    if ksize < 1 or ksize % 2 == 0:
+        raise ValueError("Blur kernel size must be a positive odd number")
+    return gaussian_blur(image, ksize, sigma)
+
+
+def rotate_left(image: np.ndarray) -> np.ndarray:
+    """Rotate an image 90 degrees counter-clockwise."""
+    return cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+
+
+def rotate_right(image: np.ndarray) -> np.ndarray:
+    """Rotate an image 90 degrees clockwise."""
+    return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+
+
+def edge_detect(image: np.ndarray, low: float = 100, high: float = 200) -> np.ndarray:
+    """Apply Canny edge detection, returning a three channel edge map."""
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    edges = cv2.Canny(gray, low, high)
+    return cv2.cvtColor(edges, cv2.COLOR_GRAY2RGB)
+
+
+def adjust_brightness(image: np.ndarray, value: float = 50) -> np.ndarray:
+    """Shift the HSV value channel by value, saturating at 0 and 255."""
+    if not isinstance(value, (int, float)):
+        raise ValueError("Brightness value must be numeric")
+    value = int(value)
+
+    hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
+    h, s, v = cv2.split(hsv)
+
+    # Saturating arithmetic keeps the channel within the valid range (0-255)
+    if value >= 0:
+        v = cv2.add(v, value)
+    else:
+        v = cv2.subtract(v, -value)
+
+    final_hsv = cv2.merge((h, s, v))
+    return cv2.cvtColor(final_hsv, cv2.COLOR_HSV2RGB)
+
+
+def sepia(image: np.ndarray) -> np.ndarray:
+    """Apply a sepia tone using the classic 3x3 color matrix."""
+    return POINT_OPERATIONS["sepia"]().apply(image)
+
+
+def invert(image: np.ndarray) -> np.ndarray:
+    """Invert the colors of an image."""
+    return POINT_OPERATIONS["invert"]().apply(image)
+
+
+def resize(image: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """Resize an image by a scale factor between 0.1 and 3.0."""
+    if not 0.1 <= scale <= 3.0:
+        raise ValueError("Scale must be between 0.1 and 3.0")
+    h, w = image.shape[:2]
+    new_size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    return cv2.resize(image, new_size)
+
+
+OPERATIONS: Dict[str, Callable[..., np.ndarray]] = {
+    "grayscale": grayscale,
+    "blur": blur,
+    "rotate_left": rotate_left,
+    "rotate_right": rotate_right,
+    "edge": edge_detect,
+    "brightness": adjust_brightness,
+    "sepia": sepia,
+    "invert": invert,
+    "resize": resize,
+}
+
+# Most parameters each operation accepts after the image
+MAX_PARAMS: Dict[str, int] = {
+    name: len(inspect.signature(func).parameters) - 1 for name, func in OPERATIONS.items()
+}
+
+
+def parse_chain(spec: str) -> Chain:
+    """Parse a chain such as "grayscale,blur=21,resize=0.5" into steps."""
+    chain: Chain = []
+    for token in spec.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        name, _, args = token.partition("=")
+        name = name.strip().lower()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {name}")
+        try:
+            params = tuple(float(a) for a in args.split(":") if a.strip())
+        except ValueError:
+            raise ValueError(f"Invalid parameters for {name}: {args}")
+        if len(params) > MAX_PARAMS[name]:
+            raise ValueError(f"{name} takes at most {MAX_PARAMS[name]} parameters, got {len(params)}")
+        chain.append((name, params))
+    if not chain:
+        raise ValueError("Operation chain is empty")
+    return chain
+
+
+def proxy_params(name: str, params: Sequence[float], factor: float) -> Tuple[float, ...]:
+    """Parameters for running an operation on an image downscaled by factor.
+
+    Applied to the downscaled image, the adjusted operation approximates the
+    full-size result downscaled afterwards. Only the blur depends on scale:
+    its standard deviation and kernel radius shrink by factor.
+    """
+    if name != "blur" or factor == 1.0:
+        return tuple(params)
+    ksize = int(params[0]) if params else 15
+    sigma = params[1] if len(params) > 1 and params[1] > 0 else gaussian_sigma(ksize)
+    radius = int(round(ksize // 2 * factor))
+    return (2 * radius + 1, sigma * factor)
+
+
+def proxy_chain(chain: Chain, factor: float) -> Chain:
+    """Adjust every operation of chain for an image downscaled by factor."""
+    if factor == 1.0:
+        return chain
+    return [(name, proxy_params(name, params, factor)) for name, params in chain]
+
+
+def apply_operation(image: np.ndarray, name: str, params: Sequence[float] = ()) -> np.ndarray:
+    """Apply a single named operation with its parameters."""
+    if name not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {name}")
+    return OPERATIONS[name](image, *params)
+
+
+def apply_chain(image: np.ndarray, chain: Chain) -> np.ndarray:
+    """Apply an ordered operation chain, fusing consecutive point operations.
+
+    Rotations are deferred past operations that commute with them (see
+    geometry), so any number of them costs at most one rotation per run.
+    """
+    validate_image(image)
+    program = ColorProgram()
+    turns = 0
+    for name, params in chain:
+        if is_rotation(name):
+            turns += QUARTER_TURNS[name]
+            continue
+        if is_point_operation(name):
+            program.then(POINT_OPERATIONS[name](*params))
+            continue
+        if len(program):
+            image = program.apply(image)
+            program = ColorProgram()
+        if not commutes_with_rotation(name, params):
+            image = rotate(image, turns)
+            turns = 0
+        image = apply_operation(image, name, params)
+    if len(program):
+        image = program.apply(image)
+    return rotate(image, turns)
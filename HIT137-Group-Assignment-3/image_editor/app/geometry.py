@@ -0,0 +1,145 @@
+"""Lazy composition of rotations with the crop and display scale.
+
+Rotating by 90 degrees moves every pixel, and most operations give the same
+result whether the image is rotated before or after them. So rotations are
+not applied as they are recorded. They are added up as a number of quarter
+turns, which can cancel out (left then right is no turn at all), and the
+pixels are only rotated when something needs them in that orientation:
+
+* an operation whose result would differ, even by rounding, if the image
+  were rotated first: edge detection (Canny's gradient quantization is not
+  symmetric), brightness (OpenCV's HSV conversion rounds a pixel
+  differently depending on its position in the row), resize and the
+  pyramid blur, or
+* the end of the chain, where the remaining turns are applied once, at
+  display size for the canvas or at full size for export.
+
+Together with the crop, which is a numpy view of the source, and the
+display scale, a ``ViewTransform`` renders the canvas with one resampling
+pass followed by an exact transposition of the small result.
+
+Point operations and the direct Gaussian and box blurs commute with quarter
+turns exactly, so deferring rotations past them never changes a result.
+"""
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .blurengine import choose_strategy
+from .colorengine import is_point_operation
+
+# Counter-clockwise quarter turns of each rotation operation
+QUARTER_TURNS = {
+    "rotate_left": 1,
+    "rotate_right": 3,
+}
+
+_ROTATE_CODES = {
+    1: cv2.ROTATE_90_COUNTERCLOCKWISE,
+    2: cv2.ROTATE_180,
+    3: cv2.ROTATE_90_CLOCKWISE,
+}
+
+Chain = List[Tuple[str, Tuple[float, ...]]]
+
+
+def is_rotation(name: str) -> bool:
+    """True if the named operation is a quarter turn."""
+    return name in QUARTER_TURNS
+
+
+def commutes_with_rotation(name: str, params: Sequence[float] = ()) -> bool:
+    """True if rotating before or after the operation gives exactly the same image."""
+    if is_rotation(name) or is_point_operation(name):
+        return True
+    if name == "blur":
+        # Resampling rounds differently once rotated; the other strategies are symmetric
+        return choose_strategy(int(params[0]) if params else 15) != "pyramid"
+    return False
+
+
+def rotate(image: np.ndarray, turns: int) -> np.ndarray:
+    """Rotate image by turns counter-clockwise quarter turns (image itself for none)."""
+    turns %= 4
+    if turns == 0:
+        return image
+    return cv2.rotate(image, _ROTATE_CODES[turns])
+
+
+def rotation_steps(turns: int) -> Chain:
+    """The fewest rotation steps amounting to turns counter-clockwise quarter turns."""
+    turns %= 4
+    if turns == 3:
+        return [("rotate_right", ())]
+    return [("rotate_left", ())] * turns
+
+
+def split_rotations(chain: Sequence[Tuple[str, Sequence[float]]]) -> Tuple[Chain, int]:
+    """Split chain into one with as few rotations as possible and the quarter turns left over.
+
+    Rotations are deferred past every operation that commutes with them and
+    applied, merged, just before the first one that does not. The returned
+    chain followed by the returned turns gives the same image as chain.
+    """
+    out: Chain = []
+    turns = 0
+    for name, params in chain:
+        if is_rotation(name):
+            turns = (turns + QUARTER_TURNS[name]) % 4
+            continue
+        if turns and not commutes_with_rotation(name, params):
+            out.extend(rotation_steps(turns))
+            turns = 0
+        out.append((name, tuple(params)))
+    return out, turns
+
+
+def normalize_chain(chain: Sequence[Tuple[str, Sequence[float]]]) -> Chain:
+    """Chain equivalent to chain with its rotations merged and moved as late as possible."""
+    out, turns = split_rotations(chain)
+    return out + rotation_steps(turns)
+
+
+def pending_turns(chain: Sequence[Tuple[str, Sequence[float]]]) -> int:
+    """Quarter turns still to apply to the lazily evaluated output of chain."""
+    return split_rotations(chain)[1]
+
+
+class ViewTransform(NamedTuple):
+    """Pending quarter turns and display scale applied when an image is shown.
+
+    The crop needs no entry: it is a numpy view of the source, so cropping
+    never copies pixels either.
+    """
+    turns: int = 0
+    scale: float = 1.0
+
+    def display_size(self, width: float, height: float, max_width: int, max_height: int) -> Tuple[int, int]:
+        """Size to show a width x height image at once rotated and scaled, shrunk to fit if needed."""
+        if self.turns % 2:
+            width, height = height, width
+        new_w = max(1, int(width * self.scale))
+        new_h = max(1, int(height * self.scale))
+        if new_w > max_width or new_h > max_height:
+            ratio = min(max_width / new_w, max_height / new_h)
+            new_w = max(1, int(new_w * ratio))
+            new_h = max(1, int(new_h * ratio))
+        return new_w, new_h
+
+    def render(self, image: np.ndarray, size: Tuple[int, int], interpolation: Optional[int] = None) -> np.ndarray:
+        """Resample image once to show it rotated at size (width, height).
+
+        The resize runs in the unrotated frame and only the small result is
+        rotated, which moves pixels without resampling them. By default the
+        interpolation is area averaging when shrinking and cubic otherwise.
+        """
+        w, h = size
+        target = (h, w) if self.turns % 2 else (w, h)
+        src_h, src_w = image.shape[:2]
+        if (src_w, src_h) != target:
+            if interpolation is None:
+                shrinking = target[0] * target[1] < src_w * src_h
+                interpolation = cv2.INTER_AREA if shrinking else cv2.INTER_CUBIC
+            image = cv2.resize(image, target, interpolation=interpolation)
+        return rotate(image, self.turns)
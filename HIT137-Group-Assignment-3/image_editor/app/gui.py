@@ -1,11 +1,49 @@
 import os
+import time
 import tkinter as tk
-from tkinter import filedialog, ttk
-from typing import Optional, Tuple
+from tkinter import filedialog, simpledialog, ttk
+from typing import Callable, List, Optional, Tuple
 
 import cv2
 import numpy as np
-from PIL import Image, ImageTk
+
+from .batch import collect_files
+from .blurengine import choose_strategy
+from .browser import ThumbnailBrowser
+from .buffers import MemoryTracker
+from .decode import read_reduced
+from .dialogs import SaveOptionsDialog
+from .fileio import SaveOptions, encode_image, encoder_format, write_bytes_atomic
+from .geometry import ViewTransform, is_rotation, rotate
+from .histogram import Histograms, chain_lut, compute_histograms
+from .history import HistoryEntry, UndoHistory
+from .imagecache import DecodedImageCache
+from .largeimage import LARGE_IMAGE_EXTENSIONS, LargeImage, open_large, process_large, save_large
+from .memo import MemoCache
+from .parallel import TiledExecutor
+from .pipeline import Pipeline
+from .rendering import CanvasImage, RedrawScheduler
+from .thumbnails import ThumbnailCache
+from .tracing import Tracer, traced_handler
+from .video import VideoStream
+from .worker import FilterWorker, Job, ProgressFunc
+
+# Largest size of the picture previews on each canvas
+MAX_WIDTH, MAX_HEIGHT = 600, 600
+
+# Blur radius in pixels: the default matches the original 15x15 kernel
+DEFAULT_BLUR_RADIUS = 7
+MAX_BLUR_RADIUS = 500
+
+# Size of the histogram plot, and line colors for CHANNELS
+HISTOGRAM_WIDTH, HISTOGRAM_HEIGHT = 256, 100
+HISTOGRAM_COLORS = ("red", "green", "blue", "gray30")
+
+# Interval between video progress updates in the status bar
+VIDEO_POLL_MS = 250
+
+# Idle time after the last scale slider tick before the high-quality render
+SCALE_SETTLE_MS = 150
 
 
 class PictureProcessorApp:
@@ -17,20 +55,92 @@ class PictureProcessorApp:
         self.window.title("Picture Processing App")
         self.window.geometry("1200x800")
 
-        # Initialize image variables
+        # Initialize image variables; the loaded and displayed pictures share one
+        # read-only array until either is replaced
         self.original_picture: Optional[np.ndarray] = None
-        self.cropped_picture: Optional[np.ndarray] = None
         self.display_picture: Optional[np.ndarray] = None
+        self.cropped_picture: Optional[np.ndarray] = None
+        # Quarter turns still to apply to cropped_picture, which the pipeline keeps unrotated
+        self.cropped_turns = 0
+
+        # Recently decoded files, and the file being edited for next/previous navigation
+        self.image_cache = DecodedImageCache()
+        self.current_path: Optional[str] = None
+
+        # Folder thumbnail grid, backed by a persistent on-disk thumbnail cache
+        self.thumbnail_cache = ThumbnailCache()
+        self.browser: Optional[ThumbnailBrowser] = None
+
+        # Disk-backed full-resolution picture when editing a large image's preview
+        self.large_image: Optional[LargeImage] = None
+
+        # Fast open: a reduced JPEG decode is shown while the full decode runs in the background
+        self.full_resolution_pending = False
+        # Crop made on the reduced preview, applied once full-resolution pixels arrive
+        self.pending_crop: Optional[Tuple[int, int, int, int]] = None
+
+        # Recorded operations, replayed whenever the crop changes
+        # Results of operations by input content, reused when the same steps are redone
+        self.memo = MemoCache()
+        self.pipeline = Pipeline(executor=TiledExecutor(), memo=self.memo)
+        # Proxy editing: the pipeline runs on a canvas-sized copy of full_source,
+        # which is only processed at full resolution when saving
+        self.full_source: Optional[np.ndarray] = None
+        self.proxy_ratio = 1.0
+        self.cropped_proxy_ratio = 1.0
+        self.history = UndoHistory()
+        # Leading pipeline steps that already have undo history entries
+        self.history_steps = 0
         
         # Initialize cropping and scaling variables
         self.crop_start: Optional[Tuple[int, int]] = None
         self.crop_rect: Optional[Tuple[int, int, int, int]] = None
+        # Crop in display_picture coordinates, or None for the whole picture
+        self.crop_box: Optional[Tuple[int, int, int, int]] = None
         self.scale_factor: float = 1.0
         self.display_to_picture_scale: Tuple[float, float] = (1.0, 1.0)
         self.picture_offset: Tuple[int, int] = (0, 0)
+
+        # Histograms of cropped_picture, which histogram_source identifies
+        self.histogram: Optional[Histograms] = None
+        self.histogram_source: Optional[np.ndarray] = None
+        # True when the histogram was remapped from the previous one rather than counted
+        self.histogram_remapped = False
+
+        # Picture the cached original preview was rendered from
+        self.preview_source: Optional[np.ndarray] = None
+
+        # Progressive scaling: fast previews from a downsampled proxy while the slider moves
+        self.scale_preview = False
+        self.scale_proxy: Optional[np.ndarray] = None
+        self.scale_proxy_source: Optional[np.ndarray] = None
+        self.scale_settle_job: Optional[str] = None
+
+        # Video being processed with the recorded operations, if any
+        self.video_stream: Optional[VideoStream] = None
+
+        # Bytes held by each image buffer, and the session peak
+        self.memory = MemoryTracker()
+
+        # Encoder settings, remembered between saves
+        self.save_options = SaveOptions()
+
+        # Timing of handlers and render stages, exportable as a Chrome trace
+        self.tracer = Tracer()
         
         self.setup_window()
 
+        # Redraws are coalesced into one idle-time render per canvas
+        self.redraw = RedrawScheduler(
+            self.window,
+            {"original": self.render_original, "processed": self.render_processed,
+             "histogram": self.render_histogram},
+            on_flush=self.finish_redraw,
+        )
+
+        # Filters run on a background thread; results come back through after()
+        self.worker = FilterWorker(self.window, on_progress=self.show_progress)
+
     def setup_window(self) -> None:
         """Set up the GUI components."""
         # Menu bar setup
@@ -38,10 +148,42 @@ class PictureProcessorApp:
         filemenu = tk.Menu(menubar, tearoff=0)
         filemenu.add_command(label="Open", command=self.open_picture)
         filemenu.add_command(label="Save", command=self.save_picture)
+        filemenu.add_command(label="Browse Folder...", accelerator="Ctrl+B", command=self.browse_folder)
+        filemenu.add_separator()
+        filemenu.add_command(label="Next Image in Folder", accelerator="Ctrl+Right", command=self.next_picture)
+        filemenu.add_command(label="Previous Image in Folder", accelerator="Ctrl+Left", command=self.previous_picture)
+        filemenu.add_command(label="Image Cache Budget...", command=self.set_image_cache_budget)
+        filemenu.add_separator()
+        filemenu.add_command(label="Open Large Image...", command=self.open_large_picture)
+        filemenu.add_command(label="Export Full Resolution...", command=self.export_full_resolution)
+        filemenu.add_separator()
+        filemenu.add_command(label="Process Video...", command=self.process_video)
+        filemenu.add_command(label="Cancel Video Processing", command=self.cancel_video)
+        filemenu.add_separator()
+        filemenu.add_command(label="Export Trace...", command=self.export_trace)
         filemenu.add_separator()
         filemenu.add_command(label="Exit", command=self.window.quit)
         menubar.add_cascade(label="File", menu=filemenu)
+
+        editmenu = tk.Menu(menubar, tearoff=0)
+        editmenu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.undo)
+        editmenu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.redo)
+        editmenu.add_command(label="History Budget...", command=self.set_history_budget)
+        editmenu.add_command(label="Result Cache Budget...", command=self.set_result_cache_budget)
+        editmenu.add_separator()
+        self.proxy_mode = tk.BooleanVar(value=True)
+        editmenu.add_checkbutton(label="Proxy Editing", variable=self.proxy_mode, command=self.toggle_proxy_mode)
+        editmenu.add_separator()
+        editmenu.add_command(label="Apply to Whole Picture", command=self.apply_to_whole_picture)
+        editmenu.add_command(label="Remove Selected Step", command=self.remove_selected_step)
+        editmenu.add_command(label="Clear Steps", command=self.clear_steps)
+        menubar.add_cascade(label="Edit", menu=editmenu)
         self.window.config(menu=menubar)
+        self.window.bind("<Control-z>", lambda _: self.undo())
+        self.window.bind("<Control-y>", lambda _: self.redo())
+        self.window.bind("<Control-b>", lambda _: self.browse_folder())
+        self.window.bind("<Control-Right>", lambda _: self.next_picture())
+        self.window.bind("<Control-Left>", lambda _: self.previous_picture())
 
         # Main frames setup
         main_frame = tk.Frame(self.window)
@@ -56,6 +198,10 @@ class PictureProcessorApp:
         self.original_canvas.bind("<ButtonPress-1>", self.start_crop)
         self.original_canvas.bind("<B1-Motion>", self.update_crop)
         self.original_canvas.bind("<ButtonRelease-1>", self.end_crop)
+        self.original_view = CanvasImage(self.original_canvas)
+        self.crop_rect_item = self.original_canvas.create_rectangle(
+            0, 0, 0, 0, outline="yellow", width=2, state=tk.HIDDEN
+        )
 
         # Processed picture frame
         self.processed_frame = tk.LabelFrame(main_frame, text="Processed Picture")
@@ -63,6 +209,39 @@ class PictureProcessorApp:
 
         self.processed_canvas = tk.Canvas(self.processed_frame, bg='lightpink', width=600, height=600)
         self.processed_canvas.pack(fill=tk.BOTH, expand=True)
+        self.processed_view = CanvasImage(self.processed_canvas)
+
+        # Histogram and recorded operations column
+        side_frame = tk.Frame(main_frame)
+        side_frame.pack(side=tk.LEFT, fill=tk.Y)
+
+        self.histogram_frame = tk.LabelFrame(side_frame, text="Histogram")
+        self.histogram_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.histogram_canvas = tk.Canvas(
+            self.histogram_frame, bg="white", width=HISTOGRAM_WIDTH, height=HISTOGRAM_HEIGHT
+        )
+        self.histogram_canvas.pack()
+        self.histogram_lines = [
+            self.histogram_canvas.create_line(0, 0, 0, 0, fill=color, state=tk.HIDDEN)
+            for color in HISTOGRAM_COLORS
+        ]
+        self.histogram_label = tk.Label(self.histogram_frame, text="", anchor=tk.W, justify=tk.LEFT)
+        self.histogram_label.pack(fill=tk.X)
+
+        self.memory_frame = tk.LabelFrame(side_frame, text="Memory")
+        self.memory_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.memory_label = tk.Label(self.memory_frame, text="", anchor=tk.W, justify=tk.LEFT)
+        self.memory_label.pack(fill=tk.X)
+
+        # Recorded operations frame
+        self.steps_frame = tk.LabelFrame(side_frame, text="Operations")
+        self.steps_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.steps_list = tk.Listbox(self.steps_frame, width=18, activestyle=tk.NONE)
+        self.steps_list.pack(fill=tk.BOTH, expand=True)
+        tk.Button(self.steps_frame, text="Remove Step", command=self.remove_selected_step).pack(fill=tk.X)
+        self.history_label = tk.Label(self.steps_frame, text="History: empty", anchor=tk.W, justify=tk.LEFT)
+        self.history_label.pack(fill=tk.X)
 
         # Controls frame
         controls_frame = tk.Frame(self.window)
@@ -92,6 +271,13 @@ class PictureProcessorApp:
         for text, command in buttons:
             tk.Button(btn_frame, text=text, command=command).pack(side=tk.LEFT, padx=5)
 
+        # Blur radius control
+        tk.Label(controls_frame, text="Blur Radius:").pack(side=tk.LEFT, padx=(5, 0))
+        self.blur_radius = tk.IntVar(value=DEFAULT_BLUR_RADIUS)
+        tk.Spinbox(
+            controls_frame, from_=1, to=MAX_BLUR_RADIUS, width=4, textvariable=self.blur_radius
+        ).pack(side=tk.LEFT, padx=5)
+
         # Scale controls
         self.scale_label = tk.Label(controls_frame, text="Resize Scale: 1.0")
         self.scale_label.pack(side=tk.LEFT, padx=5)
@@ -105,6 +291,10 @@ class PictureProcessorApp:
         )
         self.scale_slider.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
 
+        # Redraw counter
+        self.render_label = tk.Label(controls_frame, text="Renders: 0/0")
+        self.render_label.pack(side=tk.RIGHT, padx=5)
+
         # Status bar
         self.status_bar = tk.Label(self.window, text="Ready", bd=1, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(fill=tk.X, padx=10, pady=5)
@@ -122,6 +312,7 @@ class PictureProcessorApp:
             return False
         return True
 
+    @traced_handler
     def open_picture(self) -> None:
         """Open an image file and load it into the application."""
         file_types = [
@@ -135,95 +326,494 @@ class PictureProcessorApp:
             self.status_bar.config(text="No file selected")
             return
             
+        self.load_picture_file(file_path)
+
+    def load_picture_file(self, file_path: str) -> None:
+        """Load an image file, from the decoded-image cache when possible."""
         if not os.path.exists(file_path):
             self.status_bar.config(text="Error: File does not exist")
             return
             
         try:
-            # Read and validate the image
-            pic = cv2.imread(file_path)
-            if not self.validate_image(pic):
+            self.worker.cancel_all("decode")
+            self.full_resolution_pending = False
+            self.current_path = file_path
+
+            cached = self.image_cache.get(file_path) if self.image_cache.contains(file_path) else None
+            if cached is not None:
+                self.large_image = None
+                self.set_picture(cached)
+                self.status_bar.config(
+                    text=f"Loaded: {os.path.basename(file_path)} (cached, "
+                         f"{len(self.image_cache)} images, {self.image_cache.memory_usage / 1024 ** 2:.0f} MB)"
+                )
+                self.prefetch_neighbors(file_path)
                 return
-                
-            pic = cv2.cvtColor(pic, cv2.COLOR_BGR2RGB)
-            self.original_picture = pic
-            self.display_picture = pic.copy()
-            self.cropped_picture = None
-            self.crop_rect = None
-            self.scale_factor = 1.0
-            self.scale_slider.set(1.0)
-            self.update_picture_display()
+
+            # Show a reduced decode of large JPEGs first
+            with self.tracer.span("decode preview", "decode", file=os.path.basename(file_path)):
+                reduced = read_reduced(file_path, (MAX_WIDTH, MAX_HEIGHT))
+            if reduced is not None:
+                preview, factor = reduced
+                self.large_image = None
+                self.set_picture(preview)
+                self.decode_full_resolution(file_path, preview)
+                self.status_bar.config(
+                    text=f"Loaded preview of {os.path.basename(file_path)} at 1/{factor} scale, "
+                         f"decoding full resolution..."
+                )
+                self.prefetch_neighbors(file_path)
+                return
+
+            # Read and validate the image
+            with self.tracer.span("decode", "decode", file=os.path.basename(file_path)):
+                pic = self.image_cache.load(file_path)
+                if not self.validate_image(pic):
+                    return
+            self.large_image = None
+            self.set_picture(pic)
             self.status_bar.config(text=f"Loaded: {os.path.basename(file_path)}")
+            self.prefetch_neighbors(file_path)
         except Exception as e:
             self.status_bar.config(text=f"Error: {str(e)}")
 
+    def folder_files(self) -> List[str]:
+        """Image files in the folder of the current picture, sorted by name."""
+        if self.current_path is None:
+            return []
+        return collect_files(os.path.dirname(os.path.abspath(self.current_path)))
+
+    def prefetch_neighbors(self, file_path: str) -> None:
+        """Decode the files around file_path in its folder in the background."""
+        files = self.folder_files()
+        path = os.path.abspath(file_path)
+        if path not in files:
+            return
+        i = files.index(path)
+        neighbors = [files[j % len(files)] for j in (i + 1, i - 1, i + 2) if len(files) > 1]
+        self.image_cache.prefetch(p for p in neighbors if p != path)
+
+    @traced_handler
+    def next_picture(self) -> None:
+        """Open the next image in the current picture's folder."""
+        self.step_picture(1)
+
+    @traced_handler
+    def previous_picture(self) -> None:
+        """Open the previous image in the current picture's folder."""
+        self.step_picture(-1)
+
+    def step_picture(self, offset: int) -> None:
+        """Open the image offset positions away in the folder, wrapping around."""
+        files = self.folder_files()
+        if not files:
+            self.status_bar.config(text="No folder to browse; open a picture first")
+            return
+        path = os.path.abspath(self.current_path)
+        if path in files:
+            target = files[(files.index(path) + offset) % len(files)]
+        else:
+            # The current file was removed; start from either end
+            target = files[0] if offset > 0 else files[-1]
+        self.load_picture_file(target)
+
+    @traced_handler
+    def browse_folder(self) -> None:
+        """Choose a folder and show its images as a thumbnail grid."""
+        initial = os.path.dirname(os.path.abspath(self.current_path)) if self.current_path else None
+        folder = filedialog.askdirectory(initialdir=initial, mustexist=True)
+        if not folder:
+            self.status_bar.config(text="No folder selected")
+            return
+
+        try:
+            if self.browser is None or not self.browser.winfo_exists():
+                self.browser = ThumbnailBrowser(self.window, self.thumbnail_cache, self.load_picture_file)
+            with self.tracer.span("list folder", "browse", folder=folder):
+                self.browser.show_folder(folder)
+            self.browser.lift()
+            self.status_bar.config(text=f"Browsing {folder} ({len(self.browser.files)} images)")
+        except Exception as e:
+            self.status_bar.config(text=f"Error browsing folder: {str(e)}")
+
+    def set_image_cache_budget(self) -> None:
+        """Ask for the decoded-image cache memory budget in megabytes."""
+        budget = simpledialog.askinteger(
+            "Image Cache Budget", "Decoded image cache memory budget (MB):",
+            initialvalue=self.image_cache.budget_bytes // 1024 ** 2, minvalue=0, parent=self.window
+        )
+        if budget is None:
+            return
+        self.image_cache.set_budget(budget * 1024 ** 2)
+        self.status_bar.config(
+            text=f"Image cache budget set to {budget} MB ({len(self.image_cache)} images cached)"
+        )
+
+    def set_result_cache_budget(self) -> None:
+        """Ask for the operation result cache memory budget in megabytes."""
+        budget = simpledialog.askinteger(
+            "Result Cache Budget", "Operation result cache memory budget (MB):",
+            initialvalue=self.memo.budget_bytes // 1024 ** 2, minvalue=0, parent=self.window
+        )
+        if budget is None:
+            return
+        self.memo.set_budget(budget * 1024 ** 2)
+        self.status_bar.config(
+            text=f"Result cache budget set to {budget} MB ({len(self.memo)} results cached)"
+        )
+
+    def decode_full_resolution(self, file_path: str, preview: np.ndarray) -> None:
+        """Decode file_path at full resolution in the background, replacing preview."""
+        name = os.path.basename(file_path)
+        tracer = self.tracer
+        self.full_resolution_pending = True
+
+        image_cache = self.image_cache
+
+        def work(job: Job, progress: ProgressFunc) -> np.ndarray:
+            with tracer.span("decode", "decode", file=name):
+                return image_cache.load(file_path)
+
+        def done(pic: np.ndarray) -> None:
+            if self.original_picture is not preview:
+                return
+            self.full_resolution_pending = False
+            self.share_picture(pic)
+            self.update_picture_display()
+            if self.pending_crop is not None:
+                # Map the crop from preview to full-resolution coordinates
+                sx = pic.shape[1] / preview.shape[1]
+                sy = pic.shape[0] / preview.shape[0]
+                x1, y1, x2, y2 = self.pending_crop
+                self.pending_crop = None
+                self.crop_to((int(x1 * sx), int(y1 * sy), int(x2 * sx), int(y2 * sy)))
+            else:
+                self.status_bar.config(text=f"Loaded: {name} ({pic.shape[1]}x{pic.shape[0]})")
+
+        def failed(e: Exception) -> None:
+            # Keep editing the preview rather than losing the picture
+            self.full_resolution_pending = False
+            self.pending_crop = None
+            self.status_bar.config(text=f"Error decoding full resolution, editing the preview: {str(e)}")
+
+        self.worker.submit(f"Decoding {name}", work, done, failed, key="decode")
+
+    def share_picture(self, pic: np.ndarray) -> None:
+        """Use pic as both the loaded and the displayed picture, without copying it.
+
+        The array is made read-only, so a write meant for one of them raises
+        instead of changing both.
+        """
+        pic.flags.writeable = False
+        self.original_picture = self.display_picture = pic
+
+    def set_picture(self, pic: np.ndarray) -> None:
+        """Show a newly loaded picture and clear all editing state."""
+        self.worker.cancel_all("filter")
+        self.share_picture(pic)
+        self.cropped_picture = None
+        self.cropped_turns = 0
+        self.crop_rect = None
+        self.crop_box = None
+        self.pending_crop = None
+        self.full_source = None
+        self.pipeline.clear()
+        self.history.clear()
+        self.history_steps = 0
+        self.refresh_step_list()
+        self.scale_factor = 1.0
+        self.scale_slider.set(1.0)
+        self.update_picture_display()
+
+    def show_progress(self, label: str, fraction: float) -> None:
+        """Report progress of a long operation in the status bar."""
+        self.status_bar.config(text=f"{label}: {fraction:.0%}")
+        self.window.update_idletasks()
+
+    @traced_handler
+    def open_large_picture(self) -> None:
+        """Open a very large image into a disk-backed buffer and edit its preview."""
+        file_types = [
+            ("Large image files", " ".join(f"*{ext}" for ext in LARGE_IMAGE_EXTENSIONS)),
+            ("All files", "*.*")
+        ]
+
+        file_path = filedialog.askopenfilename(filetypes=file_types)
+
+        if not file_path:
+            self.status_bar.config(text="No file selected")
+            return
+
+        name = os.path.basename(file_path)
+        tracer = self.tracer
+
+        def work(job: Job, progress: ProgressFunc) -> LargeImage:
+            def report(label: str, fraction: float) -> None:
+                progress(fraction, label)
+
+            # Spilling compressed formats to disk and decoding the preview
+            # both take a while for multi-gigabyte inputs
+            with tracer.span("decode", "decode", file=name):
+                return open_large(file_path, progress=report)
+
+        def done(large: LargeImage) -> None:
+            self.large_image = large
+            self.set_picture(large.preview)
+            h, w = large.shape[:2]
+            self.status_bar.config(text=f"Loaded large image: {name} ({w}x{h}), editing a preview")
+
+        def failed(e: Exception) -> None:
+            self.status_bar.config(text=f"Error opening large image: {str(e)}")
+
+        self.full_resolution_pending = False
+        self.status_bar.config(text=f"Opening large image {name}...")
+        self.worker.submit(f"Opening {name}", work, done, failed, key="decode")
+
+    @traced_handler
+    def export_full_resolution(self) -> None:
+        """Replay the operations on the full-resolution large image, tile by tile, in the background."""
+        if self.large_image is None:
+            self.status_bar.config(text="Error: No large image open")
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".tiff",
+            filetypes=[("TIFF", "*.tiff"), ("PPM", "*.ppm"), ("BMP", "*.bmp"), ("NumPy", "*.npy"),
+                       ("JPEG", "*.jpg"), ("PNG", "*.png"), ("All files", "*.*")],
+        )
+
+        if not file_path:
+            self.status_bar.config(text="Export cancelled")
+            return
+
+        region = self.large_image.pixels
+        if self.crop_box is not None:
+            # Map the crop from preview to full-resolution coordinates
+            sx, sy = self.large_image.preview_scale
+            x1, y1, x2, y2 = self.crop_box
+            region = region[int(y1 * sy):int(y2 * sy), int(x1 * sx):int(x2 * sx)]
+        chain = self.pipeline.chain()
+        name = os.path.basename(file_path)
+        tracer = self.tracer
+
+        def work(job: Job, progress: ProgressFunc) -> Tuple[int, int]:
+            def report(label: str, fraction: float) -> None:
+                progress(fraction, label)
+
+            with tracer.span("process_large", "filter", steps=len(chain)):
+                result = process_large(region, chain, progress=report)
+            with tracer.span("save_large", "encode", file=name):
+                save_large(result, file_path, progress=report)
+            h, w = result.shape[:2]
+            return w, h
+
+        def done(size: Tuple[int, int]) -> None:
+            w, h = size
+            self.status_bar.config(text=f"Exported {w}x{h} to: {name}")
+
+        def failed(e: Exception) -> None:
+            self.status_bar.config(text=f"Error exporting image: {str(e)}")
+
+        self.status_bar.config(text=f"Exporting {name}...")
+        self.worker.submit(f"Exporting {name}", work, done, failed, key=f"export:{os.path.abspath(file_path)}")
+
+    @traced_handler
+    def process_video(self) -> None:
+        """Apply the recorded operations to every frame of a video file."""
+        if not len(self.pipeline):
+            self.status_bar.config(text="Error: Record some operations to apply to the video first")
+            return
+
+        source = filedialog.askopenfilename(
+            filetypes=[("Video files", "*.mp4 *.avi *.mov *.mkv *.m4v"), ("All files", "*.*")]
+        )
+        if not source:
+            self.status_bar.config(text="No video selected")
+            return
+        output = filedialog.asksaveasfilename(
+            defaultextension=".mp4",
+            filetypes=[("MP4", "*.mp4"), ("AVI (Motion JPEG)", "*.avi"), ("All files", "*.*")],
+        )
+        if not output:
+            self.status_bar.config(text="Video processing cancelled")
+            return
+
+        try:
+            self.cancel_video()
+            self.video_stream = VideoStream(source, output, self.pipeline.chain())
+            self.video_stream.start()
+            self.status_bar.config(text=f"Processing {os.path.basename(source)}...")
+            self.window.after(VIDEO_POLL_MS, self.poll_video)
+        except Exception as e:
+            self.video_stream = None
+            self.status_bar.config(text=f"Error processing video: {str(e)}")
+
+    def poll_video(self) -> None:
+        """Report the progress of the video being processed until it finishes."""
+        stream = self.video_stream
+        if stream is None:
+            return
+        name = os.path.basename(stream.output)
+        if stream.running:
+            total = f"/{stream.total_frames}" if stream.total_frames else ""
+            self.status_bar.config(
+                text=f"Processing video: {stream.frames_written}{total} frames, {stream.fps:.1f} fps"
+            )
+            self.window.after(VIDEO_POLL_MS, self.poll_video)
+            return
+
+        self.video_stream = None
+        if stream.error is not None:
+            self.status_bar.config(text=f"Error processing video: {str(stream.error)}")
+        elif stream.cancelled:
+            self.status_bar.config(text=f"Video processing cancelled after {stream.frames_written} frames")
+        else:
+            self.status_bar.config(
+                text=f"Saved video: {name} ({stream.frames_written} frames in {stream.elapsed:.1f}s, "
+                     f"{stream.fps:.1f} fps)"
+            )
+
+    def cancel_video(self) -> None:
+        """Stop the video being processed, discarding its partial output."""
+        if self.video_stream is not None and self.video_stream.running:
+            self.video_stream.cancel()
+
+    @traced_handler
     def convert_grayscale(self) -> None:
         """Convert the cropped image to grayscale."""
         if not self.validate_cropped_image():
             return
             
         try:
-            gray = cv2.cvtColor(self.cropped_picture, cv2.COLOR_RGB2GRAY)
-            self.cropped_picture = cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
-            self.update_picture_display()
-            self.status_bar.config(text="Converted to grayscale")
+            self.apply_step("grayscale", done_text="Converted to grayscale")
         except Exception as e:
             self.status_bar.config(text=f"Error converting to grayscale: {str(e)}")
 
     def validate_cropped_image(self) -> bool:
         """Validate that we have a cropped image to process."""
-        if self.cropped_picture is None:
+        if self.pipeline.source is None:
             self.status_bar.config(text="Error: No cropped image to process")
             return False
-        return self.validate_image(self.cropped_picture)
+        return self.validate_image(self.pipeline.source)
+
+    def apply_step(self, name: str, params: Tuple[float, ...] = (), done_text: str = "") -> None:
+        """Record an operation in the pipeline and process it in the background."""
+        self.history.clear_redo()
+        self.pipeline.append(name, params)
+        self.refresh_step_list()
+        self.process_pipeline(f"Applying {name}", done_text)
+
+    def process_pipeline(self, label: str, done_text: str) -> None:
+        """Evaluate the pipeline on the worker thread and show the result when ready.
+
+        A newer call supersedes a pending one; since it evaluates the latest
+        steps, nothing is lost. Steps without history entries get them here;
+        steps that fail go back on the redo stack.
+        """
+        snapshot = self.pipeline.copy()
+        proxy_ratio = self.proxy_ratio
+        first_new = self.history_steps
+        history = self.history
+        tracer = self.tracer
+
+        def work(job: Job, progress: ProgressFunc) -> Tuple[np.ndarray, List[HistoryEntry]]:
+            total = len(snapshot) - first_new + 1
+
+            def on_stage(k: int, upto: int) -> None:
+                job.check()
+
+            entries = []
+            for k in range(first_new, len(snapshot)):
+                progress((k - first_new) / total)
+                step = snapshot.steps[k]
+                with tracer.span(step.name, "filter", params=step.params):
+                    before = snapshot.result(k, on_stage)
+                    after = snapshot.result(k + 1, on_stage)
+                job.check()
+                with tracer.span("history entry", "history", step=step.name):
+                    entries.append(history.make_entry(step, before, after, snapshot.memo,
+                                                      snapshot.stage_key(k + 1)))
+            progress((total - 1) / total)
+            with tracer.span("pipeline", "filter", steps=len(snapshot)):
+                return snapshot.result(on_stage=on_stage), entries
 
+        def done(outcome: Tuple[np.ndarray, List[HistoryEntry]]) -> None:
+            result, entries = outcome
+            self.remap_histogram(snapshot, result)
+            self.pipeline.adopt(snapshot)
+            for entry in entries:
+                self.history.push(entry, keep_redo=True)
+            self.history_steps = len(snapshot)
+            self.cropped_picture = result
+            self.cropped_turns = snapshot.orientation()
+            self.cropped_proxy_ratio = proxy_ratio
+            self.refresh_step_list()
+            self.update_picture_display()
+            self.status_bar.config(text=done_text)
+
+        def failed(e: Exception) -> None:
+            # Steps that never produced a result can be redone once the cause is fixed
+            while len(self.pipeline) > self.history_steps:
+                self.history.push_redo(self.pipeline.pop())
+            self.refresh_step_list()
+            self.status_bar.config(text=f"Error processing image: {str(e)}")
+
+        self.status_bar.config(text=f"{label}...")
+        self.worker.submit(label, work, done, failed)
+
+    @traced_handler
     def add_blur(self) -> None:
-        """Apply Gaussian blur to the cropped image."""
+        """Apply a Gaussian blur of the chosen radius to the cropped image."""
         if not self.validate_cropped_image():
             return
             
         try:
-            self.cropped_picture = cv2.GaussianBlur(self.cropped_picture, (15, 15), 0)
-            self.update_picture_display()
-            self.status_bar.config(text="Blur added")
+            radius = self.blur_radius.get()
+        except tk.TclError:
+            self.status_bar.config(text="Error: Blur radius must be a whole number")
+            return
+        if not 1 <= radius <= MAX_BLUR_RADIUS:
+            self.status_bar.config(text=f"Error: Blur radius must be between 1 and {MAX_BLUR_RADIUS}")
+            return
+
+        try:
+            ksize = 2 * radius + 1
+            self.apply_step(
+                "blur", (ksize,), done_text=f"Blur added (radius {radius}, {choose_strategy(ksize)})"
+            )
         except Exception as e:
             self.status_bar.config(text=f"Error applying blur: {str(e)}")
 
+    @traced_handler
     def rotate_left(self) -> None:
         """Rotate the cropped image 90 degrees counter-clockwise."""
         if not self.validate_cropped_image():
             return
             
         try:
-            self.cropped_picture = cv2.rotate(self.cropped_picture, cv2.ROTATE_90_COUNTERCLOCKWISE)
-            self.update_picture_display()
-            self.status_bar.config(text="Rotated left")
+            self.apply_step("rotate_left", done_text="Rotated left")
         except Exception as e:
             self.status_bar.config(text=f"Error rotating image: {str(e)}")
 
+    @traced_handler
     def rotate_right(self) -> None:
         """Rotate the cropped image 90 degrees clockwise."""
         if not self.validate_cropped_image():
             return
             
         try:
-            self.cropped_picture = cv2.rotate(self.cropped_picture, cv2.ROTATE_90_CLOCKWISE)
-            self.update_picture_display()
-            self.status_bar.config(text="Rotated right")
+            self.apply_step("rotate_right", done_text="Rotated right")
         except Exception as e:
             self.status_bar.config(text=f"Error rotating image: {str(e)}")
 
+    @traced_handler
     def apply_edge_detection(self) -> None:
         """Apply Canny edge detection to the cropped image."""
         if not self.validate_cropped_image():
             return
             
         try:
-            gray = cv2.cvtColor(self.cropped_picture, cv2.COLOR_RGB2GRAY)
-            edges = cv2.Canny(gray, 100, 200)
-            self.cropped_picture = cv2.cvtColor(edges, cv2.COLOR_GRAY2RGB)
-            self.update_picture_display()
-            self.status_bar.config(text="Edge detection applied")
+            self.apply_step("edge", (100, 200), done_text="Edge detection applied")
         except Exception as e:
             self.status_bar.config(text=f"Error applying edge detection: {str(e)}")
 
@@ -234,6 +824,7 @@ class PictureProcessorApp:
             return False
         return True
 
+    @traced_handler
     def increase_brightness(self) -> None:
         """Increase brightness of the cropped image."""
         if not self.validate_cropped_image():
@@ -243,20 +834,12 @@ class PictureProcessorApp:
             brightness_value = 50
             if not self.validate_brightness_value(brightness_value):
                 return
-                
-            hsv = cv2.cvtColor(self.cropped_picture, cv2.COLOR_RGB2HSV)
-            h, s, v = cv2.split(hsv)
-            
-            # Ensure we don't exceed valid range (0-255)
-            v = np.where(v <= 255 - brightness_value, v + brightness_value, 255)
-            
-            final_hsv = cv2.merge((h, s, v))
-            self.cropped_picture = cv2.cvtColor(final_hsv, cv2.COLOR_HSV2RGB)
-            self.update_picture_display()
-            self.status_bar.config(text="Brightness increased")
+
+            self.apply_step("brightness", (brightness_value,), done_text="Brightness increased")
         except Exception as e:
             self.status_bar.config(text=f"Error adjusting brightness: {str(e)}")
 
+    @traced_handler
     def decrease_brightness(self) -> None:
         """Decrease brightness of the cropped image."""
         if not self.validate_cropped_image():
@@ -266,57 +849,34 @@ class PictureProcessorApp:
             brightness_value = 50
             if not self.validate_brightness_value(brightness_value):
                 return
-                
-            hsv = cv2.cvtColor(self.cropped_picture, cv2.COLOR_RGB2HSV)
-            h, s, v = cv2.split(hsv)
-            
-            # Ensure we don't go below 0
-            v = np.where(v >= brightness_value, v - brightness_value, 0)
-            
-            final_hsv = cv2.merge((h, s, v))
-            self.cropped_picture = cv2.cvtColor(final_hsv, cv2.COLOR_HSV2RGB)
-            self.update_picture_display()
-            self.status_bar.config(text="Brightness decreased")
+
+            self.apply_step("brightness", (-brightness_value,), done_text="Brightness decreased")
         except Exception as e:
             self.status_bar.config(text=f"Error adjusting brightness: {str(e)}")
 
+    @traced_handler
     def apply_sepia(self) -> None:
         """Apply sepia filter to the cropped image."""
         if not self.validate_cropped_image():
             return
             
         try:
-            kernel = np.array([
-                [0.272, 0.534, 0.131],
-                [0.349, 0.686, 0.168],
-                [0.393, 0.769, 0.189]
-            ])
-            
-            # Validate kernel values
-            if not isinstance(kernel, np.ndarray) or kernel.shape != (3, 3):
-                self.status_bar.config(text="Error: Invalid sepia kernel")
-                return
-                
-            sepia = cv2.transform(self.cropped_picture, kernel)
-            sepia = np.clip(sepia, 0, 255).astype(np.uint8)
-            self.cropped_picture = sepia
-            self.update_picture_display()
-            self.status_bar.config(text="Sepia filter applied")
+            self.apply_step("sepia", done_text="Sepia filter applied")
         except Exception as e:
             self.status_bar.config(text=f"Error applying sepia: {str(e)}")
 
+    @traced_handler
     def invert_colors(self) -> None:
         """Invert colors of the cropped image."""
         if not self.validate_cropped_image():
             return
             
         try:
-            self.cropped_picture = cv2.bitwise_not(self.cropped_picture)
-            self.update_picture_display()
-            self.status_bar.config(text="Colors inverted")
+            self.apply_step("invert", done_text="Colors inverted")
         except Exception as e:
             self.status_bar.config(text=f"Error inverting colors: {str(e)}")
 
+    @traced_handler
     def reset_picture(self) -> None:
         """Reset the image to its original state."""
         if self.original_picture is None:
@@ -324,96 +884,354 @@ class PictureProcessorApp:
             return
             
         try:
-            self.display_picture = self.original_picture.copy()
-            self.cropped_picture = None
-            self.crop_rect = None
-            self.scale_factor = 1.0
-            self.scale_slider.set(1.0)
-            self.update_picture_display()
-            self.processed_canvas.delete("all")
+            self.set_picture(self.original_picture)
             self.status_bar.config(text="Picture reset")
         except Exception as e:
             self.status_bar.config(text=f"Error resetting picture: {str(e)}")
 
+    def refresh_step_list(self) -> None:
+        """Show the recorded operations in the steps list."""
+        self.steps_list.delete(0, tk.END)
+        for i, step in enumerate(self.pipeline.steps, start=1):
+            params = ", ".join(f"{p:g}" for p in step.params)
+            self.steps_list.insert(tk.END, f"{i}. {step.name}" + (f" ({params})" if params else ""))
+        self.history_label.config(
+            text=f"History: {self.history.undo_steps} undo, {self.history.redo_steps} redo\n"
+                 f"{self.history.memory_usage / 1024:.1f} KB of {self.history.budget_bytes / 1024 ** 2:.0f} MB"
+        )
+
+    @traced_handler
+    def undo(self) -> None:
+        """Undo the latest operation."""
+        if len(self.pipeline) > self.history_steps:
+            # The latest step is still being processed: cancel it, keeping it for redo
+            self.worker.cancel_all("filter")
+            step = self.pipeline.pop()
+            self.history.push_redo(step)
+            self.refresh_step_list()
+            if len(self.pipeline) > self.history_steps:
+                self.process_pipeline("Undoing", f"Undid {step.name}")
+            else:
+                self.status_bar.config(text=f"Undid {step.name}")
+            return
+        if self.worker.is_busy("filter"):
+            self.status_bar.config(text="Please wait for the current operation to finish")
+            return
+        if not self.history.can_undo or self.cropped_picture is None:
+            self.status_bar.config(text="Nothing to undo")
+            return
+
+        try:
+            step, image = self.history.undo(self.cropped_picture)
+            self.pipeline.pop()
+            self.history_steps -= 1
+            self.pipeline.set_result(image)
+            self.cropped_picture = image
+            self.cropped_turns = self.pipeline.orientation()
+            self.update_picture_display()
+            self.refresh_step_list()
+            self.status_bar.config(text=f"Undid {step.name} (history: {self.history.memory_usage / 1024:.1f} KB)")
+        except Exception as e:
+            self.status_bar.config(text=f"Error undoing operation: {str(e)}")
+
+    @traced_handler
+    def redo(self) -> None:
+        """Redo the latest undone operation."""
+        if not self.history.can_redo or self.cropped_picture is None:
+            self.status_bar.config(text="Nothing to redo")
+            return
+
+        try:
+            # Redo is deterministic, so the step is re-run in the background;
+            # it gets its history entry back when the result lands
+            step = self.history.take_redo()
+            self.pipeline.append(step.name, step.params)
+            self.refresh_step_list()
+            self.process_pipeline(
+                f"Redoing {step.name}", f"Redid {step.name} (history: {self.history.memory_usage / 1024:.1f} KB)"
+            )
+        except Exception as e:
+            self.status_bar.config(text=f"Error redoing operation: {str(e)}")
+
+    def clear_history(self) -> None:
+        """Forget the undo history, e.g. after the source or earlier steps changed."""
+        self.history.clear()
+        self.history_steps = len(self.pipeline)
+
+    @traced_handler
+    def set_history_budget(self) -> None:
+        """Ask for the undo history memory budget in megabytes."""
+        budget = simpledialog.askinteger(
+            "History Budget", "Undo history memory budget (MB):",
+            initialvalue=self.history.budget_bytes // 1024 ** 2, minvalue=0, parent=self.window
+        )
+        if budget is None:
+            return
+        self.history.set_budget(budget * 1024 ** 2)
+        self.refresh_step_list()
+        self.status_bar.config(text=f"History budget set to {budget} MB")
+
+    @traced_handler
+    def remove_selected_step(self) -> None:
+        """Remove the selected operation and recompute from the stage before it."""
+        selection = self.steps_list.curselection()
+        if not selection:
+            self.status_bar.config(text="No operation selected")
+            return
+
+        try:
+            step = self.pipeline.remove(selection[0])
+            self.clear_history()
+            self.refresh_step_list()
+            if self.pipeline.source is not None:
+                self.process_pipeline(f"Removing {step.name}", f"Removed operation: {step.name}")
+            else:
+                self.status_bar.config(text=f"Removed operation: {step.name}")
+        except Exception as e:
+            self.status_bar.config(text=f"Error removing operation: {str(e)}")
+
+    @traced_handler
+    def clear_steps(self) -> None:
+        """Remove all recorded operations, keeping the current crop."""
+        try:
+            while len(self.pipeline):
+                self.pipeline.pop()
+            self.clear_history()
+            self.refresh_step_list()
+            if self.pipeline.source is not None:
+                self.process_pipeline("Clearing operations", "Operations cleared")
+            else:
+                self.status_bar.config(text="Operations cleared")
+        except Exception as e:
+            self.status_bar.config(text=f"Error clearing operations: {str(e)}")
+
+    @traced_handler
+    def apply_to_whole_picture(self) -> None:
+        """Replay the recorded operations on the full-resolution picture."""
+        if self.display_picture is None or not self.validate_image(self.display_picture):
+            return
+
+        if self.full_resolution_pending:
+            h, w = self.display_picture.shape[:2]
+            self.pending_crop = (0, 0, w, h)
+            self.status_bar.config(text="Operations will be applied once the full-resolution decode finishes")
+            return
+
+        try:
+            self.crop_rect = None
+            self.crop_box = None
+            self.set_pipeline_source(self.display_picture)
+            self.clear_history()
+            self.refresh_step_list()
+            self.update_picture_display()
+            self.process_pipeline(
+                "Applying operations", f"Applied {len(self.pipeline)} operations to the whole picture"
+            )
+        except Exception as e:
+            self.status_bar.config(text=f"Error applying operations: {str(e)}")
+
+    def render_original_preview(self) -> None:
+        """Rasterize the fitted preview of display_picture onto the original canvas."""
+        pic = self.display_picture
+        h, w = pic.shape[:2]
+
+        # Calculate display scale
+        scale = min(MAX_WIDTH / w, MAX_HEIGHT / h, 1.0)
+        disp_w, disp_h = int(w * scale), int(h * scale)
+
+        # Calculate offsets for centering
+        x_offset = (MAX_WIDTH - disp_w) // 2
+        y_offset = (MAX_HEIGHT - disp_h) // 2
+        self.picture_offset = (x_offset, y_offset)
+
+        # Resize and display
+        with self.tracer.span("original resize", "resize"):
+            resized = cv2.resize(pic, (disp_w, disp_h))
+        with self.tracer.span("original photo", "photo"):
+            self.original_view.show(resized, x_offset, y_offset)
+        self.display_to_picture_scale = (w / disp_w, h / disp_h)
+        self.preview_source = pic
+
+    def draw_crop_rect(self) -> None:
+        """Move the crop rectangle overlay to crop_rect, or hide it."""
+        if self.crop_rect:
+            x1, y1, x2, y2 = self.crop_rect
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(MAX_WIDTH, x2), min(MAX_HEIGHT, y2)
+            self.original_canvas.coords(self.crop_rect_item, x1, y1, x2, y2)
+            self.original_canvas.itemconfigure(self.crop_rect_item, state=tk.NORMAL)
+        else:
+            self.original_canvas.itemconfigure(self.crop_rect_item, state=tk.HIDDEN)
+
     def update_picture_display(self) -> None:
-        """Update the display of both original and processed images."""
-        MAX_WIDTH, MAX_HEIGHT = 600, 600
+        """Schedule a redraw of both the original and processed images."""
+        self.redraw.request()
 
-        # Update original picture display
-        if self.display_picture is not None and self.validate_image(self.display_picture):
-            try:
-                pic = self.display_picture.copy()
-                h, w = pic.shape[:2]
-                
-                # Calculate display scale
-                scale = min(MAX_WIDTH / w, MAX_HEIGHT / h, 1.0)
-                disp_w, disp_h = int(w * scale), int(h * scale)
-                
-                # Resize and convert for display
-                pic_resized = cv2.resize(pic, (disp_w, disp_h))
-                pic_pil = Image.fromarray(pic_resized)
-                pic_tk = ImageTk.PhotoImage(pic_pil)
+    def finish_redraw(self) -> None:
+        """Draw the rendered canvases now, then report counters and timing."""
+        with self.tracer.span("tk draw", "draw"):
+            self.window.update_idletasks()
+        self.update_render_counter()
+        self.update_memory_panel()
+        self.show_timing()
 
-                # Update canvas
-                self.original_canvas.config(width=MAX_WIDTH, height=MAX_HEIGHT)
-                self.original_canvas.delete("all")
+    def show_timing(self) -> None:
+        """Append the latest operation's timing to the status bar."""
+        summary = self.tracer.operation_summary()
+        if summary:
+            text = self.status_bar.cget("text").split("  [")[0]
+            self.status_bar.config(text=f"{text}  [{summary}]")
 
-                # Calculate offsets for centering
-                x_offset = (MAX_WIDTH - disp_w) // 2
-                y_offset = (MAX_HEIGHT - disp_h) // 2
-                self.picture_offset = (x_offset, y_offset)
-
-                # Display image
-                self.original_canvas.create_image(x_offset, y_offset, anchor=tk.NW, image=pic_tk)
-                self.original_canvas.image = pic_tk
-                self.display_to_picture_scale = (w / disp_w, h / disp_h)
-
-                # Draw crop rectangle if exists
-                if self.crop_rect:
-                    x1, y1, x2, y2 = self.crop_rect
-                    x1, y1 = max(0, x1), max(0, y1)
-                    x2, y2 = min(MAX_WIDTH, x2), min(MAX_HEIGHT, y2)
-                    self.original_canvas.create_rectangle(x1, y1, x2, y2, outline="yellow", width=2)
+    def export_trace(self) -> None:
+        """Save the session's timing events as Chrome trace-event JSON."""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json"), ("All files", "*.*")],
+        )
+
+        if not file_path:
+            self.status_bar.config(text="Export cancelled")
+            return
+
+        try:
+            count = self.tracer.export(file_path)
+            self.status_bar.config(
+                text=f"Exported {count} trace events to: {os.path.basename(file_path)} "
+                     f"(open in chrome://tracing or ui.perfetto.dev)"
+            )
+        except Exception as e:
+            self.status_bar.config(text=f"Error exporting trace: {str(e)}")
+
+    def update_render_counter(self) -> None:
+        """Show how many renders were requested and actually performed."""
+        self.render_label.config(text=f"Renders: {self.redraw.performed}/{self.redraw.requested}")
+
+    def update_memory_panel(self) -> None:
+        """Show the bytes held by each image buffer, counting shared pixels once."""
+        usage = self.memory.measure([
+            ("Original", [self.original_picture]),
+            ("Display", [self.display_picture]),
+            ("Full-res crop", [self.full_source]),
+            ("Pipeline", self.pipeline.stages()),
+            ("Result", [self.cropped_picture]),
+            ("Scale proxy", [self.scale_proxy]),
+            ("Image cache", self.image_cache.arrays()),
+            ("Result cache", self.memo.arrays()),
+            ("Large image", [self.large_image.pixels if self.large_image is not None else None]),
+        ])
+        lines = []
+        for row in usage.rows:
+            if row.referenced:
+                shared = " (shared)" if row.unique == 0 else ""
+                lines.append(f"{row.name}: {row.referenced / 1024 ** 2:.1f} MB{shared}")
+        lines.append(f"Total: {usage.resident / 1024 ** 2:.1f} MB, peak {usage.peak / 1024 ** 2:.1f} MB")
+        if usage.mapped:
+            lines.append(f"Mapped from disk: {usage.mapped / 1024 ** 2:.1f} MB")
+        if self.memo.hits or self.memo.misses:
+            lines.append(f"Result cache: {len(self.memo)} results, {self.memo.hits} hits, "
+                         f"{self.memo.misses} misses")
+        self.memory_label.config(text="\n".join(lines))
+
+    def render_original(self) -> None:
+        """Render the original canvas, re-rasterizing only when the picture changed."""
+        if self.display_picture is not None and self.validate_image(self.display_picture):
+            try:
+                if self.display_picture is not self.preview_source:
+                    self.render_original_preview()
+                self.draw_crop_rect()
             except Exception as e:
                 self.status_bar.config(text=f"Error updating display: {str(e)}")
 
-        # Update processed picture display
-        if self.cropped_picture is not None and self.validate_image(self.cropped_picture):
+    def render_processed(self) -> None:
+        """Render the processed canvas from cropped_picture."""
+        if self.cropped_picture is None:
+            self.processed_view.clear()
+            return
+
+        if self.validate_image(self.cropped_picture):
             try:
-                processed_pic = self.cropped_picture.copy()
-                new_w = int(processed_pic.shape[1] * self.scale_factor)
-                new_h = int(processed_pic.shape[0] * self.scale_factor)
-
-                # Adjust size if too large
-                if new_w > MAX_WIDTH or new_h > MAX_HEIGHT:
-                    ratio = min(MAX_WIDTH / new_w, MAX_HEIGHT / new_h)
-                    new_w = int(new_w * ratio)
-                    new_h = int(new_h * ratio)
-
-                # Resize and convert for display
-                processed_pic = cv2.resize(processed_pic, (new_w, new_h))
-                processed_pic_pil = Image.fromarray(processed_pic)
-                processed_pic_tk = ImageTk.PhotoImage(image=processed_pic_pil)
-
-                # Update canvas
-                self.processed_canvas.config(width=MAX_WIDTH, height=MAX_HEIGHT)
-                self.processed_canvas.delete("all")
-                
+                processed_pic = self.cropped_picture
+                h, w = processed_pic.shape[:2]
+                # Rotation and scale are resolved together, resampling the pixels once
+                view = ViewTransform(self.cropped_turns, self.scale_factor)
+                # Scale relative to the full-resolution size, even when showing a proxy
+                new_w, new_h = view.display_size(
+                    w / self.cropped_proxy_ratio, h / self.cropped_proxy_ratio, MAX_WIDTH, MAX_HEIGHT
+                )
+
                 # Calculate offsets for centering
                 x_offset = (MAX_WIDTH - new_w) // 2
                 y_offset = (MAX_HEIGHT - new_h) // 2
-                
-                # Display image
-                self.processed_canvas.create_image(x_offset, y_offset, anchor=tk.NW, image=processed_pic_tk)
-                self.processed_canvas.image = processed_pic_tk
+
+                with self.tracer.span("processed resize", "resize", preview=self.scale_preview):
+                    if self.scale_preview:
+                        # Fast preview while the slider is moving
+                        resized = view.render(self.get_scale_proxy(), (new_w, new_h), cv2.INTER_LINEAR)
+                    else:
+                        resized = view.render(processed_pic, (new_w, new_h))
+
+                # Display, reusing the existing Tk image when the size is unchanged
+                with self.tracer.span("processed photo", "photo"):
+                    self.processed_view.show(resized, x_offset, y_offset)
             except Exception as e:
                 self.status_bar.config(text=f"Error updating processed display: {str(e)}")
 
+    def remap_histogram(self, snapshot: Pipeline, result: np.ndarray) -> None:
+        """Derive the histogram of result from the current one when only lookup tables separate them."""
+        if self.histogram is None or self.histogram_source is not self.cropped_picture:
+            return
+        k = snapshot.stage_of(self.cropped_picture)
+        if k is None or k == len(snapshot):
+            return
+        # Rotations move pixels without changing their values
+        lut = chain_lut([step for step in snapshot.chain()[k:] if not is_rotation(step[0])])
+        if lut is None:
+            return
+        with self.tracer.span("histogram remap", "histogram"):
+            self.histogram = self.histogram.remap(lut, result)
+        self.histogram_source = result
+        self.histogram_remapped = True
+
+    def render_histogram(self) -> None:
+        """Plot the histograms of cropped_picture, counting a sample if they are not known yet."""
+        if self.cropped_picture is None:
+            for line in self.histogram_lines:
+                self.histogram_canvas.itemconfigure(line, state=tk.HIDDEN)
+            self.histogram_label.config(text="")
+            return
+
+        try:
+            if self.histogram_source is not self.cropped_picture:
+                with self.tracer.span("histogram", "histogram"):
+                    self.histogram = compute_histograms(self.cropped_picture)
+                self.histogram_source = self.cropped_picture
+                self.histogram_remapped = False
+
+            histogram = self.histogram
+            fractions = histogram.fractions()
+            # Scale to the tallest bin below the 99th percentile, so clipped spikes don't flatten the rest
+            peak = max(float(np.percentile(fractions, 99)), 1e-9)
+            xs = np.arange(256) * (HISTOGRAM_WIDTH - 1) / 255
+            for line, row in zip(self.histogram_lines, fractions):
+                ys = HISTOGRAM_HEIGHT - np.minimum(row / peak, 1.0) * (HISTOGRAM_HEIGHT - 2)
+                self.histogram_canvas.coords(line, *np.column_stack((xs, ys)).ravel().tolist())
+                self.histogram_canvas.itemconfigure(line, state=tk.NORMAL)
+
+            if histogram.stride == 1:
+                accuracy = "exact"
+            else:
+                accuracy = f"1/{histogram.stride ** 2} sample, ±{histogram.error_bound() * 100:.2f}% (95%)"
+            source = "remapped" if self.histogram_remapped else f"{histogram.samples:,} px"
+            self.histogram_label.config(text=f"{source}, {accuracy}")
+        except Exception as e:
+            self.status_bar.config(text=f"Error updating histogram: {str(e)}")
+
     def start_crop(self, event: tk.Event) -> None:
         """Start cropping operation."""
         if self.display_picture is not None and self.validate_image(self.display_picture):
             self.crop_start = (event.x, event.y)
             self.crop_rect = None
+            self.draw_crop_rect()
 
     def update_crop(self, event: tk.Event) -> None:
         """Update crop rectangle during mouse drag."""
@@ -428,8 +1246,9 @@ class PictureProcessorApp:
             y1, y2 = max(0, min(y1, canvas_height)), max(0, min(y2, canvas_height))
             
             self.crop_rect = (x1, y1, x2, y2)
-            self.update_picture_display()
+            self.draw_crop_rect()
 
+    @traced_handler
     def end_crop(self, _: tk.Event) -> None:
         """Finalize cropping operation."""
         if self.crop_rect and self.display_picture is not None and self.validate_image(self.display_picture):
@@ -455,8 +1274,12 @@ class PictureProcessorApp:
 
                 # Validate crop region
                 if crop_x2 > crop_x1 and crop_y2 > crop_y1:
-                    self.cropped_picture = self.display_picture[crop_y1:crop_y2, crop_x1:crop_x2]
-                    self.status_bar.config(text=f"Cropped region: ({crop_x1}, {crop_y1}) to ({crop_x2}, {crop_y2})")
+                    if self.full_resolution_pending:
+                        # Real pixels are needed; crop as soon as they are decoded
+                        self.pending_crop = (crop_x1, crop_y1, crop_x2, crop_y2)
+                        self.status_bar.config(text="Crop will be applied once the full-resolution decode finishes")
+                    else:
+                        self.crop_to((crop_x1, crop_y1, crop_x2, crop_y2))
                 else:
                     self.status_bar.config(text="Invalid crop region")
                     
@@ -464,6 +1287,57 @@ class PictureProcessorApp:
             except Exception as e:
                 self.status_bar.config(text=f"Error during cropping: {str(e)}")
 
+    def set_pipeline_source(self, region: np.ndarray) -> None:
+        """Make region of display_picture the pipeline source, via a proxy in proxy mode."""
+        factor = 1.0
+        if self.large_image is not None:
+            # Recorded parameters refer to the full-resolution large image
+            factor = 1.0 / self.large_image.preview_scale[0]
+
+        h, w = region.shape[:2]
+        ratio = min(MAX_WIDTH / w, MAX_HEIGHT / h, 1.0)
+        if self.proxy_mode.get() and ratio < 1.0:
+            size = (max(1, int(w * ratio)), max(1, int(h * ratio)))
+            with self.tracer.span("proxy", "resize", size=size):
+                proxy = cv2.resize(region, size, interpolation=cv2.INTER_AREA)
+            self.full_source = region
+            self.proxy_ratio = size[0] / w
+            self.pipeline.set_source(proxy, factor * self.proxy_ratio)
+        else:
+            self.full_source = None
+            self.proxy_ratio = 1.0
+            self.pipeline.set_source(region, factor)
+
+    def toggle_proxy_mode(self) -> None:
+        """Switch between editing a proxy and the full-resolution pixels."""
+        mode = "on" if self.proxy_mode.get() else "off"
+        if self.pipeline.source is None or self.display_picture is None:
+            self.status_bar.config(text=f"Proxy editing {mode}")
+            return
+
+        try:
+            region = self.display_picture
+            if self.crop_box is not None:
+                x1, y1, x2, y2 = self.crop_box
+                region = region[y1:y2, x1:x2]
+            self.set_pipeline_source(region)
+            self.clear_history()
+            self.refresh_step_list()
+            self.process_pipeline("Switching proxy editing", f"Proxy editing {mode}")
+        except Exception as e:
+            self.status_bar.config(text=f"Error switching proxy editing: {str(e)}")
+
+    def crop_to(self, box: Tuple[int, int, int, int]) -> None:
+        """Crop display_picture to box and replay the recorded operations onto it."""
+        x1, y1, x2, y2 = box
+        self.crop_box = box
+        self.set_pipeline_source(self.display_picture[y1:y2, x1:x2])
+        self.clear_history()
+        self.refresh_step_list()
+        replayed = f", {len(self.pipeline)} operations replayed" if len(self.pipeline) else ""
+        self.process_pipeline("Cropping", f"Cropped region: ({x1}, {y1}) to ({x2}, {y2}){replayed}")
+
+    @traced_handler
     def update_scale(self, value: str) -> None:
         """Update the scale factor for the processed image."""
         try:
@@ -471,16 +1345,45 @@ class PictureProcessorApp:
             if 0.1 <= scale <= 3.0:
                 self.scale_factor = scale
                 self.scale_label.config(text=f"Resize Scale: {self.scale_factor:.1f}")
-                self.update_picture_display()
+
+                # Render a fast preview now and a high-quality one once the slider settles
+                self.scale_preview = True
+                if self.scale_settle_job is not None:
+                    self.window.after_cancel(self.scale_settle_job)
+                self.scale_settle_job = self.window.after(SCALE_SETTLE_MS, self.finish_scale_preview)
+                self.redraw.request(["processed"])
             else:
                 self.status_bar.config(text="Scale must be between 0.1 and 3.0")
         except ValueError:
             self.status_bar.config(text="Invalid scale value")
 
+    def finish_scale_preview(self) -> None:
+        """Replace the fast scaling preview with a high-quality render."""
+        self.scale_settle_job = None
+        self.scale_preview = False
+        self.redraw.request(["processed"])
+
+    def get_scale_proxy(self) -> np.ndarray:
+        """Return cropped_picture downsampled to fit the canvas, cached per picture."""
+        if self.scale_proxy_source is not self.cropped_picture:
+            pic = self.cropped_picture
+            h, w = pic.shape[:2]
+            ratio = min(MAX_WIDTH / w, MAX_HEIGHT / h, 1.0)
+            if ratio < 1.0:
+                size = (max(1, int(w * ratio)), max(1, int(h * ratio)))
+                pic = cv2.resize(pic, size, interpolation=cv2.INTER_AREA)
+            self.scale_proxy = pic
+            self.scale_proxy_source = self.cropped_picture
+        return self.scale_proxy
+
+    @traced_handler
     def save_picture(self) -> None:
         """Save the processed image to a file."""
         if not self.validate_cropped_image():
             return
+        if self.worker.is_busy("filter") or self.cropped_picture is None:
+            self.status_bar.config(text="Please wait for processing to finish before saving")
+            return
             
         file_types = [
             ("JPEG", "*.jpg"),
@@ -500,11 +1403,52 @@ class PictureProcessorApp:
             return
             
         try:
-            # Convert color space and save
-            img_to_save = cv2.cvtColor(self.cropped_picture, cv2.COLOR_RGB2BGR)
-            if not cv2.imwrite(file_path, img_to_save):
-                raise IOError("Failed to write image file")
-                
-            self.status_bar.config(text=f"Saved to: {os.path.basename(file_path)}")
+            fmt = encoder_format(file_path)
+            if fmt is not None:
+                dialog = SaveOptionsDialog(self.window, fmt, self.save_options)
+                if dialog.result is None:
+                    self.status_bar.config(text="Save cancelled")
+                    return
+                self.save_options = dialog.result
+            params = self.save_options.params(file_path)
+            if self.full_source is not None:
+                # Re-apply the recorded steps to the full-resolution pixels
+                snapshot, full = self.pipeline.copy(), self.full_source
+                render = lambda: snapshot.render(full)
+            else:
+                picture, turns = self.cropped_picture, self.cropped_turns
+                render = lambda: rotate(picture, turns)
+            self.save_in_background(render, file_path, params)
         except Exception as e:
-            self.status_bar.config(text=f"Error saving file: {str(e)}")
\ No newline at end of file
+            self.status_bar.config(text=f"Error saving file: {str(e)}")
+
+    def save_in_background(self, render: Callable[[], np.ndarray], file_path: str, params: List[int]) -> None:
+        """Render, encode and write the picture on the worker thread, via a temporary file and rename."""
+        name = os.path.basename(file_path)
+        tracer = self.tracer
+
+        def work(job: Job, progress: ProgressFunc) -> Tuple[int, float]:
+            start = time.perf_counter()
+            progress(0.0, f"Rendering {name}")
+            with tracer.span("render", "filter", file=name):
+                image = render()
+            progress(0.0, f"Encoding {name}")
+            with tracer.span("encode", "encode", file=name):
+                data = encode_image(image, file_path, params)
+            with tracer.span("write", "encode", file=name, bytes=data.nbytes):
+                size = write_bytes_atomic(
+                    file_path, data, lambda fraction: progress(0.5 + fraction / 2, f"Writing {name}")
+                )
+            return size, time.perf_counter() - start
+
+        def done(outcome: Tuple[int, float]) -> None:
+            size, seconds = outcome
+            shown = f"{size / 1024:.0f} KB" if size < 1024 ** 2 else f"{size / 1024 ** 2:.2f} MB"
+            self.status_bar.config(text=f"Saved to: {name} ({shown}, encoded in {seconds:.2f} s)")
+
+        def failed(e: Exception) -> None:
+            self.status_bar.config(text=f"Error saving file: {str(e)}")
+
+        # Saving again to the same file supersedes a pending save
+        self.status_bar.config(text=f"Saving {name}...")
+        self.worker.submit(f"Saving {name}", work, done, failed, key=f"save:{os.path.abspath(file_path)}")
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""RGB and luminance histograms estimated from a strided sample.
+
+Counting every pixel of a 50 MP picture after each edit is wasteful when
+the histogram is drawn 256 bins wide. Instead, every ``stride``-th pixel in
+both directions is counted, with the stride chosen to keep about
+``DEFAULT_SAMPLES`` pixels. By the Dvoretzky-Kiefer-Wolfowitz inequality,
+n independent samples estimate every cumulative fraction of the histogram
+within sqrt(ln(2 / alpha) / (2 n)) with probability 1 - alpha. That is
+0.27% for 250,000 samples at 95% confidence, and any single bin's fraction
+is within twice that. A regular grid is not an independent sample, so the
+bound only fails for content that repeats with the stride's period.
+
+Lookup-table operations such as invert map each input value to exactly
+one output value, so their effect on a histogram is computed by moving bin
+counts instead of recounting pixels. The channel histograms are remapped
+exactly. Luminance is a weighted sum of the channels, so its histogram can
+only be remapped when the table shifts or mirrors every occupied value
+(invert does); this is exact up to rounding. Otherwise only the luminance
+row is recounted, from the same strided sample. Brightness works on the HSV
+value channel, not through a table, so it is always recounted.
+"""
+import math
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .colorengine import compile_chain, is_point_operation
+
+DEFAULT_SAMPLES = 250_000
+
+# Rows of Histograms.counts
+CHANNELS = ("red", "green", "blue", "luminance")
+
+
+class Histograms(NamedTuple):
+    """Estimated histograms of an image's channels and luminance."""
+    counts: np.ndarray  # (4, 256) float64, one row per entry of CHANNELS
+    samples: int
+    stride: int
+
+    def fractions(self) -> np.ndarray:
+        """Counts normalized so that each row sums to 1."""
+        return self.counts / max(1, self.samples)
+
+    def error_bound(self, confidence: float = 0.95) -> float:
+        """Largest error of any cumulative fraction at the given confidence (0 if exact)."""
+        if self.stride == 1:
+            return 0.0
+        return dkw_bound(self.samples, confidence)
+
+    def remap(self, lut: np.ndarray, image: np.ndarray) -> "Histograms":
+        """Histograms of image, the result of applying a (3, 256) lookup table to the counted image."""
+        counts = np.empty_like(self.counts)
+        for c in range(3):
+            counts[c] = np.bincount(lut[c], weights=self.counts[c], minlength=256)
+        if _commutes_with_luma(lut[0], self.counts[:3].any(axis=0)):
+            counts[3] = np.bincount(lut[0], weights=self.counts[3], minlength=256)
+        else:
+            counts[3] = _luminance_counts(_sample(image, self.stride))
+        return self._replace(counts=counts)
+
+
+def _commutes_with_luma(lut: np.ndarray, occupied: np.ndarray) -> bool:
+    """True if lut shifts or mirrors every occupied value, so it maps luma like a channel."""
+    values = np.flatnonzero(occupied)
+    mapped = lut[values].astype(np.int64)
+    return len(np.unique(mapped - values)) <= 1 or len(np.unique(mapped + values)) <= 1
+
+
+def _sample(image: np.ndarray, stride: int) -> np.ndarray:
+    """Every stride-th pixel of image in both directions, as a contiguous array."""
+    return np.ascontiguousarray(image[::stride, ::stride])
+
+
+def _luminance_counts(sample: np.ndarray) -> np.ndarray:
+    """Luminance histogram of an RGB or grayscale sample."""
+    gray = sample if sample.ndim == 2 else cv2.cvtColor(sample, cv2.COLOR_RGB2GRAY)
+    return cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+
+
+def dkw_bound(samples: int, confidence: float = 0.95) -> float:
+    """Dvoretzky-Kiefer-Wolfowitz bound on the CDF error of samples independent draws."""
+    return math.sqrt(math.log(2 / (1 - confidence)) / (2 * max(1, samples)))
+
+
+def sample_stride(shape: Tuple[int, ...], max_samples: int = DEFAULT_SAMPLES) -> int:
+    """Smallest stride in both directions that samples at most max_samples pixels."""
+    h, w = shape[:2]
+    stride = max(1, math.ceil(math.sqrt(h * w / max_samples)))
+    while -(-h // stride) * -(-w // stride) > max_samples:
+        stride += 1
+    return stride
+
+
+def compute_histograms(image: np.ndarray, max_samples: int = DEFAULT_SAMPLES) -> Histograms:
+    """Estimate the histograms of an RGB or grayscale uint8 image from a strided sample."""
+    stride = sample_stride(image.shape, max_samples)
+    sample = _sample(image, stride)
+    counts = np.empty((4, 256), dtype=np.float64)
+    if sample.ndim == 2:
+        counts[:3] = cv2.calcHist([sample], [0], None, [256], [0, 256]).ravel()
+    else:
+        for c in range(3):
+            counts[c] = cv2.calcHist([sample], [c], None, [256], [0, 256]).ravel()
+    counts[3] = _luminance_counts(sample)
+    return Histograms(counts, sample.shape[0] * sample.shape[1], stride)
+
+
+def chain_lut(chain: Sequence[Tuple[str, Sequence[float]]]) -> Optional[np.ndarray]:
+    """The (3, 256) lookup table a chain amounts to, or None if it is not a pure LUT chain."""
+    if not chain or not all(is_point_operation(name) for name, _ in chain):
+        return None
+    program = compile_chain(chain)
+    if len(program) != 1 or program.stages[0][1] is not None:
+        return None
+    lut = program.stages[0][0]
+    # The luminance remap needs the same table for every channel
+    if not (lut == lut[0]).all():
+        return None
+    return lut
@@ -0,0 +1,187 @@
+"""Memory-bounded undo/redo history.
+
+Invertible operations are undone by applying their inverse, and rotations
+do not change the pixels of a pipeline stage at all (see ``geometry``), so
+neither costs any pixel storage. Lossy operations (blur, edge, sepia, ...)
+keep a zlib-compressed snapshot of the image before the step, stored as an
+XOR delta against the result when the shapes match, since unchanged regions
+then compress to almost nothing. Redo re-runs the step,
+which is deterministic. When the history exceeds its byte budget the oldest
+steps are evicted. Given a ``MemoCache``, compressed snapshots are cached
+by the content key of the step's result, so redoing a step that was done
+before does not compress it again.
+"""
+import zlib
+from collections import deque
+from typing import Deque, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .filters import apply_operation
+from .geometry import is_rotation
+from .memo import MemoCache, derive_key
+from .pipeline import Step
+
+# Operations whose effect is undone exactly by another operation
+INVERSE_OPERATIONS: Dict[str, str] = {
+    "invert": "invert",
+}
+
+# Approximate bookkeeping cost of one entry besides its snapshot
+ENTRY_OVERHEAD = 256
+
+
+class HistoryEntry(NamedTuple):
+    """One undoable step and what is needed to reverse it."""
+    step: Step
+    snapshot: Optional[bytes] = None
+    shape: Tuple[int, ...] = ()
+    dtype: str = "uint8"
+    is_delta: bool = False
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by this entry."""
+        return ENTRY_OVERHEAD + (len(self.snapshot) if self.snapshot is not None else 0)
+
+
+class UndoHistory:
+    """Undo/redo stacks kept within a memory budget."""
+
+    def __init__(self, budget_bytes: int = 64 * 1024 * 1024, compression_level: int = 1):
+        """Create an empty history holding at most budget_bytes of snapshots."""
+        self.budget_bytes = budget_bytes
+        self.compression_level = compression_level
+        self._undo: Deque[HistoryEntry] = deque()
+        self._redo: Deque[HistoryEntry] = deque()
+        self.evicted = 0
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    @property
+    def undo_steps(self) -> int:
+        return len(self._undo)
+
+    @property
+    def redo_steps(self) -> int:
+        return len(self._redo)
+
+    @property
+    def memory_usage(self) -> int:
+        """Bytes currently held by undo and redo entries."""
+        return sum(e.nbytes for e in self._undo) + sum(e.nbytes for e in self._redo)
+
+    def set_budget(self, budget_bytes: int) -> None:
+        """Change the memory budget, evicting old steps if needed."""
+        if budget_bytes < 0:
+            raise ValueError("History budget must not be negative")
+        self.budget_bytes = budget_bytes
+        self._evict()
+
+    def clear(self) -> None:
+        """Forget all undo and redo steps."""
+        self._undo.clear()
+        self._redo.clear()
+
+    def make_entry(self, step: Step, before: np.ndarray, after: np.ndarray,
+                   memo: Optional[MemoCache] = None, key: Optional[str] = None) -> HistoryEntry:
+        """Build the cheapest entry that can restore before from after.
+
+        key is the memo cache key of after. This does not touch the stacks,
+        so it may run on a worker thread.
+        """
+        if step.name in INVERSE_OPERATIONS or is_rotation(step.name):
+            return HistoryEntry(step)
+        before = np.ascontiguousarray(before)
+        is_delta = before.shape == after.shape and before.dtype == after.dtype
+        snapshot_key = cached = None
+        if memo is not None and key is not None:
+            snapshot_key = derive_key(key, "history", (self.compression_level,))
+            cached = memo.peek(snapshot_key)
+        if cached is not None:
+            snapshot = cached.tobytes()
+        else:
+            payload = np.bitwise_xor(before, after) if is_delta else before
+            snapshot = zlib.compress(payload.tobytes(), self.compression_level)
+            if snapshot_key is not None:
+                memo.put(snapshot_key, np.frombuffer(snapshot, dtype=np.uint8))
+        return HistoryEntry(step, snapshot, before.shape, before.dtype.str, is_delta)
+
+    def _restore(self, entry: HistoryEntry, after: np.ndarray) -> np.ndarray:
+        """Recover the image before entry.step given the image after it."""
+        if entry.snapshot is None:
+            if is_rotation(entry.step.name):
+                # Rotations are deferred, so the stages before and after hold the same pixels
+                return after
+            inverse = INVERSE_OPERATIONS[entry.step.name]
+            return apply_operation(after, inverse, entry.step.params)
+        payload = np.frombuffer(zlib.decompress(entry.snapshot), dtype=np.dtype(entry.dtype))
+        payload = payload.reshape(entry.shape)
+        return np.bitwise_xor(payload, after) if entry.is_delta else payload.copy()
+
+    def _evict(self) -> None:
+        """Drop the oldest steps until the history fits its budget."""
+        while self.memory_usage > self.budget_bytes and (self._undo or self._redo):
+            if self._undo:
+                self._undo.popleft()
+            else:
+                self._redo.pop()
+            self.evicted += 1
+
+    def push(self, entry: HistoryEntry, keep_redo: bool = False) -> None:
+        """Add an entry built by make_entry; clears the redo stack unless keep_redo."""
+        if not keep_redo:
+            self._redo.clear()
+        self._undo.append(entry)
+        self._evict()
+
+    def clear_redo(self) -> None:
+        """Forget the undone steps, e.g. when a new step is recorded."""
+        self._redo.clear()
+
+    def push_redo(self, step: Step) -> None:
+        """Put a step that was never completed on the redo stack."""
+        self._redo.append(HistoryEntry(step))
+        self._evict()
+
+    def record(self, step: Step, before: np.ndarray, after: np.ndarray) -> None:
+        """Record that step turned before into after; clears the redo stack."""
+        self.push(self.make_entry(step, before, after))
+
+    def undo(self, current: np.ndarray) -> Tuple[Step, np.ndarray]:
+        """Reverse the latest step; return it with the restored image."""
+        if not self._undo:
+            raise IndexError("Nothing to undo")
+        entry = self._undo.pop()
+        restored = self._restore(entry, current)
+        self._redo.append(entry)
+        return entry.step, restored
+
+    def redo(self, current: np.ndarray) -> Tuple[Step, np.ndarray]:
+        """Re-apply the latest undone step; return it with the new image."""
+        if not self._redo:
+            raise IndexError("Nothing to redo")
+        entry = self._redo.pop()
+        result = apply_operation(current, entry.step.name, entry.step.params)
+        if entry.snapshot is None:
+            # Steps from push_redo have no snapshot yet
+            entry = self.make_entry(entry.step, current, result)
+        self._undo.append(entry)
+        self._evict()
+        return entry.step, result
+
+    def take_redo(self) -> Step:
+        """Remove the latest undone step from the redo stack and return it.
+
+        For callers that re-run the step themselves, e.g. on a worker thread,
+        and push a new entry once it is done.
+        """
+        if not self._redo:
+            raise IndexError("Nothing to redo")
+        return self._redo.pop().step
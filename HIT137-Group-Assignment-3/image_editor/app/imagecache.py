@@ -0,0 +1,141 @@
+"""Memory-bounded LRU cache of decoded images with background prefetch.
+
+Entries are keyed by the absolute path and the file's modification time,
+so an image edited on disk is decoded again. Cached arrays are marked
+read-only because they are shared between the cache and the editor.
+Prefetching decodes files on a single background thread; OpenCV releases
+the GIL while decoding, so the GUI stays responsive.
+"""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .decode import read_image
+from .lru import ArrayLRU
+
+CacheKey = Tuple[str, int]
+
+
+class DecodedImageCache:
+    """LRU cache of decoded RGB images within a byte budget."""
+
+    def __init__(self, budget_bytes: int = 512 * 1024 * 1024):
+        """Create an empty cache holding at most budget_bytes of pixels."""
+        self._images: "ArrayLRU[CacheKey]" = ArrayLRU(budget_bytes)
+        self._lock = threading.Lock()
+        # Prefetches in flight, by absolute path
+        self._pending: Dict[str, Future] = {}
+        self._prefetcher: Optional[ThreadPoolExecutor] = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    @property
+    def budget_bytes(self) -> int:
+        """Most bytes of pixels the cache holds."""
+        return self._images.budget_bytes
+
+    @property
+    def evicted(self) -> int:
+        """Images dropped to stay within the budget."""
+        return self._images.evicted
+
+    @property
+    def memory_usage(self) -> int:
+        """Bytes of pixels currently cached."""
+        return self._images.memory_usage
+
+    def arrays(self) -> List[np.ndarray]:
+        """The cached images, least recently used first."""
+        return self._images.arrays()
+
+    @staticmethod
+    def key(path: str) -> CacheKey:
+        """Cache key of path: its absolute path and modification time."""
+        path = os.path.abspath(path)
+        return path, os.stat(path).st_mtime_ns
+
+    def get(self, path: str) -> Optional[np.ndarray]:
+        """Return the cached image of path, or None if it is not cached."""
+        image = self._images.get(self.key(path))
+        with self._lock:
+            if image is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return image
+
+    def contains(self, path: str) -> bool:
+        """True if path is cached, without counting a hit or miss."""
+        try:
+            key = self.key(path)
+        except OSError:
+            return False
+        return key in self._images
+
+    def put(self, path: str, image: np.ndarray) -> np.ndarray:
+        """Cache image as the decoded content of path; return the read-only cached array."""
+        key = self.key(path)
+        image.flags.writeable = False
+        # Stale entries for older versions of the file are useless now
+        for old in [k for k in self._images.keys() if k[0] == key[0] and k != key]:
+            self._images.pop(old)
+        self._images.put(key, image)
+        return image
+
+    def load(self, path: str) -> np.ndarray:
+        """Return path decoded as RGB, from the cache if possible.
+
+        If path is being prefetched, wait for that decode instead of starting another.
+        """
+        with self._lock:
+            pending = self._pending.get(os.path.abspath(path))
+        if pending is not None:
+            pending.result()
+        image = self.get(path)
+        if image is None:
+            image = self.put(path, read_image(path))
+        return image
+
+    def set_budget(self, budget_bytes: int) -> None:
+        """Change the memory budget, evicting the least recently used images."""
+        self._images.set_budget(budget_bytes)
+
+    def clear(self) -> None:
+        """Drop every cached image."""
+        self._images.clear()
+
+    def prefetch(self, paths: Iterable[str]) -> Dict[str, Future]:
+        """Decode paths that are not cached yet on the background thread."""
+        if self._prefetcher is None:
+            self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        futures = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            with self._lock:
+                if path in self._pending:
+                    continue
+                futures[path] = self._pending[path] = self._prefetcher.submit(self._prefetch_one, path)
+        return futures
+
+    def _prefetch_one(self, path: str) -> None:
+        """Decode one file into the cache, ignoring files that cannot be read."""
+        try:
+            if not self.contains(path):
+                self.put(path, read_image(path))
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+
+    def shutdown(self) -> None:
+        """Stop the prefetch thread."""
+        if self._prefetcher is not None:
+            self._prefetcher.shutdown(wait=False)
+            self._prefetcher = None
@@ -0,0 +1,410 @@
+"""Out-of-core processing of images too large to hold in RAM.
+
+Pixels live in a disk-backed ``np.memmap`` and every stage streams over
+horizontal strips (or column strips for rotations), so peak memory is bounded
+by the tile budget rather than the image size. Binary PPM and ``.npy`` files
+are mapped directly without decoding, and uncompressed 24-bit BMP is decoded
+strip by strip. Compressed formats (JPEG, PNG, TIFF) can only be decoded as a
+whole by OpenCV, so they are decoded once and immediately spilled to disk.
+"""
+import os
+import struct
+import tempfile
+from typing import BinaryIO, Callable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .blurengine import box_blur, box_widths, effective_sigma
+from .fileio import atomic_output
+from .filters import Chain, apply_chain
+from .geometry import QUARTER_TURNS, is_rotation, normalize_chain, rotate
+from .tiling import (CANNY_HALO, DEFAULT_TILE_BYTES, canny_masks, chain_halo,
+                     hysteresis_strips, iter_strips, rows_per_strip)
+
+# Called with a short label and a completion fraction between 0 and 1
+ProgressCallback = Callable[[str, float], None]
+
+LARGE_IMAGE_EXTENSIONS = (".ppm", ".pnm", ".npy", ".bmp", ".jpg", ".jpeg", ".png", ".tif", ".tiff")
+
+
+def _report(progress: Optional[ProgressCallback], label: str, done: int, total: int) -> None:
+    """Forward progress to the callback, if any."""
+    if progress is not None:
+        progress(label, done / total if total else 1.0)
+
+
+def create_memmap(shape: Tuple[int, ...], workdir: Optional[str] = None) -> np.memmap:
+    """Create a zero-filled uint8 memmap backed by an anonymous temporary file.
+
+    The file is unlinked as soon as it is created, so its disk space is
+    released automatically once the memmap is garbage collected.
+    """
+    handle = tempfile.TemporaryFile(dir=workdir)
+    return np.memmap(handle, dtype=np.uint8, mode="w+", shape=shape)
+
+
+def make_preview(pixels: np.ndarray, max_size: Tuple[int, int] = (600, 600)) -> np.ndarray:
+    """Build a small in-memory preview by strided sampling followed by INTER_AREA."""
+    h, w = pixels.shape[:2]
+    max_w, max_h = max_size
+    # Sample at most about twice the preview resolution from disk
+    step = max(1, int(min(h / (2 * max_h), w / (2 * max_w))))
+    sample = np.ascontiguousarray(pixels[::step, ::step])
+    sh, sw = sample.shape[:2]
+    ratio = min(max_w / sw, max_h / sh, 1.0)
+    if ratio < 1.0:
+        size = (max(1, int(sw * ratio)), max(1, int(sh * ratio)))
+        sample = cv2.resize(sample, size, interpolation=cv2.INTER_AREA)
+    return sample
+
+
+class LargeImage:
+    """A disk-backed RGB image together with a small in-memory preview."""
+
+    def __init__(self, pixels: np.ndarray, path: str):
+        """Wrap pixels (usually a memmap) that were loaded from path."""
+        self.pixels = pixels
+        self.path = path
+        self.preview = make_preview(pixels)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.pixels.shape
+
+    @property
+    def preview_scale(self) -> Tuple[float, float]:
+        """Factors mapping preview coordinates (x, y) to full-resolution ones."""
+        return (self.pixels.shape[1] / self.preview.shape[1], self.pixels.shape[0] / self.preview.shape[0])
+
+
+def _read_pnm_header(f: BinaryIO) -> Tuple[bytes, int, int, int, int]:
+    """Parse a binary PNM header; return (magic, width, height, maxval, data offset)."""
+    tokens: List[bytes] = []
+    token = b""
+    while len(tokens) < 4:
+        c = f.read(1)
+        if not c:
+            raise ValueError("Truncated PNM header")
+        if c == b"#" and not token:
+            f.readline()
+        elif c.isspace():
+            if token:
+                tokens.append(token)
+                token = b""
+        else:
+            token += c
+    magic, width, height, maxval = tokens[0], int(tokens[1]), int(tokens[2]), int(tokens[3])
+    return magic, width, height, maxval, f.tell()
+
+
+def _read_bmp_header(f: BinaryIO) -> Optional[Tuple[int, int, bool, int]]:
+    """Return (width, height, bottom_up, data offset) for uncompressed 24-bit BMP, else None."""
+    data = f.read(54)
+    if len(data) < 54 or data[:2] != b"BM":
+        return None
+    offset = struct.unpack_from("<I", data, 10)[0]
+    width, height = struct.unpack_from("<ii", data, 18)
+    bpp = struct.unpack_from("<H", data, 28)[0]
+    compression = struct.unpack_from("<I", data, 30)[0]
+    if bpp != 24 or compression != 0:
+        return None
+    return width, abs(height), height > 0, offset
+
+
+def open_large(
+    path: str,
+    workdir: Optional[str] = None,
+    tile_bytes: int = DEFAULT_TILE_BYTES,
+    progress: Optional[ProgressCallback] = None,
+) -> LargeImage:
+    """Open an image as a disk-backed RGB memmap without holding it in RAM."""
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".npy":
+        pixels = np.load(path, mmap_mode="r")
+        if pixels.dtype != np.uint8 or pixels.ndim != 3 or pixels.shape[2] != 3:
+            raise ValueError("Large .npy images must be uint8 arrays of shape (height, width, 3)")
+        _report(progress, "Opening", 1, 1)
+        return LargeImage(pixels, path)
+
+    if ext in (".ppm", ".pnm"):
+        with open(path, "rb") as f:
+            magic, width, height, maxval, offset = _read_pnm_header(f)
+        if maxval > 255 or magic not in (b"P5", b"P6"):
+            raise ValueError("Only 8-bit binary PPM (P6) and PGM (P5) files are supported")
+        if magic == b"P6":
+            # RGB rows on disk already match the in-memory layout
+            pixels = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(height, width, 3))
+            _report(progress, "Opening", 1, 1)
+            return LargeImage(pixels, path)
+        gray = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(height, width))
+        pixels = create_memmap((height, width, 3), workdir)
+        rows = rows_per_strip(width * 4, 0, tile_bytes)
+        for strip in iter_strips(height, rows):
+            pixels[strip.start:strip.stop] = cv2.cvtColor(np.asarray(gray[strip.start:strip.stop]), cv2.COLOR_GRAY2RGB)
+            _report(progress, "Opening", strip.stop, height)
+        return LargeImage(pixels, path)
+
+    if ext == ".bmp":
+        with open(path, "rb") as f:
+            header = _read_bmp_header(f)
+        if header is not None:
+            width, height, bottom_up, offset = header
+            stride = (width * 3 + 3) & ~3
+            raw = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(height, stride))
+            pixels = create_memmap((height, width, 3), workdir)
+            rows = rows_per_strip(stride * 2, 0, tile_bytes)
+            for strip in iter_strips(height, rows):
+                if bottom_up:
+                    block = raw[height - strip.stop:height - strip.start][::-1]
+                else:
+                    block = raw[strip.start:strip.stop]
+                block = np.ascontiguousarray(block[:, :width * 3]).reshape(-1, width, 3)
+                pixels[strip.start:strip.stop] = cv2.cvtColor(block, cv2.COLOR_BGR2RGB)
+                _report(progress, "Opening", strip.stop, height)
+            return LargeImage(pixels, path)
+
+    # Compressed formats: decode once, then spill to disk strip by strip
+    _report(progress, "Decoding", 0, 1)
+    decoded = cv2.imread(path)
+    if decoded is None:
+        raise IOError(f"Unable to decode image: {path}")
+    height, width = decoded.shape[:2]
+    pixels = create_memmap((height, width, 3), workdir)
+    rows = rows_per_strip(width * 6, 0, tile_bytes)
+    for strip in iter_strips(height, rows):
+        pixels[strip.start:strip.stop] = cv2.cvtColor(decoded[strip.start:strip.stop], cv2.COLOR_BGR2RGB)
+        _report(progress, "Opening", strip.stop, height)
+    del decoded
+    return LargeImage(pixels, path)
+
+
+def _map_strips(
+    src: np.ndarray, chain: Chain, halo: int, workdir: Optional[str], tile_bytes: int,
+    progress: Optional[ProgressCallback], label: str,
+) -> np.memmap:
+    """Apply a chain of strip-able operations strip by strip."""
+    return _filter_strips(src, lambda block: apply_chain(block, chain), halo, workdir, tile_bytes, progress, label)
+
+
+def _filter_strips(
+    src: np.ndarray, func: Callable[[np.ndarray], np.ndarray], halo: int, workdir: Optional[str],
+    tile_bytes: int, progress: Optional[ProgressCallback], label: str,
+) -> np.memmap:
+    """Apply a neighborhood filter needing halo rows of context strip by strip."""
+    h, w = src.shape[:2]
+    out = create_memmap((h, w, 3), workdir)
+    rows = rows_per_strip(w * 3, halo, tile_bytes)
+    for strip in iter_strips(h, rows, halo):
+        block = func(np.asarray(src[strip.read_start:strip.read_stop]))
+        out[strip.start:strip.stop] = block[strip.offset:strip.offset + strip.stop - strip.start]
+        _report(progress, label, strip.stop, h)
+    return out
+
+
+def _blur_strips(
+    src: np.ndarray, ksize: int, sigma: float, workdir: Optional[str], tile_bytes: int,
+    progress: Optional[ProgressCallback], label: str,
+) -> np.memmap:
+    """Blur with box passes strip by strip, for kernels too large for a direct Gaussian.
+
+    In memory such kernels use the pyramid strategy, which resamples the
+    whole image; box blurs are strip-able and equally cheap per pixel.
+    """
+    sigma = effective_sigma(ksize, sigma)
+    halo = sum(width // 2 for width in box_widths(sigma))
+    return _filter_strips(src, lambda block: box_blur(block, sigma), halo, workdir, tile_bytes, progress, label)
+
+
+def _edge_strips(
+    src: np.ndarray, low: float, high: float, workdir: Optional[str], tile_bytes: int,
+    progress: Optional[ProgressCallback], label: str,
+) -> np.memmap:
+    """Canny edge detection with strip-local masks and strip-wise hysteresis."""
+    h, w = src.shape[:2]
+    candidates = create_memmap((h, w), workdir)
+    seeds = create_memmap((h, w), workdir)
+    rows = rows_per_strip(w * 3, CANNY_HALO, tile_bytes)
+    for strip in iter_strips(h, rows, CANNY_HALO):
+        c, s = canny_masks(np.asarray(src[strip.read_start:strip.read_stop]), low, high)
+        inner = slice(strip.offset, strip.offset + strip.stop - strip.start)
+        candidates[strip.start:strip.stop] = c[inner]
+        seeds[strip.start:strip.stop] = s[inner]
+        _report(progress, label, strip.stop, 2 * h)
+
+    # Connected component labels take 4 bytes per pixel on top of the masks
+    edges = create_memmap((h, w), workdir)
+    hysteresis_strips(candidates, seeds, edges, rows_per_strip(w * 8, 1, tile_bytes))
+    del candidates, seeds
+
+    out = create_memmap((h, w, 3), workdir)
+    for strip in iter_strips(h, rows_per_strip(w * 4, 0, tile_bytes)):
+        out[strip.start:strip.stop] = cv2.cvtColor(np.asarray(edges[strip.start:strip.stop]), cv2.COLOR_GRAY2RGB)
+        _report(progress, label, h + strip.stop, 2 * h)
+    return out
+
+
+def _rotate_strips(
+    src: np.ndarray, turns: int, workdir: Optional[str], tile_bytes: int,
+    progress: Optional[ProgressCallback], label: str,
+) -> np.ndarray:
+    """Rotate by turns counter-clockwise quarter turns, turning column strips of the source into row strips."""
+    turns %= 4
+    if turns == 0:
+        return src
+    h, w = src.shape[:2]
+    if turns == 2:
+        # A half turn keeps rows as rows, in reverse order
+        out = create_memmap((h, w, 3), workdir)
+        for strip in iter_strips(h, rows_per_strip(w * 3, 0, tile_bytes)):
+            out[h - strip.stop:h - strip.start] = rotate(np.asarray(src[strip.start:strip.stop]), 2)
+            _report(progress, label, strip.stop, h)
+        return out
+    out = create_memmap((w, h, 3), workdir)
+    cols = rows_per_strip(h * 3, 0, tile_bytes)
+    for a in range(0, w, cols):
+        b = min(w, a + cols)
+        block = np.ascontiguousarray(src[:, a:b])
+        if turns == 3:
+            out[a:b] = rotate(block, 3)
+        else:
+            out[w - b:w - a] = rotate(block, 1)
+        _report(progress, label, b, w)
+    return out
+
+
+def _resize_strips(
+    src: np.ndarray, scale: float, workdir: Optional[str], tile_bytes: int,
+    progress: Optional[ProgressCallback], label: str,
+) -> np.memmap:
+    """Bilinear resize computed per output strip with an equivalent affine warp."""
+    if not 0.1 <= scale <= 3.0:
+        raise ValueError("Scale must be between 0.1 and 3.0")
+    h, w = src.shape[:2]
+    new_w, new_h = max(1, int(w * scale)), max(1, int(h * scale))
+    sx, sy = w / new_w, h / new_h
+    out = create_memmap((new_h, new_w, 3), workdir)
+    rows = max(1, int(tile_bytes // (new_w * 3 + w * 3 * sy)))
+    flags = cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP
+    for strip in iter_strips(new_h, rows):
+        # Source rows touched by bilinear sampling of this output strip
+        lo = max(0, int(np.floor((strip.start + 0.5) * sy - 0.5)) - 1)
+        hi = min(h, int(np.floor((strip.stop - 0.5) * sy - 0.5)) + 3)
+        matrix = np.array([
+            [sx, 0.0, 0.5 * sx - 0.5],
+            [0.0, sy, (strip.start + 0.5) * sy - 0.5 - lo],
+        ])
+        out[strip.start:strip.stop] = cv2.warpAffine(
+            np.asarray(src[lo:hi]), matrix, (new_w, strip.stop - strip.start),
+            flags=flags, borderMode=cv2.BORDER_REPLICATE,
+        )
+        _report(progress, label, strip.stop, new_h)
+    return out
+
+
+def process_large(
+    src: np.ndarray,
+    chain: Chain,
+    workdir: Optional[str] = None,
+    tile_bytes: int = DEFAULT_TILE_BYTES,
+    progress: Optional[ProgressCallback] = None,
+) -> np.ndarray:
+    """Run an operation chain out of core, returning a disk-backed result."""
+    chain = normalize_chain(chain)
+    image = src
+    i = 0
+    stage = 0
+    while i < len(chain):
+        # Group consecutive strip-able operations into one streaming pass
+        j = i
+        while j < len(chain) and chain_halo(chain[i:j + 1]) is not None:
+            j += 1
+        stage += 1
+        label = f"Processing step {stage}"
+        if j > i:
+            image = _map_strips(image, chain[i:j], chain_halo(chain[i:j]), workdir, tile_bytes, progress, label)
+            i = j
+            continue
+
+        name, params = chain[i]
+        if is_rotation(name):
+            # Merged rotations are left adjacent by normalize_chain; turn them in one pass
+            turns = 0
+            while i < len(chain) and is_rotation(chain[i][0]):
+                turns += QUARTER_TURNS[chain[i][0]]
+                i += 1
+            image = _rotate_strips(image, turns, workdir, tile_bytes, progress, label)
+            continue
+        if name == "edge":
+            low, high = (tuple(params) + (100, 200)[len(params):])[:2]
+            image = _edge_strips(image, low, high, workdir, tile_bytes, progress, label)
+        elif name == "blur":
+            ksize, sigma = (tuple(params) + (15, 0)[len(params):])[:2]
+            image = _blur_strips(image, int(ksize), sigma, workdir, tile_bytes, progress, label)
+        elif name == "resize":
+            image = _resize_strips(image, params[0] if params else 1.0, workdir, tile_bytes, progress, label)
+        else:
+            raise ValueError(f"Operation not supported for large images: {name}")
+        i += 1
+    return image
+
+
+def save_large(
+    pixels: np.ndarray,
+    path: str,
+    params: Sequence[int] = (),
+    tile_bytes: int = DEFAULT_TILE_BYTES,
+    progress: Optional[ProgressCallback] = None,
+) -> None:
+    """Write an RGB image strip by strip, atomically.
+
+    PPM, BMP and ``.npy`` output is streamed directly. Other formats are
+    converted to BGR in a disk-backed buffer and handed to ``cv2.imwrite``.
+    """
+    h, w = pixels.shape[:2]
+    ext = os.path.splitext(path)[1].lower()
+    rows = rows_per_strip(w * 6, 0, tile_bytes)
+
+    with atomic_output(path) as tmp_path:
+        if ext == ".npy":
+            out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8, shape=(h, w, 3))
+            for strip in iter_strips(h, rows):
+                out[strip.start:strip.stop] = pixels[strip.start:strip.stop]
+                _report(progress, "Saving", strip.stop, h)
+            out.flush()
+            del out
+        elif ext in (".ppm", ".pnm"):
+            with open(tmp_path, "wb") as f:
+                f.write(b"P6\n%d %d\n255\n" % (w, h))
+                for strip in iter_strips(h, rows):
+                    f.write(np.ascontiguousarray(pixels[strip.start:strip.stop]).tobytes())
+                    _report(progress, "Saving", strip.stop, h)
+        elif ext == ".bmp":
+            stride = (w * 3 + 3) & ~3
+            image_size = stride * h
+            file_size = 54 + image_size
+            with open(tmp_path, "wb") as f:
+                # Size fields overflow beyond 4 GB; readers then rely on the dimensions
+                f.write(struct.pack("<2sIHHI", b"BM", file_size if file_size < 2 ** 32 else 0, 0, 0, 54))
+                f.write(struct.pack("<IiiHHIIiiII", 40, w, h, 1, 24, 0,
+                                    image_size if image_size < 2 ** 32 else 0, 2835, 2835, 0, 0))
+                # Bottom-up row order: write strips from the last one upwards
+                padded = np.zeros((rows, stride), dtype=np.uint8)
+                for strip in reversed(list(iter_strips(h, rows))):
+                    count = strip.stop - strip.start
+                    block = cv2.cvtColor(np.ascontiguousarray(pixels[strip.start:strip.stop]), cv2.COLOR_RGB2BGR)
+                    padded[:count, :w * 3] = block[::-1].reshape(count, w * 3)
+                    f.write(padded[:count].tobytes())
+                    _report(progress, "Saving", h - strip.start, h)
+        else:
+            bgr = create_memmap((h, w, 3))
+            for strip in iter_strips(h, rows):
+                bgr[strip.start:strip.stop] = cv2.cvtColor(
+                    np.ascontiguousarray(pixels[strip.start:strip.stop]), cv2.COLOR_RGB2BGR
+                )
+                _report(progress, "Preparing", strip.stop, h)
+            _report(progress, "Encoding", 0, 1)
+            if not cv2.imwrite(tmp_path, bgr, list(params)):
+                raise IOError(f"Failed to write image file: {path}")
+            _report(progress, "Encoding", 1, 1)
@@ -0,0 +1,102 @@
+"""Least recently used store of arrays within a byte budget.
+
+The decoded image cache and the result cache both keep arrays by key and
+evict the least recently used ones once their pixels exceed a budget; this
+is that shared part. Sizes are tracked as entries come and go, so checking
+the budget costs nothing per entry.
+"""
+import threading
+from collections import OrderedDict
+from typing import Generic, Hashable, List, Optional, TypeVar
+
+import numpy as np
+
+K = TypeVar("K", bound=Hashable)
+
+
+class ArrayLRU(Generic[K]):
+    """Arrays by key, evicting the least recently used beyond budget_bytes; thread-safe."""
+
+    def __init__(self, budget_bytes: int):
+        """Create an empty store holding at most budget_bytes of pixels."""
+        if budget_bytes < 0:
+            raise ValueError("Cache budget must not be negative")
+        self.budget_bytes = budget_bytes
+        self.evicted = 0
+        self._arrays: "OrderedDict[K, np.ndarray]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+    def __contains__(self, key: K) -> bool:
+        with self._lock:
+            return key in self._arrays
+
+    @property
+    def memory_usage(self) -> int:
+        """Bytes of pixels currently held."""
+        return self._nbytes
+
+    def keys(self) -> List[K]:
+        """The keys, least recently used first."""
+        with self._lock:
+            return list(self._arrays)
+
+    def arrays(self) -> List[np.ndarray]:
+        """The arrays, least recently used first."""
+        with self._lock:
+            return list(self._arrays.values())
+
+    def get(self, key: K) -> Optional[np.ndarray]:
+        """Return the array held under key, or None, marking it the most recently used."""
+        with self._lock:
+            array = self._arrays.get(key)
+            if array is not None:
+                self._arrays.move_to_end(key)
+            return array
+
+    def put(self, key: K, array: np.ndarray) -> None:
+        """Hold array under key, evicting others to fit; arrays larger than the budget are not held."""
+        with self._lock:
+            self._discard(key)
+            if array.nbytes > self.budget_bytes:
+                return
+            self._arrays[key] = array
+            self._nbytes += array.nbytes
+            self._evict()
+
+    def pop(self, key: K) -> Optional[np.ndarray]:
+        """Remove and return the array held under key, or None."""
+        with self._lock:
+            return self._discard(key)
+
+    def set_budget(self, budget_bytes: int) -> None:
+        """Change the budget, evicting the least recently used arrays."""
+        if budget_bytes < 0:
+            raise ValueError("Cache budget must not be negative")
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        """Drop every array and reset the eviction count."""
+        with self._lock:
+            self._arrays.clear()
+            self._nbytes = 0
+            self.evicted = 0
+
+    def _discard(self, key: K) -> Optional[np.ndarray]:
+        """Remove key if present; call with the lock held."""
+        array = self._arrays.pop(key, None)
+        if array is not None:
+            self._nbytes -= array.nbytes
+        return array
+
+    def _evict(self) -> None:
+        """Drop least recently used arrays until the budget is met; call with the lock held."""
+        while self._nbytes > self.budget_bytes and self._arrays:
+            _, array = self._arrays.popitem(last=False)
+            self._nbytes -= array.nbytes
+            self.evicted += 1
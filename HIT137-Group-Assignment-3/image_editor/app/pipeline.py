@@ -0,0 +1,265 @@
+"""Non-destructive, lazily evaluated operation pipeline.
+
+A ``Pipeline`` records the ordered operations applied to a source image
+instead of baking them into the pixels. Results are computed only when
+requested, and the output of each stage is cached so that editing a late
+step, or replacing the source, recomputes only what changed. Runs of
+consecutive point operations are fused by the color engine and cached as a
+single stage.
+
+Stages are cached in a canonical orientation: rotations are not applied to
+the pixels, but counted and deferred past the operations that commute with
+them (see ``geometry``). A rotation step therefore caches the same array
+as the stage before it, and ``orientation()`` gives the quarter turns still
+to apply when a stage is shown or saved. Only an operation that does not
+commute with rotation, such as edge detection, rotates the pixels first.
+
+With a ``MemoCache``, every computed stage is also cached under a key
+derived from the source's content and the steps leading to it, so stages
+that were computed before, by this or any other pipeline, are reused.
+
+A pipeline is not thread-safe. To evaluate it off the Tk thread, evaluate a
+``copy()`` on the worker and ``adopt()`` the copy's cached stages afterwards.
+"""
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .colorengine import is_point_operation
+from .filters import Chain, apply_chain, proxy_chain, validate_image
+from .geometry import commutes_with_rotation, is_rotation, pending_turns, rotate
+from .memo import MemoCache, chain_key, content_key
+
+if TYPE_CHECKING:
+    from .parallel import TiledExecutor
+
+
+class Step(NamedTuple):
+    """A single recorded operation and its parameters."""
+    name: str
+    params: Tuple[float, ...] = ()
+
+
+class Pipeline:
+    """Ordered list of operations applied lazily to a source image."""
+
+    def __init__(
+        self,
+        source: Optional[np.ndarray] = None,
+        max_cached: int = 8,
+        executor: Optional["TiledExecutor"] = None,
+        memo: Optional[MemoCache] = None,
+    ):
+        """Create a pipeline; at most max_cached intermediate stages are kept.
+
+        When an executor is given, stages run on its thread pool in strips.
+        When a memo cache is given, computed stages are shared through it.
+        """
+        if max_cached < 1:
+            raise ValueError("max_cached must be at least 1")
+        self.max_cached = max_cached
+        self.executor = executor
+        self.memo = memo
+        self._steps: List[Step] = []
+        # Maps k to the output of the first k steps; stage 0 is the source
+        self._cache: Dict[int, np.ndarray] = {}
+        self._source: Optional[np.ndarray] = None
+        # Content digest of the source, computed when the memo cache first needs it
+        self._source_key: Optional[str] = None
+        self.proxy_factor = 1.0
+        if source is not None:
+            self.set_source(source)
+
+    @property
+    def source(self) -> Optional[np.ndarray]:
+        """The image the steps are applied to."""
+        return self._source
+
+    @property
+    def steps(self) -> Tuple[Step, ...]:
+        """The recorded steps, oldest first."""
+        return tuple(self._steps)
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def chain(self) -> Chain:
+        """Return the steps as an operation chain usable by filters.apply_chain."""
+        return [(step.name, step.params) for step in self._steps]
+
+    def set_source(self, source: np.ndarray, proxy_factor: float = 1.0) -> None:
+        """Replace the source image, keeping the recorded steps.
+
+        proxy_factor is the size of source relative to the full-resolution
+        image the recorded parameters refer to; scale-dependent parameters
+        are adjusted by it when computing results.
+        """
+        validate_image(source)
+        if proxy_factor <= 0:
+            raise ValueError("proxy_factor must be positive")
+        self._source = source
+        self._source_key = None
+        self.proxy_factor = proxy_factor
+        self._cache = {0: source}
+
+    def append(self, name: str, params: Sequence[float] = ()) -> None:
+        """Record a new step at the end of the pipeline."""
+        self._steps.append(Step(name, tuple(params)))
+
+    def replace(self, index: int, name: str, params: Sequence[float] = ()) -> None:
+        """Replace the step at index, invalidating only later stages."""
+        self._steps[index] = Step(name, tuple(params))
+        self._invalidate(index % len(self._steps) + 1)
+
+    def remove(self, index: int) -> Step:
+        """Remove and return the step at index, invalidating later stages."""
+        index %= len(self._steps)
+        step = self._steps.pop(index)
+        self._invalidate(index + 1)
+        return step
+
+    def pop(self) -> Step:
+        """Remove and return the last step."""
+        return self.remove(len(self._steps) - 1)
+
+    def stage_of(self, image: np.ndarray) -> Optional[int]:
+        """Return k if image is the cached output of the first k steps, else None."""
+        for k, cached in self._cache.items():
+            if cached is image:
+                return k
+        return None
+
+    def stages(self) -> List[np.ndarray]:
+        """The cached stage arrays, starting with the source."""
+        return [self._cache[k] for k in sorted(self._cache)]
+
+    def set_result(self, image: np.ndarray) -> None:
+        """Cache image as the output of all current steps, e.g. after an undo."""
+        validate_image(image)
+        if self._steps:
+            self._store(len(self._steps), image)
+
+    def clear(self) -> None:
+        """Remove all steps and the source image."""
+        self._steps = []
+        self._cache = {}
+        self._source = None
+        self._source_key = None
+        self.proxy_factor = 1.0
+
+    def copy(self) -> "Pipeline":
+        """Return an independent pipeline sharing the source and cached arrays."""
+        other = Pipeline(max_cached=self.max_cached, executor=self.executor, memo=self.memo)
+        other._source = self._source
+        other._source_key = self._source_key
+        other.proxy_factor = self.proxy_factor
+        other._steps = list(self._steps)
+        other._cache = dict(self._cache)
+        return other
+
+    def adopt(self, other: "Pipeline") -> None:
+        """Take over stages cached by a copy wherever it still matches this pipeline."""
+        if other._source is not self._source:
+            return
+        if self._source_key is None:
+            self._source_key = other._source_key
+        common = 0
+        while common < min(len(self._steps), len(other._steps)) and self._steps[common] == other._steps[common]:
+            common += 1
+        for k in sorted(other._cache):
+            if k <= common and k not in self._cache:
+                self._store(k, other._cache[k])
+
+    def _invalidate(self, first_stage: int) -> None:
+        """Drop cached stages from first_stage onwards."""
+        self._cache = {k: v for k, v in self._cache.items() if k < first_stage}
+
+    def _store(self, stage: int, image: np.ndarray) -> None:
+        """Cache a stage, evicting the oldest intermediates beyond max_cached."""
+        self._cache[stage] = image
+        intermediates = sorted(k for k in self._cache if k != 0)
+        while len(intermediates) > self.max_cached:
+            del self._cache[intermediates.pop(0)]
+
+    def stage_key(self, upto: Optional[int] = None) -> str:
+        """Memo cache key of the result of the first upto steps (default: all)."""
+        upto = len(self._steps) if upto is None else upto
+        return self._stage_key(proxy_chain(self.chain(), self.proxy_factor), upto)
+
+    def _stage_key(self, chain: Chain, stage: int) -> str:
+        """Key of the output of the first stage steps of chain, already proxy-scaled."""
+        if self._source_key is None:
+            self._source_key = content_key(self._source)
+        return chain_key(self._source_key, chain[:stage])
+
+    def orientation(self, upto: Optional[int] = None) -> int:
+        """Counter-clockwise quarter turns to apply to result(upto) to orient it."""
+        return pending_turns(proxy_chain(self.chain(), self.proxy_factor)[:upto])
+
+    def result(
+        self,
+        upto: Optional[int] = None,
+        on_stage: Optional[Callable[[int, int], None]] = None,
+    ) -> np.ndarray:
+        """Return the output of the first upto steps (all steps by default).
+
+        The output is in the canonical orientation; rotate it by
+        orientation(upto) to get the image the steps describe. on_stage(k,
+        upto) is called before computing each uncached stage; it may raise to
+        abandon the evaluation, keeping the stages already done.
+        """
+        if self._source is None:
+            raise ValueError("Pipeline has no source image")
+        upto = len(self._steps) if upto is None else upto
+        if not 0 <= upto <= len(self._steps):
+            raise IndexError("Stage out of range")
+
+        k = max(k for k in self._cache if k <= upto)
+        image = self._cache[k]
+        # Whether a step commutes with rotation can depend on its scaled parameters
+        chain = proxy_chain(self.chain(), self.proxy_factor)
+        while k < upto:
+            name = chain[k][0]
+            if is_rotation(name):
+                # Deferred: the stage keeps the previous pixels
+                k += 1
+                self._store(k, image)
+                continue
+            end = k + 1
+            if is_point_operation(name):
+                # Point operations commute with rotations, so fuse across them
+                while end < upto and (is_point_operation(chain[end][0]) or is_rotation(chain[end][0])):
+                    end += 1
+                while is_rotation(chain[end - 1][0]):
+                    end -= 1
+            if on_stage is not None:
+                on_stage(k, upto)
+            key = cached = None
+            if self.memo is not None:
+                key = self._stage_key(chain, end)
+                cached = self.memo.get(key)
+            if cached is not None:
+                image = cached
+            else:
+                if not commutes_with_rotation(*chain[k]):
+                    image = rotate(image, pending_turns(chain[:k]))
+                image = self._run(image, [step for step in chain[k:end] if not is_rotation(step[0])])
+                if key is not None:
+                    self.memo.put(key, image)
+            self._store(end, image)
+            k = end
+        return image
+
+    def render(self, source: np.ndarray) -> np.ndarray:
+        """Apply all steps, with their recorded parameters, to a full-resolution source.
+
+        Unlike result(), the output is oriented, with the net rotation applied
+        once at the end. The cache is not touched.
+        """
+        return self._run(source, self.chain())
+
+    def _run(self, image: np.ndarray, chain: Chain) -> np.ndarray:
+        """Apply chain, on the executor if there is one."""
+        if self.executor is not None:
+            return self.executor.run_chain(image, chain)
+        return apply_chain(image, chain)
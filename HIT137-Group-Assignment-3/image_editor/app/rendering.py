@@ -0,0 +1,89 @@
+"""Canvas rendering helpers: coalesced redraws and reusable Tk images."""
+import tkinter as tk
+from typing import Callable, Dict, Optional, Sequence, Set
+
+import numpy as np
+from PIL import Image, ImageTk
+
+
+class RedrawScheduler:
+    """Coalesce bursts of redraw requests into one after_idle render.
+
+    Each named target (for example a canvas) has a dirty flag. Requests only
+    mark targets dirty; the first request in a burst schedules a single
+    flush that renders every dirty target once.
+    """
+
+    def __init__(
+        self,
+        widget: tk.Misc,
+        renderers: Dict[str, Callable[[], None]],
+        on_flush: Optional[Callable[[], None]] = None,
+    ):
+        """Create a scheduler for the given target renderers."""
+        self.widget = widget
+        self.renderers = renderers
+        self.on_flush = on_flush
+        self.dirty: Set[str] = set()
+        self.requested = 0
+        self.performed = 0
+        self._pending: Optional[str] = None
+
+    def request(self, targets: Sequence[str] = ()) -> None:
+        """Mark targets (all by default) dirty and schedule a flush."""
+        targets = targets or tuple(self.renderers)
+        for target in targets:
+            if target not in self.renderers:
+                raise KeyError(f"Unknown redraw target: {target}")
+        self.requested += len(targets)
+        self.dirty.update(targets)
+        if self._pending is None:
+            self._pending = self.widget.after_idle(self.flush)
+
+    def flush(self) -> None:
+        """Render every dirty target now."""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+        dirty, self.dirty = self.dirty, set()
+        for name, render in self.renderers.items():
+            if name in dirty:
+                render()
+                self.performed += 1
+        if self.on_flush is not None:
+            self.on_flush()
+
+    def cancel(self) -> None:
+        """Drop any pending redraw."""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+        self.dirty.clear()
+
+
+class CanvasImage:
+    """A canvas image item whose PhotoImage is reused between renders."""
+
+    def __init__(self, canvas: tk.Canvas):
+        """Create a hidden image item on canvas."""
+        self.canvas = canvas
+        self.photo: Optional[ImageTk.PhotoImage] = None
+        self.item = canvas.create_image(0, 0, anchor=tk.NW, state=tk.HIDDEN)
+        self.allocations = 0
+
+    def show(self, pixels: np.ndarray, x: int, y: int) -> None:
+        """Display an RGB array with its top-left corner at (x, y)."""
+        pil = Image.fromarray(pixels)
+        if self.photo is not None and (self.photo.width(), self.photo.height()) == pil.size:
+            # Same size: paste the new pixels into the existing Tk image
+            self.photo.paste(pil)
+        else:
+            self.photo = ImageTk.PhotoImage(pil)
+            self.allocations += 1
+            self.canvas.itemconfigure(self.item, image=self.photo)
+        self.canvas.coords(self.item, x, y)
+        self.canvas.itemconfigure(self.item, state=tk.NORMAL)
+
+    def clear(self) -> None:
+        """Hide the image."""
+        self.canvas.itemconfigure(self.item, state=tk.HIDDEN)
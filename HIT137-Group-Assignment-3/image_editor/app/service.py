@@ -0,0 +1,416 @@
+"""Local HTTP service running operation chains for other tools.
+
+``POST /process?chain=grayscale,blur=21&format=png`` with an encoded image
+(any format OpenCV decodes) as the request body returns the processed image
+in the requested format. ``GET /stats`` returns JSON with request counts,
+queue depth and latency percentiles over the most recent requests.
+
+Requests are decoded, filtered with ``filters.apply_chain`` and encoded in
+a fixed pool of worker processes, so only compressed bytes cross process
+boundaries. Every worker warms up (imports OpenCV and runs every operation
+once) as it starts, before it takes any request, and the server accepts
+connections only once all of them have reported in. Workers are then
+reused for every request. At most ``workers + queue_size`` requests are admitted at
+a time; beyond that the service answers 503 with a Retry-After header
+rather than queueing without bound, so clients back off instead of piling
+up latency. If a worker process dies, the pool is started again (warm, as
+above) and the requests it was holding are answered 503 so clients retry.
+The server binds to localhost by default.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, NoReturn, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+from .batch import init_pool_worker
+from .fileio import encode_image
+from .filters import Chain, apply_chain, parse_chain
+
+DEFAULT_PORT = 8137
+
+# Largest accepted request body
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+# Requests whose latencies the percentiles are computed over
+LATENCY_WINDOW = 1000
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "bmp": "image/bmp",
+    "tiff": "image/tiff",
+    "tif": "image/tiff",
+    "webp": "image/webp",
+}
+
+# Run once in every worker so the first real request does not pay for it
+WARM_UP_CHAIN = "grayscale,blur,edge,sepia,brightness=10,invert,rotate_left,rotate_right,resize=0.5"
+
+
+class ServiceBusy(Exception):
+    """Raised when the service already holds as many requests as it admits."""
+
+
+class WorkerCrashed(Exception):
+    """Raised for a request lost because a worker process died; the workers have been restarted."""
+
+
+def process_request(task: Tuple[bytes, Chain, str]) -> Tuple[Optional[bytes], Optional[str]]:
+    """Decode, process and encode one image in a worker; return (encoded bytes, error message)."""
+    data, chain, fmt = task
+    try:
+        pic = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if pic is None:
+            raise ValueError("Unable to decode image")
+        result = apply_chain(cv2.cvtColor(pic, cv2.COLOR_BGR2RGB), chain)
+        return encode_image(result, f"result.{fmt}").tobytes(), None
+    except (ValueError, IOError, TypeError, cv2.error) as e:
+        # Bad images, chains or parameters are the client's error
+        return None, str(e)
+
+
+def _init_worker(warmed: Optional["multiprocessing.Queue[int]"] = None) -> None:
+    """Warm up a pool worker before its first task and report its process id to warmed."""
+    init_pool_worker()
+    apply_chain(np.zeros((32, 32, 3), dtype=np.uint8), parse_chain(WARM_UP_CHAIN))
+    if warmed is not None:
+        warmed.put(os.getpid())
+
+
+def _worker_pid() -> int:
+    """Process id of the worker running this task."""
+    return os.getpid()
+
+
+class LatencyStats:
+    """Request latencies over a sliding window, with percentiles."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        """Keep the latencies of the most recent window requests."""
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        """Record one request's latency."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentiles(self, qs: Sequence[float] = (50, 95, 99)) -> Dict[str, float]:
+        """Latency percentiles in milliseconds, e.g. {"p50": 12.3, ...}; empty before any request."""
+        with self._lock:
+            latencies = np.array(self._latencies)
+        if not len(latencies):
+            return {}
+        values = np.percentile(latencies * 1000, qs)
+        return {f"p{q:g}": round(float(v), 2) for q, v in zip(qs, values)}
+
+
+class ProcessingService:
+    """Runs operation chains on encoded images in a bounded pool of warm worker processes."""
+
+    def __init__(self, workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 timeout: float = 60.0):
+        """Allow workers running and queue_size waiting requests (twice the workers by default)."""
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = 2 * self.workers if queue_size is None else queue_size
+        self.timeout = timeout
+        self.latency = LatencyStats()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.restarts = 0
+        self.worker_pids: List[int] = []
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._restart_lock = threading.Lock()
+        self._started = 0.0
+
+    @property
+    def capacity(self) -> int:
+        """Most requests admitted at once, running or waiting."""
+        return self.workers + self.queue_size
+
+    @property
+    def queue_depth(self) -> int:
+        """Admitted requests waiting for a free worker."""
+        return max(0, self.in_flight - self.workers)
+
+    def start(self) -> None:
+        """Spawn the workers and wait until every one has run each operation once.
+
+        Workers are spawned rather than forked, so they do not inherit the
+        server's threads or locks. worker_pids lists the workers that
+        reported in warm within the timeout.
+        """
+        self._pool, self.worker_pids = self._spawn_pool()
+        self._started = time.perf_counter()
+
+    def _spawn_pool(self) -> Tuple[ProcessPoolExecutor, List[int]]:
+        """Start a pool of warm workers; return it with the sorted pids of those that reported in."""
+        context = multiprocessing.get_context("spawn")
+        warmed = context.Queue()
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(warmed,),
+        )
+        # Submitting one task per worker at once makes the pool start them all
+        for future in [pool.submit(_worker_pid) for _ in range(self.workers)]:
+            future.result()
+        pids: List[int] = []
+        deadline = time.perf_counter() + self.timeout
+        while len(pids) < self.workers:
+            try:
+                pids.append(warmed.get(timeout=max(0.0, deadline - time.perf_counter())))
+            except queue.Empty:
+                break
+        warmed.close()
+        return pool, sorted(pids)
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """Replace a pool left broken by a dead worker, unless another request already has."""
+        with self._restart_lock:
+            if self._pool is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            pool, pids = self._spawn_pool()
+            with self._lock:
+                self._pool = pool
+                self.worker_pids = pids
+                self.restarts += 1
+
+    def submit(self, data: bytes, chain: Chain, fmt: str = "png") -> "Future[Tuple[Optional[bytes], Optional[str]]]":
+        """Queue an image for processing; raise ServiceBusy if the service is full."""
+        if self._pool is None:
+            raise RuntimeError("Service is not started")
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise ServiceBusy()
+            self.in_flight += 1
+        try:
+            future = self._pool.submit(process_request, (data, chain, fmt))
+        except Exception:
+            with self._lock:
+                self.in_flight -= 1
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _: Future) -> None:
+        """Free the admission slot of a finished request."""
+        with self._lock:
+            self.in_flight -= 1
+
+    def process(self, data: bytes, chain: Chain, fmt: str = "png") -> bytes:
+        """Process an image and wait for the result, recording the latency of successes.
+
+        Raises ServiceBusy when full, ValueError for a bad image or chain,
+        TimeoutError when the result takes longer than the timeout and
+        WorkerCrashed when a worker died, after restarting the workers.
+        """
+        start = time.perf_counter()
+        pool = self._pool
+        try:
+            future = self.submit(data, chain, fmt)
+        except BrokenProcessPool:
+            self._crashed(pool)
+        try:
+            result, error = future.result(self.timeout)
+        except BrokenProcessPool:
+            self._crashed(pool)
+        except FutureTimeout:
+            with self._lock:
+                self.failed += 1
+            raise TimeoutError(f"Processing took longer than {self.timeout:g}s")
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            if error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+        if error is not None:
+            raise ValueError(error)
+        self.latency.add(time.perf_counter() - start)
+        return result
+
+    def _crashed(self, pool: Optional[ProcessPoolExecutor]) -> NoReturn:
+        """Count a request lost to a dead worker, restart the workers and raise WorkerCrashed."""
+        with self._lock:
+            self.failed += 1
+        if pool is not None:
+            self._restart(pool)
+        raise WorkerCrashed("A worker stopped unexpectedly and was restarted, retry later")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, queue depth and latency percentiles as a JSON-friendly dict."""
+        with self._lock:
+            stats = {
+                "workers": self.workers,
+                "worker_pids": list(self.worker_pids),
+                "capacity": self.capacity,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+            }
+        stats["latency_ms"] = self.latency.percentiles()
+        stats["uptime_s"] = round(time.perf_counter() - self._started, 1) if self._started else 0.0
+        return stats
+
+    def shutdown(self) -> None:
+        """Stop the workers, abandoning queued requests."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of the ProcessingService attached to the server."""
+
+    server: "ServiceServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        """Serve the stats endpoint."""
+        if urlparse(self.path).path != "/stats":
+            self.send_error_text(404, "Not found")
+            return
+        body = json.dumps(self.server.service.stats(), indent=2).encode("utf-8")
+        self.send_body(200, body, "application/json")
+
+    def do_POST(self) -> None:
+        """Process the image in the request body with the chain in the query string."""
+        url = urlparse(self.path)
+        if url.path != "/process":
+            self.send_error_text(404, "Not found")
+            return
+        query = parse_qs(url.query)
+        fmt = query.get("format", ["png"])[0].lower()
+        if fmt not in CONTENT_TYPES:
+            self.send_error_text(400, f"Unsupported output format: {fmt}")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+            if length < 0:
+                raise ValueError()
+        except ValueError:
+            # The body cannot be skipped without its length, so drop the connection
+            self.close_connection = True
+            self.send_error_text(411, "Content-Length required", {"Connection": "close"})
+            return
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self.send_error_text(413, f"Image larger than {MAX_BODY_BYTES // 1024 ** 2} MB", {"Connection": "close"})
+            return
+        data = self.rfile.read(length)
+
+        try:
+            chain = parse_chain(query.get("chain", [""])[0])
+            result = self.server.service.process(data, chain, fmt)
+        except ServiceBusy:
+            self.send_error_text(503, "Service busy, retry later", {"Retry-After": "1"})
+            return
+        except WorkerCrashed as e:
+            self.send_error_text(503, str(e), {"Retry-After": "1"})
+            return
+        except ValueError as e:
+            self.send_error_text(400, str(e))
+            return
+        except TimeoutError as e:
+            self.send_error_text(504, str(e))
+            return
+        except Exception as e:
+            self.send_error_text(500, f"Error processing image: {str(e)}")
+            return
+        self.send_body(200, result, CONTENT_TYPES[fmt])
+
+    def send_body(self, status: int, body: bytes, content_type: str,
+                  headers: Optional[Dict[str, str]] = None) -> None:
+        """Send a complete response."""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_text(self, status: int, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        """Send a plain-text error response."""
+        self.send_body(status, f"{message}\n".encode("utf-8"), "text/plain; charset=utf-8", headers)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Log requests unless the server is quiet."""
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class ServiceServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the service its handlers use."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: ProcessingService, quiet: bool = False):
+        """Listen on address; the service must already be started."""
+        super().__init__(address, ServiceRequestHandler)
+        self.service = service
+        self.quiet = quiet
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point for the processing service."""
+    parser = argparse.ArgumentParser(description="Serve the editor's operations over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT,
+                        help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--queue", type=int, default=None,
+                        help="Requests allowed to wait for a worker before answering 503 (default: 2 per worker)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before a request fails with 504")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not log every request")
+    args = parser.parse_args(argv)
+
+    service = ProcessingService(args.workers, args.queue, args.timeout)
+    try:
+        service.start()
+        server = ServiceServer((args.host, args.port), service, args.quiet)
+    except OSError as e:
+        service.shutdown()
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 2
+
+    print(f"Serving on http://{args.host}:{server.server_port} with {service.workers} workers "
+          f"(up to {service.capacity} requests admitted)")
+    # Stop cleanly on SIGTERM too; shutdown() blocks, so it cannot run on the serving thread
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
@@ -0,0 +1,126 @@
+"""Fast editor startup: show the window first, load the image libraries behind it.
+
+Importing OpenCV, numpy and Pillow's Tk support takes most of the editor's
+startup time, and none of it is needed to draw an empty window. ``launch``
+shows the window with its File menu and status bar straight away, using only
+tkinter, and imports the heavy modules on a background thread. Once they are
+loaded the full editor replaces the placeholder. An Open chosen in the
+meantime is carried out as soon as the editor is ready.
+
+This module must only import the standard library and tkinter.
+"""
+import importlib
+import threading
+import time
+import tkinter as tk
+from typing import List, Optional, Tuple
+
+# Loaded in this order on the background thread; each is timed separately
+HEAVY_MODULES = ("numpy", "cv2", "PIL.Image", "PIL.ImageTk", f"{__package__}.gui")
+
+# How often the Tk thread checks whether the imports have finished
+IMPORT_POLL_MS = 20
+
+
+class BackgroundImporter(threading.Thread):
+    """Import modules on a daemon thread, timing each one."""
+
+    def __init__(self, modules: Tuple[str, ...] = HEAVY_MODULES):
+        """Prepare to import modules in order."""
+        super().__init__(name="startup-import", daemon=True)
+        self.modules = modules
+        self.timings: List[Tuple[str, float]] = []
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        """Import every module, stopping at the first failure."""
+        try:
+            for name in self.modules:
+                start = time.perf_counter()
+                importlib.import_module(name)
+                self.timings.append((name, time.perf_counter() - start))
+        except BaseException as e:
+            self.error = e
+
+
+class StartupShell:
+    """Placeholder menu bar and status bar shown while the editor loads."""
+
+    def __init__(self, window: tk.Tk):
+        """Draw the placeholder in window."""
+        self.window = window
+        self.open_requested = False
+        self.window.title("Picture Processing App")
+        self.window.geometry("1200x800")
+
+        menubar = tk.Menu(self.window)
+        filemenu = tk.Menu(menubar, tearoff=0)
+        filemenu.add_command(label="Open", command=self.request_open)
+        filemenu.add_separator()
+        filemenu.add_command(label="Exit", command=self.window.quit)
+        menubar.add_cascade(label="File", menu=filemenu)
+        self.window.config(menu=menubar)
+        self.menubar = menubar
+
+        self.status_bar = tk.Label(self.window, text="Loading image libraries...", bd=1,
+                                   relief=tk.SUNKEN, anchor=tk.W)
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=5)
+
+    def request_open(self) -> None:
+        """Remember to show the open dialog once the editor is ready."""
+        self.open_requested = True
+        self.status_bar.config(text="Loading image libraries... the file dialog will open when ready")
+
+    def destroy(self) -> None:
+        """Remove the placeholder widgets."""
+        self.status_bar.destroy()
+        self.menubar.destroy()
+
+
+def format_profile(started: float, first_frame: float, timings: List[Tuple[str, float]],
+                   ready: float) -> str:
+    """Startup timing table; times are perf_counter values except the per-module durations."""
+    lines = ["Startup profile (ms):", f"  {'first frame shown':<22}{(first_frame - started) * 1000:>9.1f}"]
+    for name, seconds in timings:
+        lines.append(f"  {'import ' + name:<22}{seconds * 1000:>9.1f}")
+    lines.append(f"  {'editor ready':<22}{(ready - started) * 1000:>9.1f}")
+    return "\n".join(lines)
+
+
+def launch(window: tk.Tk, started: Optional[float] = None, profile: bool = False) -> None:
+    """Show the placeholder in window now and the editor once its modules are loaded.
+
+    started is the perf_counter value at process start, for the profile.
+    """
+    started = time.perf_counter() if started is None else started
+    shell = StartupShell(window)
+    # Paint the placeholder before the imports compete for the interpreter
+    window.update()
+    first_frame = time.perf_counter()
+
+    importer = BackgroundImporter()
+    importer.start()
+
+    def check() -> None:
+        if importer.is_alive():
+            window.after(IMPORT_POLL_MS, check)
+            return
+        if importer.error is not None:
+            shell.status_bar.config(text=f"Error loading image libraries: {str(importer.error)}")
+            print(f"Fatal error: {str(importer.error)}")
+            return
+
+        try:
+            from .gui import PictureProcessorApp
+            shell.destroy()
+            app = PictureProcessorApp(window)
+        except Exception as e:
+            print(f"Fatal error: {str(e)}")
+            window.destroy()
+            return
+        if profile:
+            print(format_profile(started, first_frame, importer.timings, time.perf_counter()))
+        if shell.open_requested:
+            app.open_picture()
+
+    window.after(IMPORT_POLL_MS, check)
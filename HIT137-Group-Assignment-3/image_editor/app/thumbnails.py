@@ -0,0 +1,156 @@
+"""Persistent on-disk thumbnail cache filled by a process pool.
+
+Thumbnails are content addressed: a file's thumbnail is stored under the
+SHA-1 of its absolute path, size and modification time (and the thumbnail
+size), so a changed file simply gets a new entry and no index has to be
+kept consistent. Looking a thumbnail up costs one ``stat`` of the source
+and one of the cache file, which is what makes revisiting a large folder
+fast. Missing thumbnails are generated in worker processes, using a reduced
+JPEG decode where possible, and written atomically so that a crash never
+leaves a truncated thumbnail behind.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+from .batch import init_pool_worker
+from .decode import read_image, read_reduced
+from .fileio import write_image_atomic
+
+# Longest side of a thumbnail in pixels
+THUMBNAIL_SIZE = 128
+
+THUMBNAIL_QUALITY = 85
+
+
+def default_cache_dir() -> str:
+    """Per-user thumbnail cache directory, honouring XDG_CACHE_HOME."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "picture-processing", "thumbnails")
+
+
+def fit_thumbnail(image: np.ndarray, size: int) -> np.ndarray:
+    """Shrink image so that its longest side is at most size pixels."""
+    h, w = image.shape[:2]
+    ratio = size / max(h, w)
+    if ratio >= 1.0:
+        return image
+    return cv2.resize(image, (max(1, round(w * ratio)), max(1, round(h * ratio))), interpolation=cv2.INTER_AREA)
+
+
+def make_thumbnail(task: Tuple[str, str, int]) -> Tuple[str, Optional[str]]:
+    """Write the thumbnail of one file in a worker; return (path, error message or None)."""
+    src, dst, size = task
+    try:
+        reduced = read_reduced(src, (size, size))
+        pic = reduced[0] if reduced is not None else read_image(src)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        write_image_atomic(dst, fit_thumbnail(pic, size), [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_QUALITY])
+        return src, None
+    except Exception as e:
+        return src, str(e)
+
+
+class ThumbnailCache:
+    """Content-addressed thumbnail files, generated on demand in worker processes."""
+
+    def __init__(self, cache_dir: Optional[str] = None, size: int = THUMBNAIL_SIZE,
+                 workers: Optional[int] = None):
+        """Create a cache in cache_dir (the per-user default if None); no processes start yet."""
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.size = size
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Thumbnails being generated, by absolute source path
+        self._pending: Dict[str, Future] = {}
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """The worker processes, started on first use.
+
+        Workers are spawned rather than forked, because forking a process
+        that runs Tk and other threads is unsafe.
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_pool_worker,
+            )
+        return self._pool
+
+    def key(self, path: str) -> str:
+        """Hex digest identifying the current content of path; raise OSError if it is missing."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        ident = f"{path}\0{st.st_size}\0{st.st_mtime_ns}\0{self.size}"
+        return hashlib.sha1(ident.encode("utf-8", "surrogateescape")).hexdigest()
+
+    def cache_path(self, path: str) -> str:
+        """Location of the thumbnail of path, sharded by the first byte of its key."""
+        digest = self.key(path)
+        return os.path.join(self.cache_dir, digest[:2], digest + ".jpg")
+
+    def lookup(self, path: str) -> Optional[str]:
+        """Return the thumbnail file of path if it has been generated, else None."""
+        try:
+            thumb = self.cache_path(path)
+        except OSError:
+            return None
+        return thumb if os.path.exists(thumb) else None
+
+    def is_pending(self, path: str) -> bool:
+        """True if the thumbnail of path is queued or being generated."""
+        with self._lock:
+            return os.path.abspath(path) in self._pending
+
+    def request(self, paths: Iterable[str]) -> Dict[str, Future]:
+        """Queue generation of the given files' missing thumbnails; return the new futures.
+
+        Each future resolves to (path, error message or None).
+        """
+        futures = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            with self._lock:
+                if path in self._pending:
+                    continue
+            try:
+                thumb = self.cache_path(path)
+            except OSError:
+                continue
+            if os.path.exists(thumb):
+                continue
+            future = self.pool.submit(make_thumbnail, (path, thumb, self.size))
+            with self._lock:
+                futures[path] = self._pending[path] = future
+            future.add_done_callback(lambda _, path=path: self._finished(path))
+        return futures
+
+    def _finished(self, path: str) -> None:
+        """Forget a completed or cancelled request."""
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def cancel_except(self, keep: Set[str]) -> int:
+        """Cancel queued requests for files not in keep; return how many were cancelled.
+
+        Requests already running in a worker are left to finish.
+        """
+        keep = {os.path.abspath(p) for p in keep}
+        with self._lock:
+            futures = [f for p, f in self._pending.items() if p not in keep]
+        return sum(1 for f in futures if f.cancel())
+
+    def shutdown(self) -> None:
+        """Cancel queued requests and stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
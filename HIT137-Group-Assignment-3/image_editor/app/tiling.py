@@ -0,0 +1,126 @@
+"""Strip tiling helpers for processing images piece by piece.
+
+Neighborhood operations need a halo of extra rows around each strip so the
+pixels inside the strip see exactly the same neighbors as in a whole-image
+call. Canny edge detection is split into a local part (gradients and
+non-maximum suppression, which only need a small halo) and a global
+hysteresis step that follows edges across strip boundaries.
+"""
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .blurengine import blur_support
+from .colorengine import is_point_operation
+
+# Default budget for the pixels of one strip, including its halo
+DEFAULT_TILE_BYTES = 32 * 1024 * 1024
+
+# Sobel (1 row) plus non-maximum suppression (1 row), with a safety margin
+CANNY_HALO = 4
+
+
+class Strip(NamedTuple):
+    """Rows [start, stop) of the output, read from rows [read_start, read_stop)."""
+    start: int
+    stop: int
+    read_start: int
+    read_stop: int
+
+    @property
+    def offset(self) -> int:
+        """Index of the first output row inside the rows that were read."""
+        return self.start - self.read_start
+
+
+def rows_per_strip(row_bytes: int, halo: int = 0, tile_bytes: int = DEFAULT_TILE_BYTES) -> int:
+    """Number of output rows per strip that keeps a strip and its halo within tile_bytes."""
+    return max(1, tile_bytes // max(1, row_bytes) - 2 * halo)
+
+
+def iter_strips(height: int, strip_rows: int, halo: int = 0) -> Iterator[Strip]:
+    """Yield horizontal strips covering height rows, each with halo rows of context."""
+    if strip_rows < 1:
+        raise ValueError("strip_rows must be at least 1")
+    for start in range(0, height, strip_rows):
+        stop = min(height, start + strip_rows)
+        yield Strip(start, stop, max(0, start - halo), min(height, stop + halo))
+
+
+def operation_halo(name: str, params: Sequence[float] = ()) -> Optional[int]:
+    """Rows of context an operation needs, or None if it cannot run on strips."""
+    if is_point_operation(name):
+        return 0
+    if name == "brightness":
+        # Exact on strips: OpenCV converts HSV row by row, and strips keep whole rows
+        return 0
+    if name == "blur":
+        return blur_support(int(params[0]) if params else 15, params[1] if len(params) > 1 else 0)
+    return None
+
+
+def chain_halo(chain: Sequence[Tuple[str, Sequence[float]]]) -> Optional[int]:
+    """Total halo for a chain of strip-able operations, or None if any is not."""
+    total = 0
+    for name, params in chain:
+        halo = operation_halo(name, params)
+        if halo is None:
+            return None
+        total += halo
+    return total
+
+
+def canny_masks(image: np.ndarray, low: float, high: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (candidates, seeds) for Canny hysteresis on an RGB image.
+
+    Candidates are the pixels surviving non-maximum suppression above low,
+    seeds those above high; both only depend on a small neighborhood.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return cv2.Canny(gray, low, low), cv2.Canny(gray, high, high)
+
+
+def hysteresis(candidates: np.ndarray, seeds: np.ndarray) -> np.ndarray:
+    """Keep the 8-connected candidate components that contain a seed."""
+    count, labels = cv2.connectedComponents((candidates > 0).astype(np.uint8), connectivity=8)
+    keep = np.zeros(count, dtype=bool)
+    keep[np.unique(labels[seeds > 0])] = True
+    keep[0] = False
+    return np.where(keep[labels], 255, 0).astype(np.uint8)
+
+
+def hysteresis_strips(
+    candidates: np.ndarray,
+    seeds: np.ndarray,
+    out: np.ndarray,
+    strip_rows: int,
+) -> int:
+    """Strip-wise hysteresis with bounded memory; returns the number of sweeps.
+
+    Strips are swept downwards and upwards, each seeded by its own seeds and
+    by the final edges in the rows bordering it, until no edge changes.
+    Edges only ever grow, so the result equals the whole-image hysteresis.
+    """
+    height = candidates.shape[0]
+    strips: List[Strip] = list(iter_strips(height, strip_rows, 1))
+    out[:] = 0
+    sweeps = 0
+    changed = True
+    while changed:
+        changed = False
+        order = strips if sweeps % 2 == 0 else strips[::-1]
+        for strip in order:
+            rows = slice(strip.read_start, strip.read_stop)
+            strip_seeds = np.array(seeds[rows])
+            # Edges already found just outside the strip act as seeds too
+            for border in (strip.read_start, strip.read_stop - 1):
+                if not strip.start <= border < strip.stop:
+                    strip_seeds[border - strip.read_start] |= np.asarray(out[border])
+            edges = hysteresis(np.asarray(candidates[rows]), strip_seeds)
+            inner = edges[strip.offset:strip.offset + strip.stop - strip.start]
+            if np.any(inner != out[strip.start:strip.stop]):
+                out[strip.start:strip.stop] = inner
+                changed = True
+        sweeps += 1
+    return sweeps
@@ -0,0 +1,138 @@
+"""Lightweight timing instrumentation with Chrome trace-event export.
+
+Code is wrapped in ``Tracer.span`` blocks, which record complete ("X")
+events with microsecond timestamps and the thread they ran on. A session's
+events can be exported as Chrome trace-event JSON and opened in
+``chrome://tracing`` or https://ui.perfetto.dev.
+
+GUI handlers decorated with ``traced_handler`` start a new *operation*. The
+exclusive time of every span recorded until the next operation (its
+duration minus that of the spans nested inside it) is added up per
+category, so the editor can show where the latest operation's time went.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from .fileio import atomic_output
+
+
+class Tracer:
+    """Thread-safe recorder of timed spans."""
+
+    def __init__(self, max_events: int = 200_000):
+        """Create a tracer keeping at most max_events events (oldest dropped first)."""
+        self.max_events = max_events
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self.operation: Optional[str] = None
+        self.operation_times: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def _stack(self) -> List[float]:
+        """Child time accumulators of the open spans on the current thread."""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, category: str = "app", **args: Any) -> Iterator[None]:
+        """Time the enclosed block as an event called name."""
+        stack = self._stack()
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            duration = end - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += duration
+            self._record(name, category, start, duration, duration - children, args)
+
+    def _record(self, name: str, category: str, start: float, duration: float, exclusive: float,
+                args: Dict[str, Any]) -> None:
+        """Store one complete event and add its exclusive time to the operation."""
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = {k: str(v) for k, v in args.items()}
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+            if self.operation is not None:
+                self.operation_times[category] = self.operation_times.get(category, 0.0) + exclusive
+
+    def begin_operation(self, name: str) -> None:
+        """Start attributing span times to a new user operation."""
+        with self._lock:
+            self.operation = name
+            self.operation_times = {}
+
+    def operation_summary(self) -> str:
+        """Describe where the latest operation's time went, e.g. "add_blur 52.1 ms (filter 48.0, ...)"."""
+        with self._lock:
+            if self.operation is None or not self.operation_times:
+                return ""
+            times = sorted(self.operation_times.items(), key=lambda item: -item[1])
+            total = sum(t for _, t in times)
+            parts = ", ".join(f"{category} {t * 1000:.1f}" for category, t in times)
+            return f"{self.operation} {total * 1000:.1f} ms ({parts})"
+
+    def clear(self) -> None:
+        """Forget all recorded events."""
+        with self._lock:
+            self._events.clear()
+
+    def trace_events(self) -> List[Dict[str, Any]]:
+        """Return the recorded events, preceded by thread name metadata."""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        pid = os.getpid()
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        return metadata + events
+
+    def export(self, path: str) -> int:
+        """Write the session as Chrome trace-event JSON; return the number of events."""
+        events = self.trace_events()
+        with atomic_output(path) as tmp:
+            with open(tmp, "w") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+def traced_handler(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorate a GUI handler method so that each call starts a traced operation.
+
+    The decorated object must have a ``tracer`` attribute.
+    """
+    @functools.wraps(func)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        self.tracer.begin_operation(func.__name__)
+        with self.tracer.span(func.__name__, "handler"):
+            return func(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,168 @@
+"""Background worker thread for image processing jobs.
+
+Jobs run one at a time on a single worker thread so the Tk main loop stays
+responsive. Submitting a job cancels the jobs with the same key that are
+still queued or running, since the newest request always describes the
+state the user wants. Progress,
+results and errors are passed back through a queue that the main thread
+drains with ``after()``; Tk widgets are never touched from the worker.
+"""
+import queue
+import sys
+import threading
+import tkinter as tk
+import traceback
+from typing import Any, Callable, Optional, Set, Tuple
+
+# progress(fraction, label=None) reports progress from inside a job
+ProgressFunc = Callable[..., None]
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once a newer job has superseded it."""
+
+
+class Job:
+    """A unit of work and the callbacks that receive its outcome."""
+
+    def __init__(
+        self,
+        label: str,
+        func: Callable[["Job", "ProgressFunc"], Any],
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+        key: str = "filter",
+    ):
+        """Create a job; func(job, progress) runs on the worker thread."""
+        self.label = label
+        self.key = key
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Ask the job to stop at its next check()."""
+        self._cancelled.set()
+
+    def check(self) -> None:
+        """Raise JobCancelled if the job was cancelled; call this between stages."""
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+
+class FilterWorker:
+    """Single background thread running jobs submitted from the Tk main thread."""
+
+    def __init__(
+        self,
+        widget: tk.Misc,
+        on_progress: Optional[Callable[[str, float], None]] = None,
+        poll_ms: int = 25,
+    ):
+        """Start the worker thread; results are delivered via widget.after."""
+        self.widget = widget
+        self.on_progress = on_progress
+        self.poll_ms = poll_ms
+        self._jobs: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._events: "queue.Queue[Tuple[str, Job, Any]]" = queue.Queue()
+        self._outstanding: Set[Job] = set()
+        self._poll_job: Optional[str] = None
+        self._thread = threading.Thread(target=self._run, name="filter-worker", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self) -> bool:
+        """True while a submitted job has not delivered its outcome."""
+        return bool(self._outstanding)
+
+    def is_busy(self, key: str) -> bool:
+        """True while a job with key has not delivered its outcome."""
+        return any(job.key == key for job in self._outstanding)
+
+    def submit(
+        self,
+        label: str,
+        func: Callable[[Job, ProgressFunc], Any],
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+        key: str = "filter",
+    ) -> Job:
+        """Queue a job, cancelling the outstanding jobs with the same key."""
+        self.cancel_all(key)
+        job = Job(label, func, on_done, on_error, key)
+        self._outstanding.add(job)
+        self._jobs.put(job)
+        if self._poll_job is None:
+            self._poll_job = self.widget.after(self.poll_ms, self._poll)
+        return job
+
+    def cancel_all(self, key: Optional[str] = None) -> None:
+        """Cancel queued or running jobs (only those with key, if given); their results are discarded."""
+        for job in [j for j in self._outstanding if key is None or j.key == key]:
+            job.cancel()
+            self._outstanding.discard(job)
+
+    def shutdown(self) -> None:
+        """Cancel outstanding jobs and stop the worker thread."""
+        self.cancel_all()
+        self._jobs.put(None)
+
+    def _run(self) -> None:
+        """Worker thread loop."""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            if job.cancelled:
+                continue
+
+            def progress(fraction: float, label: Optional[str] = None, job: Job = job) -> None:
+                job.check()
+                self._events.put(("progress", job, (label or job.label, fraction)))
+
+            try:
+                result = job.func(job, progress)
+                self._events.put(("done", job, result))
+            except JobCancelled:
+                pass
+            except Exception as e:
+                self._events.put(("error", job, e))
+
+    def _poll(self) -> None:
+        """Deliver queued events on the Tk main thread."""
+        self._poll_job = None
+        try:
+            while True:
+                try:
+                    kind, job, value = self._events.get_nowait()
+                except queue.Empty:
+                    break
+                if job.cancelled:
+                    continue
+                if kind == "progress":
+                    if self.on_progress is not None:
+                        self._deliver(job, self.on_progress, *value)
+                elif kind == "done":
+                    self._outstanding.discard(job)
+                    self._deliver(job, job.on_done, value)
+                else:
+                    self._outstanding.discard(job)
+                    if job.on_error is not None:
+                        self._deliver(job, job.on_error, value)
+        finally:
+            if self._outstanding and self._poll_job is None:
+                self._poll_job = self.widget.after(self.poll_ms, self._poll)
+
+    @staticmethod
+    def _deliver(job: Job, callback: Callable[..., None], *args: Any) -> None:
+        """Call a callback of job, reporting its errors so that other jobs are still delivered."""
+        try:
+            callback(*args)
+        except Exception:
+            print(f"Error in callback of {job.label}:", file=sys.stderr)
+            traceback.print_exc()
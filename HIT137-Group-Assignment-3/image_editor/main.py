@@ -1,17 +1,31 @@
+import time
+
+# Taken before anything else is imported, for --startup-profile
+STARTED = time.perf_counter()
+
+import argparse
 import tkinter as tk
+from typing import Optional, Sequence
 
-from app import PictureProcessorApp
+from app.startup import launch
 
 
-def main() -> None:
+def main(argv: Optional[Sequence[str]] = None) -> None:
     """Main function to start the application."""
+    parser = argparse.ArgumentParser(description="Picture processing editor.")
+    parser.add_argument(
+        "--startup-profile", action="store_true",
+        help="Print how long the first frame, each heavy import and the editor took to appear",
+    )
+    args = parser.parse_args(argv)
+
     try:
         root = tk.Tk()
-        app = PictureProcessorApp(root)
+        launch(root, STARTED, args.startup_profile)
         root.mainloop()
     except Exception as e:
         print(f"Fatal error: {str(e)}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,29 @@
+"""Shared fixtures for the image editor tests.
+
+The tests import the ``app`` package from the image_editor directory, so
+that directory is put on the path whatever pytest is run from.
+"""
+import os
+import sys
+from typing import Any, Callable
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def picture() -> np.ndarray:
+    """A small random RGB picture with odd dimensions."""
+    return np.random.default_rng(0).integers(0, 256, (61, 83, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def write_rgb() -> Callable[[Any, np.ndarray], str]:
+    """A function writing an RGB array to an image file and returning its path."""
+    def write(path: Any, image: np.ndarray) -> str:
+        assert cv2.imwrite(str(path), cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+        return str(path)
+    return write
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+import cv2
+import numpy as np
+
+from app.batch import collect_files, main, run_batch
+from app.filters import apply_chain, parse_chain
+
+
+def test_collect_files_keeps_images_only(tmp_path, picture, write_rgb):
+    write_rgb(tmp_path / "b.png", picture)
+    write_rgb(tmp_path / "a.PNG", picture)
+    (tmp_path / "notes.txt").write_text("x")
+    assert [os.path.basename(p) for p in collect_files(str(tmp_path))] == ["a.PNG", "b.png"]
+
+
+def test_run_batch_matches_apply_chain(tmp_path, picture, write_rgb):
+    src, out = tmp_path / "in", tmp_path / "out"
+    src.mkdir()
+    write_rgb(src / "one.png", picture)
+    write_rgb(src / "two.png", picture[::-1].copy())
+    chain = parse_chain("grayscale,blur=5,brightness=-20")
+
+    processed, failed, _ = run_batch(str(src), str(out), chain, workers=2, suffix="_x", verbose=False)
+
+    assert (processed, failed) == (2, 0)
+    result = cv2.cvtColor(cv2.imread(str(out / "one_x.png")), cv2.COLOR_BGR2RGB)
+    assert np.array_equal(result, apply_chain(picture, chain))
+
+
+def test_main_reports_failures(tmp_path, picture, write_rgb):
+    src = tmp_path / "in"
+    src.mkdir()
+    write_rgb(src / "good.png", picture)
+    (src / "bad.png").write_bytes(b"not an image")
+    assert main([str(src), str(tmp_path / "out"), "-c", "invert", "-j", "1", "-q"]) == 1
+    assert main([str(src), str(tmp_path / "out"), "-c", "nonsense"]) == 2
+
+
+def test_batch_does_not_import_the_gui():
+    code = (
+        "import sys, app.batch, app.filters, app.video, app.service\n"
+        "loaded = [m for m in ('tkinter', 'PIL.ImageTk', 'app.gui') if m in sys.modules]\n"
+        "sys.exit(', '.join(loaded) or None)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from app.benchmark import (
+    BenchResult, benchmark_functions, compare, load_baseline, main, run_benchmarks, save_baseline,
+    synthetic_image,
+)
+from app.filters import OPERATIONS
+
+
+def test_synthetic_image_is_deterministic_and_sized():
+    image = synthetic_image(0.12)
+    assert image.dtype == np.uint8 and image.shape[2] == 3
+    assert abs(image.shape[0] * image.shape[1] - 120_000) < 1000
+    assert np.array_equal(image, synthetic_image(0.12))
+
+
+def test_every_operation_is_benchmarked():
+    names = set(benchmark_functions())
+    assert set(OPERATIONS) <= names and "display" in names
+
+
+def test_run_benchmarks_reports_each_result():
+    reported = []
+    results = run_benchmarks([0.01], ["invert", "blur_r50"], repeat=1, report=reported.append)
+    assert [r.key for r in results] == ["invert@0.01MP", "blur_r50@0.01MP"]
+    assert reported == results and all(r.seconds > 0 for r in results)
+    with pytest.raises(ValueError):
+        run_benchmarks([0.01], ["nonsense"])
+
+
+def test_compare_flags_slower_and_hungrier_results(tmp_path):
+    base = [BenchResult("blur", 1, 1.0, 1000), BenchResult("edge", 1, 1.0, 1000)]
+    path = str(tmp_path / "base.json")
+    save_baseline(path, base)
+    baseline = load_baseline(path)
+
+    current = [BenchResult("blur", 1, 1.2, 1200), BenchResult("edge", 1, 1.3, 1300),
+               BenchResult("sepia", 1, 9.0, 9000)]
+    regressions = compare(current, baseline, threshold=0.25)
+    assert len(regressions) == 2 and all(r.startswith("edge@1MP") for r in regressions)
+
+
+def test_main_exits_non_zero_on_regression(tmp_path):
+    path = str(tmp_path / "base.json")
+    save_baseline(path, [BenchResult("invert", 0.01, 1e-9, 1)])
+    assert main(["-s", "0.01", "-o", "invert", "-r", "1", "-b", path]) == 1
+    assert main(["-s", "0", "-o", "invert"]) == 2
@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.blurengine import blur_support, box_widths, choose_strategy, gaussian_blur
+
+
+def psnr(a, b):
+    mse = np.mean((a.astype(np.float64) - b) ** 2)
+    return 10 * np.log10(255 ** 2 / mse)
+
+
+@pytest.fixture(scope="module")
+def smooth():
+    rng = np.random.default_rng(2)
+    return cv2.resize(rng.integers(0, 256, (40, 60, 3), dtype=np.uint8), (600, 400), interpolation=cv2.INTER_CUBIC)
+
+
+def test_choose_strategy_by_radius():
+    assert choose_strategy(15) == "gaussian"
+    assert choose_strategy(25) == "gaussian"
+    assert choose_strategy(27) == "box"
+    assert choose_strategy(101) == "box"
+    assert choose_strategy(103) == "pyramid"
+
+
+def test_small_kernels_match_opencv_exactly(picture):
+    assert np.array_equal(gaussian_blur(picture, 15), cv2.GaussianBlur(picture, (15, 15), 0))
+
+
+@pytest.mark.parametrize("ksize, strategy", [(61, "box"), (201, "pyramid")])
+def test_approximations_stay_close_to_a_gaussian(smooth, ksize, strategy):
+    sigma = 0.3 * ((ksize - 1) * 0.5 - 1) + 0.8
+    exact = cv2.GaussianBlur(smooth, (0, 0), sigma)
+    assert psnr(gaussian_blur(smooth, ksize, strategy=strategy), exact) > 40
+
+
+def test_box_widths_match_the_gaussian_variance():
+    for sigma in (2.0, 7.5, 20.0):
+        widths = box_widths(sigma)
+        assert all(width % 2 == 1 for width in widths)
+        assert sum((width * width - 1) / 12 for width in widths) == pytest.approx(sigma * sigma, rel=0.2)
+
+
+def test_blur_support():
+    assert blur_support(15, 0) == 7
+    assert blur_support(61, 0) == sum(width // 2 for width in box_widths(0.3 * 29 + 0.8))
+    assert blur_support(201, 0) is None
+
+
+def test_unknown_strategy(picture):
+    with pytest.raises(ValueError):
+        gaussian_blur(picture, 61, strategy="fft")
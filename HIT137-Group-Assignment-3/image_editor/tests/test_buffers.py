@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.buffers import MemoryTracker, allocation
+
+
+def test_allocation_follows_views(picture):
+    assert allocation(picture[10:20, 5:9][::2]) is picture
+
+
+def test_shared_memory_is_counted_once(tmp_path, picture):
+    copy = picture.copy()
+    mapped = np.memmap(tmp_path / "m.raw", dtype=np.uint8, mode="w+", shape=picture.shape)
+    tracker = MemoryTracker()
+
+    usage = tracker.measure([
+        ("Original", [picture]),
+        ("Display", [picture]),
+        ("Crop", [picture[:10, :10], None]),
+        ("Result", [copy]),
+        ("Large", [mapped[5:]]),
+    ])
+
+    rows = {row.name: row for row in usage.rows}
+    assert rows["Original"].unique == picture.nbytes
+    assert rows["Display"].referenced == picture.nbytes and rows["Display"].unique == 0
+    assert rows["Crop"].unique == 0
+    assert rows["Result"].unique == copy.nbytes
+    assert rows["Large"].unique == 0
+    assert usage.resident == 2 * picture.nbytes
+    assert usage.mapped == picture.nbytes
+
+
+def test_peak_is_kept_across_measurements(picture):
+    tracker = MemoryTracker()
+    tracker.measure([("a", [picture])])
+    usage = tracker.measure([("a", [picture[:1].copy()])])
+    assert usage.peak == picture.nbytes
+    assert usage.resident == picture[:1].nbytes
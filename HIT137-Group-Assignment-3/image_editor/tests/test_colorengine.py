@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.colorengine import SEPIA_KERNEL, ColorProgram, compile_chain, is_point_operation
+from app.filters import OPERATIONS, adjust_brightness, apply_chain
+
+
+def run(spec, image):
+    return compile_chain(spec).apply(image)
+
+
+def hsv_brightness(image, value):
+    """The editor's original Bright+/Bright- implementation."""
+    h, s, v = cv2.split(cv2.cvtColor(image, cv2.COLOR_RGB2HSV))
+    v = cv2.add(v, value) if value >= 0 else cv2.subtract(v, -value)
+    return cv2.cvtColor(cv2.merge((h, s, v)), cv2.COLOR_HSV2RGB)
+
+
+def test_single_operations_match_their_definitions(picture):
+    assert np.array_equal(run([("invert", ())], picture), cv2.bitwise_not(picture))
+    assert np.array_equal(run([("sepia", ())], picture), cv2.transform(picture, SEPIA_KERNEL))
+    gray = cv2.cvtColor(cv2.cvtColor(picture, cv2.COLOR_RGB2GRAY), cv2.COLOR_GRAY2RGB)
+    assert np.array_equal(run([("grayscale", ())], picture), gray)
+
+
+@pytest.mark.parametrize("value", [50, -50, 255, -7])
+def test_brightness_shifts_the_hsv_value_channel(picture, value):
+    assert np.array_equal(adjust_brightness(picture, value), hsv_brightness(picture, value))
+
+
+def test_brightness_keeps_saturated_colors():
+    pixels = np.array([[[200, 0, 0], [100, 50, 20]]], dtype=np.uint8)
+    assert adjust_brightness(pixels, 50).tolist() == hsv_brightness(pixels, 50).tolist()
+    assert adjust_brightness(pixels, 50)[0, 0].tolist() == [250, 0, 0]
+    assert not is_point_operation("brightness")
+
+
+def test_lookup_tables_fuse_exactly(picture):
+    program = compile_chain([("invert", ())] * 3)
+    assert program.passes == 1
+    assert np.array_equal(program.apply(picture), cv2.bitwise_not(picture))
+
+
+def test_lut_then_matrix_shares_a_stage():
+    assert compile_chain([("invert", ()), ("invert", ()), ("grayscale", ())]).passes == 2
+    assert len(compile_chain([("invert", ()), ("sepia", ())])) == 1
+
+
+@pytest.mark.parametrize("chain", [
+    [("grayscale", ()), ("sepia", ())],
+    [("sepia", ()), ("grayscale", ())],
+    [("sepia", ()), ("invert", ()), ("sepia", ())],
+])
+def test_matrices_are_not_multiplied(picture, chain):
+    program = compile_chain(chain)
+    assert len(program) == len(chain) - sum(name == "invert" for name, _ in chain)
+    expected = picture
+    for name, params in chain:
+        expected = OPERATIONS[name](expected, *params)
+    assert np.array_equal(program.apply(picture), expected)
+
+
+def test_fused_chains_match_step_by_step(picture):
+    chain = [("invert", ()), ("brightness", (40,)), ("grayscale", ()), ("invert", ()), ("sepia", ())]
+    expected = picture
+    for name, params in chain:
+        expected = OPERATIONS[name](expected, *params)
+    assert np.array_equal(apply_chain(picture, chain), expected)
+
+
+def test_empty_program_is_identity(picture):
+    assert np.array_equal(ColorProgram().apply(picture), picture)
+
+
+def test_invalid_input_is_rejected(picture):
+    with pytest.raises(ValueError):
+        compile_chain([("blur", ())])
+    with pytest.raises(ValueError):
+        compile_chain([("brightness", (10,))])
+    with pytest.raises(ValueError):
+        ColorProgram().then_lut(np.arange(10))
+    with pytest.raises(ValueError):
+        ColorProgram().then_matrix(np.eye(2))
+    with pytest.raises(ValueError):
+        compile_chain([("invert", ())]).apply(picture[..., 0])
+    assert is_point_operation("sepia") and not is_point_operation("edge")
@@ -0,0 +1,47 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.decode import image_size, read_image, read_reduced, reduction_factor
+
+
+@pytest.mark.parametrize("size,factor", [
+    ((4000, 3000), 4),
+    ((6000, 4000), 8),
+    ((1300, 900), 2),
+    ((1000, 500), 1),
+    ((600, 600), 1),
+])
+def test_reduction_factor_still_fills_the_canvas(size, factor):
+    assert reduction_factor(size, (600, 600)) == factor
+    w, h = size
+    assert max(w / factor / 600, h / factor / 600) >= 1 or factor == 1
+
+
+@pytest.fixture
+def large_jpeg(tmp_path, write_rgb):
+    image = np.zeros((1600, 2400, 3), np.uint8)
+    image[..., 0] = np.linspace(0, 255, 2400, dtype=np.uint8)
+    return write_rgb(tmp_path / "large.jpg", image)
+
+
+def test_read_reduced_decodes_a_smaller_preview(large_jpeg):
+    preview, factor = read_reduced(large_jpeg, (600, 600))
+    assert factor == 4 and preview.shape == (400, 600, 3)
+    full = read_image(large_jpeg)
+    assert np.abs(cv2.resize(full, (600, 400), interpolation=cv2.INTER_AREA).astype(int) - preview).mean() < 4
+
+
+def test_read_reduced_skips_small_and_non_jpeg_files(tmp_path, picture, large_jpeg, write_rgb):
+    assert read_reduced(write_rgb(tmp_path / "small.jpg", picture), (600, 600)) is None
+    assert read_reduced(write_rgb(tmp_path / "large.png", read_image(large_jpeg)), (600, 600)) is None
+
+
+def test_header_size_and_decode_errors(tmp_path, large_jpeg):
+    assert image_size(large_jpeg) == (2400, 1600)
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not a jpeg")
+    assert image_size(str(broken)) is None
+    assert read_reduced(str(broken), (600, 600)) is None
+    with pytest.raises(IOError):
+        read_image(str(broken))
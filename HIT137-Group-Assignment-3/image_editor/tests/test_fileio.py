@@ -0,0 +1,66 @@
+import os
+import stat
+
+import cv2
+import numpy as np
+import pytest
+
+from app.fileio import SaveOptions, atomic_output, encode_image, write_bytes_atomic, write_image_atomic
+
+
+@pytest.fixture
+def umask_022():
+    old = os.umask(0o022)
+    yield
+    os.umask(old)
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_file_gets_umask_permissions(tmp_path, umask_022, picture):
+    path = str(tmp_path / "out.png")
+    write_image_atomic(path, picture)
+    assert mode(path) == 0o644
+
+
+def test_overwrite_keeps_existing_permissions(tmp_path, umask_022):
+    path = str(tmp_path / "out.bin")
+    write_bytes_atomic(path, np.zeros(10, np.uint8))
+    os.chmod(path, 0o640)
+    write_bytes_atomic(path, np.ones(20, np.uint8))
+    assert mode(path) == 0o640
+    assert os.path.getsize(path) == 20
+
+
+def test_failed_write_leaves_no_files(tmp_path):
+    path = tmp_path / "out.png"
+    with pytest.raises(RuntimeError):
+        with atomic_output(str(path)) as tmp:
+            open(tmp, "wb").close()
+            raise RuntimeError("encoder failed")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_save_options_params_by_format():
+    options = SaveOptions(jpeg_quality=80, jpeg_progressive=True, png_compression=6)
+    assert options.params("a.JPG")[:4] == [cv2.IMWRITE_JPEG_QUALITY, 80, cv2.IMWRITE_JPEG_PROGRESSIVE, 1]
+    assert options.params("a.png") == [cv2.IMWRITE_PNG_COMPRESSION, 6]
+    assert options.params("a.bmp") == []
+    with pytest.raises(ValueError):
+        SaveOptions(jpeg_quality=101).params("a.jpg")
+    with pytest.raises(ValueError):
+        SaveOptions(tiff_compression="zip").params("a.tif")
+
+
+def test_encoded_save_round_trips_with_progress(tmp_path, umask_022, picture):
+    path = str(tmp_path / "saved.png")
+    data = encode_image(picture, path, SaveOptions().params(path))
+    reported = []
+    size = write_bytes_atomic(path, data, reported.append, chunk_bytes=1024)
+
+    assert size == os.path.getsize(path) == data.nbytes
+    assert reported[-1] == 1.0 and reported == sorted(reported)
+    assert np.array_equal(cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB), picture)
+    assert mode(path) == 0o644
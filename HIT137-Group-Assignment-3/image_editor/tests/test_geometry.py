@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.filters import OPERATIONS, apply_chain
+from app.geometry import (ViewTransform, commutes_with_rotation, normalize_chain, pending_turns, rotate,
+                          split_rotations)
+
+
+def step_by_step(image, chain):
+    for name, params in chain:
+        image = OPERATIONS[name](image, *params)
+    return image
+
+
+def test_rotate_counts_quarter_turns(picture):
+    assert rotate(picture, 0) is picture and rotate(picture, 4) is picture
+    assert np.array_equal(rotate(picture, 1), np.rot90(picture, 1))
+    assert np.array_equal(rotate(picture, -1), np.rot90(picture, -1))
+
+
+def test_rotations_cancel_and_merge():
+    assert split_rotations([("rotate_left", ()), ("invert", ()), ("rotate_right", ())]) == ([("invert", ())], 0)
+    assert pending_turns([("rotate_left", ())] * 3) == 3
+    assert normalize_chain([("rotate_left", ())] * 3) == [("rotate_right", ())]
+
+
+def test_rotations_are_applied_before_non_commuting_operations():
+    chain = [("rotate_left", ()), ("blur", (15,)), ("edge", (100, 200)), ("rotate_left", ())]
+    out, turns = split_rotations(chain)
+    assert out == [("blur", (15,)), ("rotate_left", ()), ("edge", (100, 200))] and turns == 1
+    assert commutes_with_rotation("blur", (15,)) and not commutes_with_rotation("blur", (301,))
+    assert not commutes_with_rotation("resize", (0.5,))
+
+
+@pytest.mark.parametrize("chain", [
+    [("rotate_left", ()), ("brightness", (20,)), ("blur", (15,)), ("rotate_left", ())],
+    [("rotate_right", ()), ("sepia", ()), ("edge", (100, 200)), ("rotate_left", ()), ("invert", ())],
+    [("rotate_left", ()), ("resize", (0.5,)), ("blur", (61,)), ("rotate_right", ())],
+])
+def test_deferred_rotations_do_not_change_results(picture, chain):
+    expected = step_by_step(picture, chain)
+    assert np.array_equal(apply_chain(picture, chain), expected)
+    assert np.array_equal(step_by_step(picture, normalize_chain(chain)), expected)
+
+
+def test_view_transform_resizes_then_rotates(picture):
+    view = ViewTransform(turns=1, scale=2.0)
+    size = view.display_size(83, 61, 1000, 100)
+    assert size == (int(122 * 100 / 166), 100)
+    expected = rotate(cv2.resize(picture, (size[1], size[0]), interpolation=cv2.INTER_CUBIC), 1)
+    assert np.array_equal(view.render(picture, size), expected)
+    assert ViewTransform().render(picture, (83, 61)) is picture
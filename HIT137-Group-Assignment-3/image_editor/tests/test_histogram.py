@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.filters import apply_chain
+from app.histogram import chain_lut, compute_histograms, dkw_bound, sample_stride
+
+
+@pytest.fixture(scope="module")
+def photo():
+    rng = np.random.default_rng(3)
+    return cv2.resize(rng.integers(0, 256, (30, 40, 3), dtype=np.uint8), (1200, 900), interpolation=cv2.INTER_CUBIC)
+
+
+def test_dkw_bound():
+    assert dkw_bound(250_000) == pytest.approx(0.00272, abs=1e-5)
+    assert dkw_bound(1000, 0.99) > dkw_bound(1000, 0.95) > dkw_bound(4000, 0.95)
+
+
+def test_sample_stride_keeps_the_sample_within_budget():
+    for shape in ((900, 1200), (1, 10 ** 6), (501, 499)):
+        stride = sample_stride(shape, 10_000)
+        assert -(-shape[0] // stride) * -(-shape[1] // stride) <= 10_000
+    assert sample_stride((100, 100), 10_000) == 1
+
+
+def test_small_images_are_counted_exactly(picture):
+    histograms = compute_histograms(picture)
+    assert histograms.stride == 1 and histograms.error_bound() == 0
+    assert np.array_equal(histograms.counts[0], np.bincount(picture[..., 0].ravel(), minlength=256))
+    gray = cv2.cvtColor(picture, cv2.COLOR_RGB2GRAY)
+    assert np.array_equal(histograms.counts[3], np.bincount(gray.ravel(), minlength=256))
+
+
+def test_sampled_histograms_are_within_the_bound(photo):
+    histograms = compute_histograms(photo, max_samples=20_000)
+    assert histograms.stride > 1 and histograms.samples <= 20_000
+    exact = np.bincount(photo[..., 1].ravel(), minlength=256) / (photo.shape[0] * photo.shape[1])
+    error = np.abs(np.cumsum(histograms.fractions()[1]) - np.cumsum(exact)).max()
+    assert error <= histograms.error_bound()
+
+
+@pytest.mark.parametrize("chain", [[("invert", ())], [("invert", ()), ("invert", ()), ("invert", ())]])
+def test_remap_matches_recounting(photo, chain):
+    lut = chain_lut(chain)
+    assert lut is not None
+    result = apply_chain(photo, chain)
+    before = compute_histograms(photo, max_samples=20_000)
+    after = compute_histograms(result, max_samples=20_000)
+    remapped = before.remap(lut, result)
+    assert np.array_equal(remapped.counts[:3], after.counts[:3])
+    assert np.abs(remapped.counts[3] - after.counts[3]).sum() <= 0.01 * after.samples
+
+
+def test_chain_lut_rejects_mixing_and_spatial_operations():
+    assert chain_lut([]) is None
+    assert chain_lut([("grayscale", ())]) is None
+    assert chain_lut([("brightness", (30,))]) is None
+    assert chain_lut([("invert", ()), ("blur", (15,))]) is None
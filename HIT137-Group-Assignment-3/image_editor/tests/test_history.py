@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from app.filters import apply_operation
+from app.history import ENTRY_OVERHEAD, UndoHistory
+from app.pipeline import Step
+
+
+def apply(image, step):
+    return apply_operation(image, step.name, step.params)
+
+
+@pytest.mark.parametrize("step", [Step("blur", (9.0,)), Step("sepia", ()), Step("edge", ())])
+def test_xor_delta_round_trip(picture, step):
+    history = UndoHistory()
+    after = apply(picture, step)
+    entry = history.make_entry(step, picture, after)
+    assert entry.is_delta and entry.snapshot is not None
+    history.push(entry)
+    undone_step, restored = history.undo(after)
+    assert undone_step == step
+    assert np.array_equal(restored, picture)
+
+
+def test_shape_changing_step_stores_the_full_image(picture):
+    history = UndoHistory()
+    step = Step("resize", (0.5,))
+    after = apply(picture, step)
+    history.record(step, picture, after)
+    _, restored = history.undo(after)
+    assert np.array_equal(restored, picture)
+
+
+def test_delta_of_a_small_change_compresses_well(picture):
+    after = picture.copy()
+    after[:5, :5] = 0
+    entry = UndoHistory().make_entry(Step("brightness", (-255.0,)), picture, after)
+    assert len(entry.snapshot) < picture.nbytes // 10
+
+
+def test_invertible_and_rotation_steps_store_nothing(picture):
+    history = UndoHistory()
+    for step in (Step("invert", ()), Step("rotate_left", ())):
+        entry = history.make_entry(step, picture, apply(picture, step))
+        assert entry.snapshot is None and entry.nbytes == ENTRY_OVERHEAD
+    inverted = apply(picture, Step("invert", ()))
+    history.record(Step("invert", ()), picture, inverted)
+    assert np.array_equal(history.undo(inverted)[1], picture)
+
+
+def test_redo_reapplies_the_step(picture):
+    history = UndoHistory()
+    step = Step("blur", (5.0,))
+    after = apply(picture, step)
+    history.record(step, picture, after)
+    _, before = history.undo(after)
+    assert history.can_redo
+    redone_step, redone = history.redo(before)
+    assert redone_step == step and np.array_equal(redone, after)
+    assert history.can_undo and not history.can_redo
+
+
+def test_new_step_clears_redo(picture):
+    history = UndoHistory()
+    history.record(Step("invert", ()), picture, picture)
+    history.undo(picture)
+    history.record(Step("invert", ()), picture, picture)
+    assert not history.can_redo
+
+
+def test_budget_evicts_oldest_steps(picture):
+    noise = np.random.default_rng(1).integers(0, 256, picture.shape, dtype=np.uint8)
+    entry_size = UndoHistory().make_entry(Step("sepia", ()), noise, picture).nbytes
+    history = UndoHistory(budget_bytes=2 * entry_size)
+    for _ in range(3):
+        history.record(Step("sepia", ()), noise, picture)
+    assert history.undo_steps == 2 and history.evicted == 1
+    history.set_budget(0)
+    assert history.undo_steps == 0
+    with pytest.raises(ValueError):
+        history.set_budget(-1)
+    with pytest.raises(IndexError):
+        history.undo(picture)
+
+
+def test_steps_put_back_for_redo_get_an_entry_when_redone(picture):
+    history = UndoHistory()
+    step = Step("blur", (5.0,))
+    history.push_redo(step)
+    assert history.can_redo and not history.can_undo
+    redone_step, after = history.redo(picture)
+    assert redone_step == step and np.array_equal(after, apply(picture, step))
+    _, before = history.undo(after)
+    assert np.array_equal(before, picture)
+
+
+def test_push_can_keep_the_redo_stack(picture):
+    history = UndoHistory()
+    history.push_redo(Step("sepia", ()))
+    history.push(history.make_entry(Step("invert", ()), picture, picture), keep_redo=True)
+    assert history.can_redo and history.undo_steps == 1
+    history.clear_redo()
+    assert not history.can_redo
+
+
+def test_take_redo_leaves_the_entry_to_the_caller(picture):
+    history = UndoHistory()
+    step = Step("blur", (5.0,))
+    after = apply(picture, step)
+    history.record(step, picture, after)
+    history.undo(after)
+    assert history.take_redo() == step
+    assert not history.can_redo and not history.can_undo
+    with pytest.raises(IndexError):
+        history.take_redo()
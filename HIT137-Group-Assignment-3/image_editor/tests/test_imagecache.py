@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.imagecache import DecodedImageCache
+
+
+@pytest.fixture
+def cache():
+    cache = DecodedImageCache()
+    yield cache
+    cache.shutdown()
+
+
+def test_load_decodes_once_and_shares_a_read_only_array(tmp_path, cache, picture, write_rgb):
+    path = write_rgb(tmp_path / "a.png", picture)
+    first = cache.load(path)
+    assert np.array_equal(first, picture) and not first.flags.writeable
+    assert cache.load(path) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_modified_file_is_decoded_again(tmp_path, cache, picture, write_rgb):
+    path = write_rgb(tmp_path / "a.png", picture)
+    cache.load(path)
+    write_rgb(path, 255 - picture)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert np.array_equal(cache.load(path), 255 - picture)
+    assert len(cache) == 1
+
+
+def test_budget_evicts_least_recently_used(tmp_path, picture, write_rgb):
+    cache = DecodedImageCache(budget_bytes=2 * picture.nbytes)
+    paths = [write_rgb(tmp_path / f"{i}.png", picture) for i in range(3)]
+    cache.load(paths[0])
+    cache.load(paths[1])
+    cache.load(paths[0])
+    cache.load(paths[2])
+    assert cache.contains(paths[0]) and cache.contains(paths[2])
+    assert not cache.contains(paths[1]) and cache.evicted == 1
+    cache.set_budget(0)
+    assert len(cache) == 0
+    with pytest.raises(ValueError):
+        cache.set_budget(-1)
+
+
+def test_prefetch_fills_the_cache_and_skips_bad_files(tmp_path, cache, picture, write_rgb):
+    good = write_rgb(tmp_path / "good.png", picture)
+    bad = tmp_path / "bad.png"
+    bad.write_bytes(b"broken")
+    futures = cache.prefetch([good, str(bad)])
+    for future in futures.values():
+        future.result(10)
+    assert cache.contains(good) and not cache.contains(str(bad))
+    hits = cache.hits
+    cache.load(good)
+    assert cache.hits == hits + 1
+    with pytest.raises(IOError):
+        cache.load(str(bad))
@@ -0,0 +1,42 @@
+import os
+import stat
+
+import numpy as np
+import pytest
+
+from app.filters import apply_chain, parse_chain
+from app.largeimage import open_large, process_large, save_large
+
+# Small strips, so that every operation spans several of them
+TILE_BYTES = 4096
+
+
+@pytest.mark.parametrize("spec", [
+    "grayscale,brightness=30,invert",
+    "blur=7,sepia",
+    "edge",
+    "rotate_left,blur=5,rotate_left,rotate_left",
+    "rotate_right,edge,invert",
+])
+def test_process_large_matches_apply_chain(tmp_path, picture, spec):
+    chain = parse_chain(spec)
+    result = process_large(picture, chain, workdir=str(tmp_path), tile_bytes=TILE_BYTES)
+    assert np.array_equal(np.asarray(result), apply_chain(picture, chain))
+
+
+@pytest.mark.parametrize("ext", [".ppm", ".bmp", ".npy", ".png"])
+def test_save_and_open_round_trip(tmp_path, picture, ext):
+    path = str(tmp_path / f"big{ext}")
+    save_large(picture, path, tile_bytes=TILE_BYTES)
+    large = open_large(path, workdir=str(tmp_path), tile_bytes=TILE_BYTES)
+    assert np.array_equal(np.asarray(large.pixels), picture)
+
+
+def test_saved_file_is_not_private(tmp_path, picture):
+    old = os.umask(0o022)
+    try:
+        path = str(tmp_path / "big.ppm")
+        save_large(picture, path)
+    finally:
+        os.umask(old)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from app.lru import ArrayLRU
+
+
+def array(nbytes):
+    return np.zeros(nbytes, np.uint8)
+
+
+def test_evicts_least_recently_used_within_budget():
+    lru = ArrayLRU(300)
+    for key in "abc":
+        lru.put(key, array(100))
+    assert lru.get("a") is not None
+    lru.put("d", array(100))
+    assert lru.keys() == ["c", "a", "d"]
+    assert lru.memory_usage == 300 and lru.evicted == 1
+
+
+def test_replacing_and_popping_keep_the_byte_count():
+    lru = ArrayLRU(1000)
+    lru.put("a", array(100))
+    lru.put("a", array(250))
+    assert len(lru) == 1 and lru.memory_usage == 250
+    assert lru.pop("a").nbytes == 250 and lru.pop("a") is None
+    assert lru.memory_usage == 0 and "a" not in lru
+
+
+def test_oversized_arrays_are_not_held():
+    lru = ArrayLRU(100)
+    lru.put("a", array(50))
+    lru.put("big", array(101))
+    assert lru.keys() == ["a"] and lru.evicted == 0
+
+
+def test_set_budget_and_clear():
+    lru = ArrayLRU(300)
+    for key in "abc":
+        lru.put(key, array(100))
+    lru.set_budget(150)
+    assert lru.keys() == ["c"] and lru.evicted == 2
+    lru.clear()
+    assert len(lru) == 0 and lru.memory_usage == 0 and lru.evicted == 0
+    with pytest.raises(ValueError):
+        lru.set_budget(-1)
+    with pytest.raises(ValueError):
+        ArrayLRU(-1)
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from app.history import UndoHistory
+from app.memo import MemoCache, chain_key, content_key, derive_key
+from app.pipeline import Pipeline, Step
+
+
+def test_content_key_depends_on_pixels_shape_and_dtype(picture):
+    assert content_key(picture) == content_key(picture.copy())
+    changed = picture.copy()
+    changed[0, 0, 0] ^= 1
+    assert content_key(changed) != content_key(picture)
+    assert content_key(picture.reshape(83, 61, 3)) != content_key(picture)
+    assert content_key(picture.astype(np.int16)) != content_key(picture)
+
+
+def test_derive_key_depends_on_operation_and_parameters():
+    keys = {derive_key("k", "blur", (15,)), derive_key("k", "blur", (17,)),
+            derive_key("k", "edge", (15,)), derive_key("j", "blur", (15,))}
+    assert len(keys) == 4
+    assert derive_key("k", "blur", (15,)) == derive_key("k", "blur", (15.0,))
+
+
+@pytest.mark.parametrize("chain,same_as", [
+    ([("invert", ()), ("invert", ())], []),
+    ([("rotate_left", ()), ("rotate_right", ())], []),
+    ([("blur", (5,)), ("invert", ()), ("invert", ())], [("blur", (5,))]),
+    ([("invert", ()), ("sepia", ()), ("rotate_right", ()), ("rotate_left", ()), ("invert", ())],
+     [("invert", ()), ("sepia", ()), ("invert", ())]),
+    ([("invert", ()), ("rotate_left", ()), ("rotate_right", ()), ("invert", ())], []),
+])
+def test_chain_key_cancels_inverse_pairs(chain, same_as):
+    assert chain_key("src", chain) == chain_key("src", same_as)
+
+
+def test_chain_key_keeps_steps_that_do_not_cancel():
+    assert chain_key("src", [("rotate_left", ()), ("rotate_left", ())]) != chain_key("src", [])
+    assert chain_key("src", [("brightness", (10,)), ("brightness", (10,))]) != chain_key("src", [])
+    assert chain_key("src", [("invert", ()), ("sepia", ()), ("invert", ())]) != chain_key("src", [("sepia", ())])
+
+
+def image(nbytes, value=0):
+    return np.full(nbytes, value, np.uint8)
+
+
+def test_lru_eviction_within_budget():
+    memo = MemoCache(budget_bytes=300)
+    for key in "abc":
+        memo.put(key, image(100))
+    assert memo.get("a") is not None
+    memo.put("d", image(100))
+    assert memo.get("b") is None
+    assert memo.get("a") is not None and memo.get("d") is not None
+    assert memo.memory_usage == 300 and memo.evicted == 1
+
+
+def test_put_marks_read_only_and_skips_oversized():
+    memo = MemoCache(budget_bytes=100)
+    small = memo.put("small", image(10))
+    assert not small.flags.writeable
+    memo.put("big", image(101))
+    assert len(memo) == 1 and memo.get("big") is None
+
+
+def test_statistics_and_peek():
+    memo = MemoCache()
+    memo.put("a", image(10))
+    memo.get("a")
+    memo.get("missing")
+    assert memo.peek("a") is not None and memo.peek("missing") is None
+    assert (memo.hits, memo.misses) == (1, 1)
+    assert memo.hit_rate == 0.5
+    memo.clear()
+    assert len(memo) == 0 and (memo.hits, memo.misses) == (0, 0)
+
+
+def test_set_budget_evicts_and_rejects_negative():
+    memo = MemoCache()
+    memo.put("a", image(100))
+    memo.put("b", image(100))
+    memo.set_budget(150)
+    assert memo.peek("a") is None and memo.peek("b") is not None
+    with pytest.raises(ValueError):
+        memo.set_budget(-1)
+
+
+def build(source, steps, memo):
+    pipeline = Pipeline(source, memo=memo)
+    for name, params in steps:
+        pipeline.append(name, params)
+    return pipeline
+
+
+def test_pipeline_reuses_results_across_pipelines(picture):
+    memo = MemoCache()
+    steps = [("blur", (5.0,)), ("sepia", ()), ("rotate_left", ()), ("edge", ())]
+    first = build(picture, steps, memo).result()
+    misses = memo.misses
+
+    # A reset and crop of the same region yield an equal but distinct source array
+    again = build(picture.copy(), steps, memo).result()
+    assert np.array_equal(again, first)
+    assert memo.misses == misses and memo.hits >= 1
+    assert np.array_equal(again, build(picture, steps, None).result())
+
+
+def test_pipeline_toggle_hits_the_earlier_result(picture):
+    memo = MemoCache()
+    pipeline = build(picture, [("sepia", ())], memo)
+    before = pipeline.result()
+    pipeline.append("invert")
+    pipeline.result()
+    pipeline.append("invert")
+    hits = memo.hits
+    assert pipeline.result() is before
+    assert memo.hits == hits + 1
+
+
+def test_history_snapshot_lookups_do_not_count_as_hits(picture):
+    memo = MemoCache()
+    history = UndoHistory()
+    after = picture[::-1].copy()
+    for _ in range(2):
+        entry = history.make_entry(Step("blur", (5.0,)), picture, after, memo, "key")
+    assert (memo.hits, memo.misses) == (0, 0)
+    assert len(memo) == 1
+    history.push(entry)
+    _, restored = history.undo(after)
+    assert np.array_equal(restored, picture)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from app.filters import apply_chain, parse_chain
+from app.parallel import TiledExecutor
+from app.tiling import chain_halo, iter_strips, operation_halo, rows_per_strip
+
+
+@pytest.fixture(scope="module")
+def executor():
+    # min_pixels=0 forces strips even for small test images
+    executor = TiledExecutor(workers=3, min_pixels=0, strips_per_worker=3)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def tall():
+    return np.random.default_rng(2).integers(0, 256, (157, 64, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("spec", [
+    "invert,brightness=40",
+    "blur=9",
+    "blur=31,sepia",
+    "edge",
+    "grayscale,edge=50:150,blur=5",
+    "rotate_left,blur=7,resize=0.5,edge",
+    "blur=5,sepia,blur=11,invert,rotate_right,grayscale",
+])
+def test_run_chain_matches_apply_chain(executor, tall, spec):
+    chain = parse_chain(spec)
+    assert np.array_equal(executor.run_chain(tall, chain), apply_chain(tall, chain))
+
+
+def test_small_images_run_whole(tall):
+    executor = TiledExecutor(workers=2, min_pixels=10 ** 9)
+    chain = parse_chain("blur=9,edge")
+    try:
+        assert np.array_equal(executor.run_chain(tall, chain), apply_chain(tall, chain))
+    finally:
+        executor.shutdown()
+
+
+def test_strips_cover_every_row_once_with_halo():
+    strips = list(iter_strips(100, 30, halo=4))
+    assert [(s.start, s.stop) for s in strips] == [(0, 30), (30, 60), (60, 90), (90, 100)]
+    assert strips[0].read_start == 0 and strips[1].read_start == 26 and strips[-1].read_stop == 100
+    assert strips[1].offset == 4
+    with pytest.raises(ValueError):
+        list(iter_strips(10, 0))
+
+
+def test_halos():
+    assert operation_halo("invert") == 0
+    assert operation_halo("blur", (9,)) >= 4
+    assert operation_halo("resize", (0.5,)) is None
+    assert chain_halo(parse_chain("blur=9,blur=9")) == 2 * operation_halo("blur", (9,))
+    assert chain_halo(parse_chain("blur=9,edge")) is None
+    assert rows_per_strip(1000, halo=2, tile_bytes=10_000) == 6
+    assert rows_per_strip(10 ** 9) == 1
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from app.filters import apply_chain, parse_chain
+from app.geometry import rotate
+from app.pipeline import Pipeline, Step
+
+
+def build(source, spec, **kwargs):
+    pipeline = Pipeline(source, **kwargs)
+    for name, params in parse_chain(spec):
+        pipeline.append(name, params)
+    return pipeline
+
+
+def oriented(pipeline, upto=None):
+    return rotate(pipeline.result(upto), pipeline.orientation(upto))
+
+
+@pytest.mark.parametrize("spec", [
+    "invert",
+    "grayscale,blur=7,brightness=-40",
+    "rotate_left,sepia,edge,invert",
+    "blur=5,resize=0.5,rotate_right,rotate_right,brightness=20",
+])
+def test_result_matches_apply_chain(picture, spec):
+    pipeline = build(picture, spec)
+    assert np.array_equal(oriented(pipeline), apply_chain(picture, parse_chain(spec)))
+    assert np.array_equal(pipeline.render(picture), apply_chain(picture, parse_chain(spec)))
+
+
+def test_source_is_not_modified(picture):
+    original = picture.copy()
+    build(picture, "invert,blur=5,brightness=30").result()
+    assert np.array_equal(picture, original)
+
+
+def test_editing_a_late_step_keeps_earlier_stages(picture):
+    pipeline = build(picture, "blur=9,edge,invert")
+    pipeline.result(1)
+    blurred = pipeline.result(1)
+    pipeline.replace(2, "brightness", (10,))
+    assert pipeline.stage_of(blurred) == 1
+    assert np.array_equal(pipeline.result(), apply_chain(picture, parse_chain("blur=9,edge,brightness=10")))
+
+
+def test_remove_invalidates_later_stages(picture):
+    pipeline = build(picture, "blur=5,invert")
+    last = pipeline.result()
+    assert pipeline.remove(0) == Step("blur", (5.0,))
+    assert pipeline.stage_of(last) is None
+    assert np.array_equal(pipeline.result(), apply_chain(picture, parse_chain("invert")))
+
+
+def test_replay_onto_a_new_source(picture):
+    pipeline = build(picture, "grayscale,rotate_left,brightness=25")
+    pipeline.result()
+    crop = picture[10:40, 20:70]
+    pipeline.set_source(crop)
+    assert np.array_equal(oriented(pipeline), apply_chain(crop, pipeline.chain()))
+
+
+def test_copy_evaluates_independently_and_adopt_takes_its_stages(picture):
+    pipeline = build(picture, "blur=5,invert")
+    snapshot = pipeline.copy()
+    result = snapshot.result()
+    assert pipeline.stage_of(result) is None
+    pipeline.adopt(snapshot)
+    assert pipeline.stage_of(result) == 2
+    assert pipeline.result() is result
+
+
+def test_adopt_ignores_stages_past_a_changed_step(picture):
+    pipeline = build(picture, "blur=5,invert")
+    snapshot = pipeline.copy()
+    stale = snapshot.result()
+    pipeline.replace(1, "sepia")
+    pipeline.adopt(snapshot)
+    assert pipeline.stage_of(stale) is None
+
+
+def test_rotations_do_not_move_pixels(picture):
+    pipeline = build(picture, "invert,rotate_left,rotate_left,rotate_left")
+    assert pipeline.result() is pipeline.result(1)
+    assert pipeline.orientation() == 3
+
+
+def test_cache_size_is_bounded(picture):
+    pipeline = build(picture, ",".join(["blur=3", "edge"] * 4), max_cached=2)
+    pipeline.result()
+    assert len(pipeline.stages()) == 3
@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+
+from app.benchmark import synthetic_image
+from app.filters import apply_chain, parse_chain, proxy_chain, proxy_params
+from app.pipeline import Pipeline
+
+
+def test_only_blur_depends_on_scale():
+    assert proxy_params("brightness", (40,), 0.25) == (40,)
+    assert proxy_params("resize", (0.5,), 0.25) == (0.5,)
+    assert proxy_params("blur", (31,), 1.0) == (31,)
+    ksize, sigma = proxy_params("blur", (31,), 0.25)
+    assert ksize == 9 and ksize % 2 == 1
+    full_ksize, full_sigma = proxy_params("blur", (31, 6.0), 0.5)
+    assert full_ksize == 17 and full_sigma == 3.0
+
+
+def test_proxy_chain_is_unchanged_at_full_size():
+    chain = parse_chain("blur=21,invert")
+    assert proxy_chain(chain, 1.0) is chain
+
+
+def test_proxy_result_approximates_the_downscaled_full_result():
+    full = synthetic_image(0.5)
+    h, w = full.shape[:2]
+    factor = 0.25
+    size = (int(w * factor), int(h * factor))
+    chain = parse_chain("blur=41,brightness=20")
+
+    expected = cv2.resize(apply_chain(full, chain), size, interpolation=cv2.INTER_AREA)
+    proxy = cv2.resize(full, size, interpolation=cv2.INTER_AREA)
+    approximated = apply_chain(proxy, proxy_chain(chain, factor))
+    naive = apply_chain(proxy, chain)
+
+    error = np.abs(approximated.astype(int) - expected).mean()
+    assert error < 2
+    assert error < np.abs(naive.astype(int) - expected).mean() / 3
+
+
+def test_pipeline_runs_scaled_parameters_on_a_proxy(picture):
+    pipeline = Pipeline()
+    pipeline.set_source(picture, proxy_factor=0.5)
+    pipeline.append("blur", (21,))
+    expected = apply_chain(picture, proxy_chain(pipeline.chain(), 0.5))
+    assert np.array_equal(pipeline.result(), expected)
+    # Rendering at full resolution uses the recorded parameters
+    full = cv2.resize(picture, None, fx=2, fy=2)
+    assert np.array_equal(pipeline.render(full), apply_chain(full, pipeline.chain()))
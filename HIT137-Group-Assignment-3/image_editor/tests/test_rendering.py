@@ -0,0 +1,79 @@
+import pytest
+
+from app.rendering import RedrawScheduler
+
+
+class IdleWidget:
+    """Stands in for a Tk widget: after_idle callbacks run when run_idle() is called."""
+
+    def __init__(self):
+        self.idle = {}
+        self.count = 0
+
+    def after_idle(self, func):
+        self.count += 1
+        key = f"idle{self.count}"
+        self.idle[key] = func
+        return key
+
+    def after_cancel(self, key):
+        self.idle.pop(key, None)
+
+    def run_idle(self):
+        idle, self.idle = self.idle, {}
+        for func in idle.values():
+            func()
+
+
+@pytest.fixture
+def setup():
+    widget = IdleWidget()
+    calls = []
+    flushes = []
+    scheduler = RedrawScheduler(
+        widget,
+        {"original": lambda: calls.append("original"), "processed": lambda: calls.append("processed")},
+        on_flush=lambda: flushes.append(1),
+    )
+    return widget, scheduler, calls, flushes
+
+
+def test_burst_of_requests_renders_once(setup):
+    widget, scheduler, calls, flushes = setup
+    for _ in range(50):
+        scheduler.request(["processed"])
+    assert len(widget.idle) == 1 and calls == []
+    widget.run_idle()
+    assert calls == ["processed"] and len(flushes) == 1
+    assert (scheduler.requested, scheduler.performed) == (50, 1)
+
+
+def test_default_request_renders_every_target_in_order(setup):
+    widget, scheduler, calls, _ = setup
+    scheduler.request(["processed"])
+    scheduler.request()
+    widget.run_idle()
+    assert calls == ["original", "processed"]
+
+
+def test_flush_renders_now_and_drops_the_pending_callback(setup):
+    widget, scheduler, calls, _ = setup
+    scheduler.request(["original"])
+    scheduler.flush()
+    assert calls == ["original"] and widget.idle == {}
+    scheduler.request(["original"])
+    assert len(widget.idle) == 1
+
+
+def test_cancel_drops_pending_redraws(setup):
+    widget, scheduler, calls, flushes = setup
+    scheduler.request()
+    scheduler.cancel()
+    widget.run_idle()
+    assert calls == [] and flushes == [] and not scheduler.dirty
+
+
+def test_unknown_target_is_rejected(setup):
+    _, scheduler, _, _ = setup
+    with pytest.raises(KeyError):
+        scheduler.request(["histogram"])
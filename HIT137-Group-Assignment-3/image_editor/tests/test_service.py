@@ -0,0 +1,142 @@
+import http.client
+import json
+import os
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from app.filters import apply_chain, parse_chain
+from app.service import LatencyStats, ProcessingService, ServiceBusy, ServiceServer, process_request
+
+
+def encode_png(image):
+    ok, data = cv2.imencode(".png", cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    assert ok
+    return data.tobytes()
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = ProcessingService(workers=2, queue_size=1, timeout=30)
+    service.start()
+    yield service
+    service.shutdown()
+
+
+def serve(service):
+    server = ServiceServer(("127.0.0.1", 0), service, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def server(service):
+    server = serve(service)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, query, body):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=30)
+    try:
+        conn.request("POST", f"/process?{query}", body=body)
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def test_every_worker_is_warm(service):
+    assert len(service.worker_pids) == service.workers == 2
+
+
+def test_process_returns_the_filtered_image(server, picture):
+    status, headers, body = post(server, "chain=grayscale,invert&format=png", encode_png(picture))
+    assert status == 200 and headers["Content-Type"] == "image/png"
+    result = cv2.cvtColor(cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+    assert np.array_equal(result, apply_chain(picture, parse_chain("grayscale,invert")))
+
+
+@pytest.mark.parametrize("query,body", [
+    ("chain=edge=1:2:3:4", None),
+    ("chain=blur=4", None),
+    ("chain=unknown", None),
+    ("chain=invert&format=gif", None),
+    ("chain=invert", b"not an image"),
+])
+def test_client_errors_are_400(server, picture, query, body):
+    status, _, _ = post(server, query, encode_png(picture) if body is None else body)
+    assert status == 400
+
+
+def test_bad_parameters_are_client_errors(picture):
+    data = encode_png(picture)
+    for chain in ([("edge", (1.0, 2.0, 3.0, 4.0))], [("resize", (50.0,))]):
+        result, error = process_request((data, chain, "png"))
+        assert result is None and error
+
+
+def test_full_service_answers_503():
+    class FullService:
+        def process(self, data, chain, fmt):
+            raise ServiceBusy()
+
+    server = serve(FullService())
+    try:
+        status, headers, _ = post(server, "chain=invert", b"x")
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert status == 503 and headers["Retry-After"] == "1"
+
+
+def test_admission_is_bounded(service):
+    # Large enough that no request finishes while the loop submits
+    data = encode_png(np.zeros((4000, 4000, 3), np.uint8))
+    futures = []
+    with pytest.raises(ServiceBusy):
+        for _ in range(service.capacity + 1):
+            futures.append(service.submit(data, parse_chain("blur=51,edge"), "png"))
+    assert len(futures) == service.capacity
+    for future in futures:
+        future.result(30)
+
+
+def test_dead_worker_is_replaced_and_its_request_answered_503(picture):
+    service = ProcessingService(workers=1, queue_size=1, timeout=30)
+    service.start()
+    server = serve(service)
+    try:
+        old_pids = service.worker_pids
+        # The only worker exits on this task, so the request queued behind it is lost
+        service._pool.submit(os._exit, 1)
+        status, headers, _ = post(server, "chain=invert", encode_png(picture))
+        assert status == 503 and headers["Retry-After"] == "1"
+        status, _, _ = post(server, "chain=invert", encode_png(picture))
+        assert status == 200
+        stats = service.stats()
+        assert stats["restarts"] == 1 and stats["failed"] == 1 and stats["in_flight"] == 0
+        assert len(service.worker_pids) == 1 and service.worker_pids != old_pids
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.shutdown()
+
+
+def test_stats_endpoint(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=30)
+    conn.request("GET", "/stats")
+    stats = json.loads(conn.getresponse().read())
+    conn.close()
+    assert stats["workers"] == 2 and stats["capacity"] == 3
+
+
+def test_latency_percentiles():
+    stats = LatencyStats(window=100)
+    assert stats.percentiles() == {}
+    for ms in range(1, 201):
+        stats.add(ms / 1000)
+    assert stats.percentiles((50, 99)) == {"p50": 150.5, "p99": 199.01}
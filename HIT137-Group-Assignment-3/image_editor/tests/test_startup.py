@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+from app.startup import BackgroundImporter, format_profile  # noqa: E402
+
+
+def test_startup_module_does_not_import_the_image_libraries():
+    code = (
+        "import sys, app.startup\n"
+        "loaded = [m for m in ('numpy', 'cv2', 'PIL') if m in sys.modules]\n"
+        "sys.exit(', '.join(loaded) or None)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+
+
+def test_importer_times_each_module_in_order():
+    importer = BackgroundImporter(("json", "colorsys"))
+    importer.start()
+    importer.join(10)
+    assert importer.error is None
+    assert [name for name, _ in importer.timings] == ["json", "colorsys"]
+    assert all(seconds >= 0 for _, seconds in importer.timings)
+
+
+def test_importer_stops_at_the_first_failure():
+    importer = BackgroundImporter(("json", "no_such_module_here", "colorsys"))
+    importer.start()
+    importer.join(10)
+    assert isinstance(importer.error, ImportError)
+    assert [name for name, _ in importer.timings] == ["json"]
+
+
+def test_format_profile():
+    text = format_profile(10.0, 10.05, [("cv2", 0.2)], 10.5)
+    lines = text.splitlines()
+    assert lines[0] == "Startup profile (ms):"
+    assert lines[1].split()[-1] == "50.0"
+    assert lines[2].split() == ["import", "cv2", "200.0"]
+    assert lines[3].split()[-1] == "500.0"
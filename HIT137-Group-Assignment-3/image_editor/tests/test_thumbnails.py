@@ -0,0 +1,43 @@
+import os
+
+import cv2
+import numpy as np
+
+from app.thumbnails import ThumbnailCache, fit_thumbnail
+
+
+def test_fit_thumbnail_bounds_the_longest_side(picture):
+    large = cv2.resize(picture, (400, 200))
+    assert fit_thumbnail(large, 128).shape == (64, 128, 3)
+    assert fit_thumbnail(picture, 128) is picture
+
+
+def test_key_changes_with_content_and_size(tmp_path, picture):
+    path = tmp_path / "a.png"
+    cv2.imwrite(str(path), picture)
+    cache = ThumbnailCache(str(tmp_path / "cache"))
+    key = cache.key(str(path))
+    assert key == ThumbnailCache(str(tmp_path / "cache")).key(str(path))
+    assert key != ThumbnailCache(str(tmp_path / "cache"), size=64).key(str(path))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.key(str(path)) != key
+    assert cache.lookup(str(tmp_path / "missing.png")) is None
+
+
+def test_request_generates_missing_thumbnails_once(tmp_path):
+    image = np.random.default_rng(1).integers(0, 256, (300, 500, 3), dtype=np.uint8)
+    good, bad = tmp_path / "good.jpg", tmp_path / "bad.jpg"
+    cv2.imwrite(str(good), image)
+    bad.write_bytes(b"broken")
+    cache = ThumbnailCache(str(tmp_path / "cache"), workers=1)
+    try:
+        futures = cache.request([str(good), str(bad)])
+        results = dict(future.result(60) for future in futures.values())
+        assert results[str(good)] is None and results[str(bad)]
+        thumb = cache.lookup(str(good))
+        assert thumb is not None and max(cv2.imread(thumb).shape[:2]) == cache.size
+        assert cache.lookup(str(bad)) is None
+        assert list(cache.request([str(good)])) == []
+    finally:
+        cache.shutdown()
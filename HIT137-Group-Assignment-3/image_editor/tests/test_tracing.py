@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+
+from app.tracing import Tracer, traced_handler
+
+
+def test_spans_record_exclusive_time_per_category():
+    tracer = Tracer()
+    tracer.begin_operation("op")
+    with tracer.span("outer", "handler"):
+        time.sleep(0.01)
+        with tracer.span("inner", "filter", steps=2):
+            time.sleep(0.02)
+    times = tracer.operation_times
+    assert 0.015 < times["filter"] < 0.2
+    assert 0.005 < times["handler"] < times["filter"]
+    assert tracer.operation_summary().startswith("op ")
+
+
+def test_spans_on_other_threads_are_recorded_separately():
+    tracer = Tracer()
+
+    def work():
+        with tracer.span("work", "filter"):
+            pass
+
+    thread = threading.Thread(target=work, name="worker-x")
+    thread.start()
+    thread.join()
+    with tracer.span("main"):
+        pass
+    events = tracer.trace_events()
+    names = {e["args"]["name"] for e in events if e["ph"] == "M"}
+    assert "worker-x" in names
+    assert {e["name"] for e in events if e["ph"] == "X"} == {"work", "main"}
+
+
+def test_event_buffer_is_bounded():
+    tracer = Tracer(max_events=3)
+    for i in range(5):
+        with tracer.span(f"s{i}"):
+            pass
+    assert [e["name"] for e in tracer.trace_events() if e["ph"] == "X"] == ["s2", "s3", "s4"]
+
+
+def test_export_writes_chrome_trace_json(tmp_path):
+    tracer = Tracer()
+    with tracer.span("save", "encode", file="a.png"):
+        pass
+    path = tmp_path / "trace.json"
+    count = tracer.export(str(path))
+    data = json.loads(path.read_text())
+    assert len(data["traceEvents"]) == count
+    event = [e for e in data["traceEvents"] if e["ph"] == "X"][0]
+    assert event["args"] == {"file": "a.png"} and event["dur"] >= 0
+
+
+def test_traced_handler_starts_an_operation():
+    class Editor:
+        def __init__(self):
+            self.tracer = Tracer()
+
+        @traced_handler
+        def add_blur(self):
+            with self.tracer.span("blur", "filter"):
+                return 7
+
+    editor = Editor()
+    assert editor.add_blur() == 7
+    assert editor.tracer.operation == "add_blur"
+    assert set(editor.tracer.operation_times) == {"handler", "filter"}
@@ -0,0 +1,51 @@
+import os
+import stat
+
+import cv2
+import pytest
+
+from app.filters import parse_chain
+from app.video import VideoStream, process_video, synthetic_clip
+
+
+@pytest.fixture
+def clip(tmp_path):
+    return synthetic_clip(str(tmp_path / "clip.avi"), frames=12, size=(96, 64))
+
+
+def test_every_frame_is_filtered(tmp_path, clip):
+    output = str(tmp_path / "out.avi")
+    stream = process_video(clip, output, parse_chain("grayscale,resize=0.5"), queue_size=2)
+    assert stream.frames_read == stream.frames_written == 12
+
+    capture = cv2.VideoCapture(output)
+    ok, frame = capture.read()
+    capture.release()
+    assert ok and frame.shape == (32, 48, 3)
+    # Grayscale survives MJPEG compression up to small channel differences
+    assert abs(int(frame[..., 0].mean()) - int(frame[..., 2].mean())) <= 3
+
+
+def test_output_is_not_private(tmp_path, clip):
+    old = os.umask(0o022)
+    try:
+        output = str(tmp_path / "out.avi")
+        process_video(clip, output, parse_chain("invert"))
+    finally:
+        os.umask(old)
+    assert stat.S_IMODE(os.stat(output).st_mode) == 0o644
+
+
+def test_cancelled_stream_leaves_no_output(tmp_path, clip):
+    output = str(tmp_path / "out.avi")
+    stream = VideoStream(clip, output, parse_chain("blur=31"), queue_size=1)
+    stream.cancel()
+    stream.start()
+    assert stream.wait(10)
+    assert stream.cancelled
+    assert os.listdir(tmp_path) == ["clip.avi"]
+
+
+def test_unreadable_source_raises(tmp_path):
+    with pytest.raises(IOError):
+        process_video(str(tmp_path / "missing.avi"), str(tmp_path / "out.avi"), parse_chain("invert"))
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from app.worker import FilterWorker, JobCancelled
+
+
+class FakeWidget:
+    """Stands in for a Tk widget: after() callbacks run when run_pending() is called."""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, func):
+        self.pending.append(func)
+        return f"after{len(self.pending)}"
+
+    def run_pending(self):
+        pending, self.pending = self.pending, []
+        for func in pending:
+            func()
+
+
+def settle(widget, worker, timeout=5.0):
+    end = time.monotonic() + timeout
+    while worker.busy and time.monotonic() < end:
+        widget.run_pending()
+        time.sleep(0.002)
+    assert not worker.busy
+
+
+@pytest.fixture
+def widget():
+    return FakeWidget()
+
+
+@pytest.fixture
+def worker(widget):
+    progress = []
+    worker = FilterWorker(widget, on_progress=lambda label, fraction: progress.append((label, fraction)))
+    worker.progress_events = progress
+    yield worker
+    worker.shutdown()
+
+
+def test_results_and_progress_are_delivered(widget, worker):
+    results = []
+
+    def work(job, progress):
+        progress(0.5, "half")
+        return 42
+
+    worker.submit("job", work, results.append)
+    settle(widget, worker)
+    assert results == [42]
+    assert worker.progress_events == [("half", 0.5)]
+
+
+def test_errors_go_to_on_error(widget, worker):
+    errors = []
+
+    def work(job, progress):
+        raise ValueError("bad")
+
+    worker.submit("job", work, lambda value: None, errors.append)
+    settle(widget, worker)
+    assert [str(e) for e in errors] == ["bad"]
+
+
+def test_newer_job_with_same_key_supersedes(widget, worker):
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def slow(job, progress):
+        started.set()
+        release.wait(5)
+        job.check()
+        return "old"
+
+    worker.submit("old", slow, results.append)
+    started.wait(5)
+    worker.submit("new", lambda job, progress: "new", results.append)
+    release.set()
+    settle(widget, worker)
+    assert results == ["new"]
+
+
+def test_other_keys_are_not_cancelled(widget, worker):
+    results = []
+    worker.submit("save", lambda job, progress: "saved", results.append, key="save")
+    worker.submit("filter", lambda job, progress: "filtered", results.append)
+    settle(widget, worker)
+    assert sorted(results) == ["filtered", "saved"]
+
+
+def test_failing_callback_does_not_stop_polling(widget, worker, capsys):
+    release = threading.Event()
+    results = []
+
+    def boom(value):
+        raise RuntimeError("callback failed")
+
+    worker.submit("first", lambda job, progress: 1, boom, key="first")
+    worker.submit("second", lambda job, progress: release.wait(5) and 2, results.append, key="second")
+    deadline = time.monotonic() + 5
+    while worker.is_busy("first") and time.monotonic() < deadline:
+        widget.run_pending()
+        time.sleep(0.002)
+    release.set()
+    settle(widget, worker)
+    assert results == [2]
+    assert "callback failed" in capsys.readouterr().err
+
+
+def test_cancelled_job_raises_on_check(worker):
+    job = worker.submit("job", lambda job, progress: None, lambda value: None)
+    job.cancel()
+    with pytest.raises(JobCancelled):
+        job.check()